@@ -1,68 +1,184 @@
+import asyncio
 import gradio as gr
-import faiss
-import json
-import tempfile
+import logging
 import datetime
-import numpy as np
 import sys
+import threading
 from pathlib import Path
 
 APP_ROOT = Path(__file__).parent
 sys.path.insert(0, str(APP_ROOT / "src"))
 
 from fot_recommender.config import (  # noqa: E402
-    FAISS_INDEX_PATH,
-    FINAL_KB_CHUNKS_PATH,
-    CITATIONS_PATH,
+    AUDIT_LOG_ENABLED,
+    EXPORT_TTL_SECONDS,
     FOT_GOOGLE_API_KEY,
+    KB_RELOAD_INTERVAL_SECONDS,
+    LLM_BACKEND,
     DEMO_PASSWORD,
     DEMO_PASSWORD_2,
     SEARCH_RESULT_COUNT_K,
     MIN_SIMILARITY_SCORE,
+    QUERY_MICROBATCH_ENABLED,
 )
 from fot_recommender.utils import (  # noqa: E402
-    load_citations,
+    configure_logging,
     format_evidence_for_display,
+    preload,
 )
+from fot_recommender.metrics import (  # noqa: E402
+    REQUESTS,
+    start_metrics_exporters,
+    timed,
+)
+from fot_recommender.audit_log import (  # noqa: E402
+    AuditLogWriter,
+    write_evaluation_export,
+)
+from fot_recommender.embedding_cache import QueryEmbeddingCache  # noqa: E402
+from fot_recommender.examples import EXAMPLE_NARRATIVES  # noqa: E402
+from fot_recommender.kb_snapshot import SnapshotManager  # noqa: E402
+from fot_recommender.microbatch import MicroBatcher  # noqa: E402
+from fot_recommender.profiling import profiled  # noqa: E402
+from fot_recommender import rag_pipeline  # noqa: E402
 from fot_recommender.rag_pipeline import (  # noqa: E402
-    load_knowledge_base,
     initialize_embedding_model,
-    generate_recommendation_summary,
+    encode_queries,
+    search_interventions,
+    search_interventions_batch,
+    GenerationError,
+    generate_all_personas_async,
+    stream_recommendation_summary_async,
 )
 
-# --- Define Example Narratives for the UI (with new 'short_title') ---
-EXAMPLE_NARRATIVES = [
-    {
-        "short_title": "Overwhelmed",
-        "title": "Overwhelmed Freshman (Academic & Attendance)",
-        "narrative": "A comprehensive support plan is urgently needed for this freshman. Academic performance is a critical concern, with failures in both Math and English leading to a credit deficiency of only 2 out of 4 expected credits. This academic struggle is compounded by a drop in attendance to 85% and a recent behavioral flag for an outburst in class, suggesting the student is significantly overwhelmed by the transition to high school.",
-    },
-    {
-        "short_title": "Withdrawn",
-        "title": "Withdrawn Freshman (Social-Emotional)",
-        "narrative": "Academically, this freshman appears to be thriving, with a high GPA and perfect attendance. A closer look at classroom performance, however, reveals a student who is completely withdrawn. They do not participate in discussions or engage in any extracurricular activities, and teacher notes repeatedly describe them as 'isolated.' The lack of behavioral flags is a result of non-engagement, not positive conduct, pointing to a clear need for interventions focused on social-emotional learning and school connectedness.",
-    },
-    {
-        "short_title": "Disruptive",
-        "title": "Disruptive Freshman (Behavioral)",
-        "narrative": "While this student's academics and credits earned are currently on track and attendance is acceptable at 92%, a significant pattern of disruptive behavior is jeopardizing their long-term success. An accumulation of five behavioral flags across multiple classes indicates a primary need for interventions in behavior management and positive conduct. Support should be focused on mentoring and strategies to foster appropriate classroom engagement before these behaviors begin to negatively impact their academic standing.",
-    },
-]
+logger = logging.getLogger(__name__)
+
+# Persona choice that generates every persona's version from one retrieval.
+ALL_PERSONAS = "all"
+
+# --- Example Narratives for the UI ---
 EXAMPLE_MAP = {ex["short_title"]: ex["narrative"] for ex in EXAMPLE_NARRATIVES}
 EXAMPLE_TITLES = list(EXAMPLE_MAP.keys())
 
 # --- Initialize models and data ---
-print("--- Initializing API: Loading models and data... ---")
-index = faiss.read_index(str(FAISS_INDEX_PATH))
-knowledge_base_chunks = load_knowledge_base(str(FINAL_KB_CHUNKS_PATH))
-citations_map = load_citations(str(CITATIONS_PATH))
-embedding_model = initialize_embedding_model()
-print("✅ API initialized successfully.")
+# Loading the index, knowledge base and embedding model takes several seconds,
+# so it happens in a background thread (see `warmup`) and the HTTP listener
+# comes up immediately. Requests that arrive early wait for `_ready`.
+# The index, chunks and citations live in `knowledge_base`, which swaps in new
+# builds while the server runs (see kb_snapshot.py).
+query_cache = QueryEmbeddingCache()
+knowledge_base = SnapshotManager()
+audit_log = AuditLogWriter() if AUDIT_LOG_ENABLED else None
+_resources: dict = {}
+_ready = threading.Event()
+_warmup_lock = threading.Lock()
+_warmup_error: Exception | None = None
+
+
+def warmup():
+    """
+    Loads everything the request path needs: the FAISS index, knowledge base,
+    citations, embedding model and the Gemini SDK, then starts watching for
+    new knowledge base builds. The query cache is pre-warmed
+    with the example narratives so those requests skip the model entirely.
+    Safe to call more than once; only the first call does any work.
+    """
+    global _warmup_error
+    with _warmup_lock:
+        if _ready.is_set():
+            return
+        try:
+            logger.info("Initializing API: loading models and data...")
+            # The index and chunks are memory-mapped, so worker processes
+            # share one copy in the page cache and a request only touches the
+            # rows it retrieves.
+            knowledge_base.load()
+            _resources["embedding_model"] = initialize_embedding_model()
+            encode_queries(
+                [ex["narrative"] for ex in EXAMPLE_NARRATIVES],
+                _resources["embedding_model"],
+                query_cache=query_cache,
+            )
+            preload(rag_pipeline.genai)
+            if KB_RELOAD_INTERVAL_SECONDS > 0:
+                knowledge_base.watch(KB_RELOAD_INTERVAL_SECONDS)
+            logger.info("API initialized successfully.")
+        except Exception as e:
+            _warmup_error = e
+            logger.exception("API initialization failed: %s", e)
+            raise
+        finally:
+            _ready.set()
+
+
+def retrieve_batch(items):
+    """
+    Encodes and searches many `(narrative, snapshot)` requests (see
+    `retriever`), one search per knowledge base version: a batch that spans a
+    reload still answers each request from the version it started on.
+    """
+    results = [None] * len(items)
+    by_version = {}
+    for position, (_, snapshot) in enumerate(items):
+        by_version.setdefault(id(snapshot), []).append(position)
+    for positions in by_version.values():
+        snapshot = items[positions[0]][1]
+        batch_results = search_interventions_batch(
+            queries=[items[p][0] for p in positions],
+            model=_resources["embedding_model"],
+            index=snapshot.index,
+            knowledge_base=snapshot.knowledge_base,
+            k=SEARCH_RESULT_COUNT_K,
+            min_similarity_score=MIN_SIMILARITY_SCORE,
+            query_cache=query_cache,
+        )
+        for position, result in zip(positions, batch_results):
+            results[position] = result
+    return results
+
+
+# Concurrent requests queue their narratives here rather than each running its
+# own single-item encode, so one encode and one index search serve all of the
+# requests that arrive within a few milliseconds of each other.
+retriever = (
+    MicroBatcher(retrieve_batch, name="retrieve") if QUERY_MICROBATCH_ENABLED else None
+)
+
+
+def start_background_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warmup, name="fot-warmup", daemon=True)
+    thread.start()
+    return thread
 
 
-def get_recommendations_api(student_narrative, persona, password):
-    """The main function that runs the RAG pipeline and prepares data for export."""
+async def get_recommendations_api(student_narrative, persona, password):
+    """
+    The main function that runs the RAG pipeline and prepares data for export.
+
+    It is an async generator: CPU-bound retrieval runs in a worker thread and
+    the LLM call is awaited, so one process can hold many concurrent requests
+    without pinning a thread per in-flight generation. Each request's total
+    wall time and outcome are recorded in the metrics registry.
+
+    With FOT_PROFILE set, each request is profiled and the profile's path is
+    recorded in its evaluation bundle. The profiler sees the whole event loop,
+    so requests are best profiled one at a time.
+    """
+    try:
+        with timed("request_total"), profiled("request") as profile:
+            async for update in _run_recommendation(
+                student_narrative, persona, password, profile_path=profile.path
+            ):
+                yield update
+    except Exception:
+        REQUESTS.inc(status="error")
+        logger.exception("Recommendation request failed.")
+        raise
+
+
+async def _run_recommendation(student_narrative, persona, password, profile_path=None):
     if password != DEMO_PASSWORD and password != DEMO_PASSWORD_2:
+        REQUESTS.inc(status="auth_failed")
         yield (
             "Authentication failed. Please enter a valid Access Key.",
             gr.update(interactive=True),
@@ -72,7 +188,7 @@ def get_recommendations_api(student_narrative, persona, password):
         )
         return
 
-    if not FOT_GOOGLE_API_KEY:
+    if not FOT_GOOGLE_API_KEY and LLM_BACKEND != "fake":
         yield (
             "ERROR: The Google API Key is not configured. Please set the FOT_GOOGLE_API_KEY in the .env file.",
             gr.update(interactive=True),
@@ -93,25 +209,56 @@ def get_recommendations_api(student_narrative, persona, password):
         return
 
     yield (
-        "Processing...",
+        "Processing..." if _ready.is_set() else "Loading models, please wait...",
         gr.update(interactive=False),
         gr.update(visible=False),
         None,
         gr.update(visible=False),
     )
 
+    await asyncio.to_thread(_ready.wait)
+    if _warmup_error is not None:
+        yield (
+            f"ERROR: The API failed to initialize: {_warmup_error}",
+            gr.update(interactive=True),
+            gr.update(visible=False),
+            None,
+            gr.update(visible=False),
+        )
+        return
+    # Pin this request to the current knowledge base version; a reload that
+    # lands mid-request only affects the requests that start after it, and
+    # the old version is closed only once every request pinning it is done.
+    with knowledge_base.pinned() as snapshot:
+        async for update in _answer(student_narrative, persona, snapshot, profile_path):
+            yield update
+
+
+async def _answer(student_narrative, persona, snapshot, profile_path=None):
+    citations_map = snapshot.citations_map
+    embedding_model = _resources["embedding_model"]
+
     # 1. RETRIEVE
-    query_embedding = np.asarray(embedding_model.encode([student_narrative])).astype(
-        "float32"
-    )
-    scores, indices = index.search(query_embedding, k=SEARCH_RESULT_COUNT_K)
-    retrieved_chunks_with_scores = [
-        (knowledge_base_chunks[i], score)
-        for i, score in zip(indices[0], scores[0])
-        if score >= MIN_SIMILARITY_SCORE
-    ]
+    with timed("retrieve"):
+        if retriever is not None:
+            retrieved_chunks_with_scores = await asyncio.wrap_future(
+                retriever.submit((student_narrative, snapshot))
+            )
+        else:
+            retrieved_chunks_with_scores = await asyncio.to_thread(
+                search_interventions,
+                query=student_narrative,
+                model=embedding_model,
+                index=snapshot.index,
+                knowledge_base=snapshot.knowledge_base,
+                k=SEARCH_RESULT_COUNT_K,
+                min_similarity_score=MIN_SIMILARITY_SCORE,
+                query_cache=query_cache,
+            )
+    logger.debug("Query embedding cache: %s", query_cache.stats())
 
     if not retrieved_chunks_with_scores:
+        REQUESTS.inc(status="no_results")
         yield (
             "Could not find relevant interventions.",
             gr.update(interactive=True),
@@ -121,69 +268,127 @@ def get_recommendations_api(student_narrative, persona, password):
         )
         return
 
-    # 2. GENERATE
-    synthesized_recommendation, llm_prompt_details = generate_recommendation_summary(
-        retrieved_chunks=retrieved_chunks_with_scores,
-        student_narrative=student_narrative,
-        api_key=FOT_GOOGLE_API_KEY,
-        persona=persona,
-    )
+    # 2. GENERATE (a single persona is streamed into the output as tokens arrive)
+    recommendations_by_persona = None
+    try:
+        if persona == ALL_PERSONAS:
+            # One retrieval, one shared context, and all persona calls in flight
+            # at once: about the wall time of a single generation.
+            results = await generate_all_personas_async(
+                retrieved_chunks=retrieved_chunks_with_scores,
+                student_narrative=student_narrative,
+                api_key=FOT_GOOGLE_API_KEY or "",
+            )
+            recommendations_by_persona = {p: text for p, (text, _) in results.items()}
+            llm_prompt_details = {p: details for p, (_, details) in results.items()}
+            synthesized_recommendation = "\n\n".join(
+                f"## For the {p.capitalize()}\n\n{text}"
+                for p, text in recommendations_by_persona.items()
+            )
+        else:
+            recommendation_stream, llm_prompt_details = (
+                stream_recommendation_summary_async(
+                    retrieved_chunks=retrieved_chunks_with_scores,
+                    student_narrative=student_narrative,
+                    api_key=FOT_GOOGLE_API_KEY or "",
+                    persona=persona,
+                )
+            )
+            synthesized_recommendation = ""
+            async for text_chunk in recommendation_stream:
+                synthesized_recommendation += text_chunk
+                yield (
+                    synthesized_recommendation,
+                    gr.update(interactive=False),
+                    gr.update(visible=False),
+                    None,
+                    gr.update(visible=False),
+                )
+    except GenerationError as e:
+        # Any partial text is dropped: a truncated recommendation must not be
+        # mistaken for a complete one.
+        REQUESTS.inc(status="llm_error")
+        yield (
+            f"ERROR: The recommendation could not be generated. {e}\n\n"
+            "Please try again in a few minutes.",
+            gr.update(interactive=True),
+            gr.update(visible=False),
+            None,
+            gr.update(visible=False),
+        )
+        return
 
     # 3. Augment with evidence for UI
-    formatted_evidence = format_evidence_for_display(
-        retrieved_chunks_with_scores, citations_map
-    )
-    evidence_header = "\n\n---\n\n### Evidence Base\n"
-    evidence_list_str = ""
-    for evidence in formatted_evidence:
-        evidence_list_str += f"\n- **{evidence['title']}**\n"
-        evidence_list_str += f"  - **Source:** {evidence['source']}\n"
-        evidence_list_str += f"  - **Page(s):** {evidence['pages']}\n"
-        evidence_list_str += f"  - **Relevance Score:** {evidence['score']}\n"
-        evidence_list_str += (
-            f"  - **Content Snippet:**\n  > {evidence['content_snippet']}\n"
+    with timed("evidence_format"):
+        formatted_evidence = format_evidence_for_display(
+            retrieved_chunks_with_scores, citations_map
+        )
+        evidence_header = "\n\n---\n\n### Evidence Base\n"
+        evidence_list_str = ""
+        for evidence in formatted_evidence:
+            evidence_list_str += f"\n- **{evidence['title']}**\n"
+            evidence_list_str += f"  - **Source:** {evidence['source']}\n"
+            evidence_list_str += f"  - **Page(s):** {evidence['pages']}\n"
+            evidence_list_str += f"  - **Relevance Score:** {evidence['score']}\n"
+            evidence_list_str += (
+                f"  - **Content Snippet:**\n  > {evidence['content_snippet']}\n"
+            )
+        final_ui_output = (
+            synthesized_recommendation + evidence_header + evidence_list_str
         )
-    final_ui_output = synthesized_recommendation + evidence_header + evidence_list_str
 
     # 4. Assemble Evaluation Data
-    evaluation_data = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "inputs": {"student_narrative": student_narrative, "persona": persona},
-        "retrieval_results": [
-            {
-                "chunk_title": chunk["title"],
-                "relevance_score": float(score),
-                "source_document": chunk["source_document"],
-                "page_info": chunk.get("fot_pages", "N/A"),
-                "original_content": chunk.get("original_content", ""),
-                "citation_info": citations_map.get(chunk["source_document"], {}),
-            }
-            for chunk, score in retrieved_chunks_with_scores
-        ],
-        "llm_prompt_details": llm_prompt_details,
-        "outputs": {
-            "llm_synthesized_recommendation": synthesized_recommendation,
-            "final_formatted_ui_output": final_ui_output,
-        },
-    }
-
-    # 5. Create a temporary file for download
-    with tempfile.NamedTemporaryFile(
-        mode="w", delete=False, suffix=".json", encoding="utf-8"
-    ) as f:
-        json.dump(evaluation_data, f, indent=4)
-        temp_file_path = f.name
+    with timed("bundle_build"):
+        evaluation_data = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "inputs": {"student_narrative": student_narrative, "persona": persona},
+            "knowledge_base_version": snapshot.version,
+            "retrieval_results": [
+                {
+                    "chunk_title": chunk["title"],
+                    "relevance_score": float(score),
+                    "source_document": chunk["source_document"],
+                    "page_info": chunk.get("fot_pages", "N/A"),
+                    "original_content": chunk.get("original_content", ""),
+                    "citation_info": citations_map.get(chunk["source_document"], {}),
+                }
+                for chunk, score in retrieved_chunks_with_scores
+            ],
+            "llm_prompt_details": llm_prompt_details,
+            "profile_path": str(profile_path) if profile_path else None,
+            "outputs": {
+                "llm_synthesized_recommendation": synthesized_recommendation,
+                "llm_recommendations_by_persona": recommendations_by_persona,
+                "final_formatted_ui_output": final_ui_output,
+            },
+        }
+
+    # 5. Hand the bundle to the background audit log writer. The download
+    # file is only written if the user asks for it (see `export_evaluation`).
+    if audit_log is not None:
+        with timed("audit_enqueue"):
+            audit_log.write(evaluation_data)
+    REQUESTS.inc(status="ok")
 
     yield (
         final_ui_output,
         gr.update(interactive=True),
         gr.update(visible=True),
         evaluation_data,
-        gr.update(value=temp_file_path, visible=True),
+        gr.update(visible=True),
     )
 
 
 # --- UI Helper Functions ---
+def export_evaluation(evaluation_data):
+    """Writes the shown evaluation bundle to an expiring JSON file for download."""
+    if not evaluation_data:
+        return gr.update(visible=False, value=None)
+    with timed("bundle_write"):
+        path = write_evaluation_export(evaluation_data)
+    return gr.update(value=str(path), visible=True)
+
+
 def clear_all():
     return (
         "",
@@ -191,6 +396,7 @@ def clear_all():
         "",
         gr.update(visible=False),
         None,
+        gr.update(visible=False),
         gr.update(visible=False, value=None),
     )
 
@@ -204,7 +410,13 @@ CUSTOM_CSS = """
 """
 
 # --- Gradio Interface ---
-with gr.Blocks(theme=gr.themes.Soft(), css=CUSTOM_CSS) as interface:  # type: ignore
+# Gradio copies served files into its own cache; expire those copies on the
+# same schedule as the exports themselves.
+with gr.Blocks(
+    theme=gr.themes.Soft(),
+    css=CUSTOM_CSS,
+    delete_cache=(EXPORT_TTL_SECONDS, EXPORT_TTL_SECONDS),
+) as interface:  # type: ignore
     gr.Markdown(
         "# Freshman On-Track Intervention Recommender\n*A live API demonstrating the FOT Recommender.*"
     )
@@ -223,7 +435,7 @@ with gr.Blocks(theme=gr.themes.Soft(), css=CUSTOM_CSS) as interface:  # type: ig
                     elem_classes=["radio-horizontal"],
                 )
                 persona_input = gr.Radio(
-                    ["teacher", "parent", "principal"],
+                    ["teacher", "parent", "principal", ALL_PERSONAS],
                     label="Who is this recommendation for?",
                     value="teacher",
                     elem_classes=["radio-horizontal"],
@@ -244,6 +456,7 @@ with gr.Blocks(theme=gr.themes.Soft(), css=CUSTOM_CSS) as interface:  # type: ig
                 "Evaluation Data", open=False, visible=False
             ) as eval_accordion:
                 json_viewer = gr.JSON(label="Evaluation JSON")
+                export_btn = gr.Button("Prepare JSON Download", visible=False)
                 download_btn = gr.DownloadButton("Download JSON", visible=False)
 
     # --- Event Handlers ---
@@ -259,9 +472,15 @@ with gr.Blocks(theme=gr.themes.Soft(), css=CUSTOM_CSS) as interface:  # type: ig
             submit_btn,
             eval_accordion,
             json_viewer,
-            download_btn,
+            export_btn,
         ],
     )
+    submit_btn.click(
+        fn=lambda: gr.update(visible=False, value=None),
+        inputs=None,
+        outputs=download_btn,
+    )
+    export_btn.click(fn=export_evaluation, inputs=json_viewer, outputs=download_btn)
     clear_btn.click(
         fn=clear_all,
         inputs=[],
@@ -271,10 +490,15 @@ with gr.Blocks(theme=gr.themes.Soft(), css=CUSTOM_CSS) as interface:  # type: ig
             recommendation_output,
             eval_accordion,
             json_viewer,
+            export_btn,
             download_btn,
         ],
     )
 
 
+configure_logging()
+start_metrics_exporters()
+start_background_warmup()
+
 if __name__ == "__main__":
     interface.launch()
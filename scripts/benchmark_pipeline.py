@@ -0,0 +1,410 @@
+"""
+Retrieval and build benchmark suite with synthetic knowledge-base scale-up.
+
+The real KB is only a few dozen chunks, so this script synthesizes larger
+knowledge bases (1k to 1M chunks) from `knowledge_base_final_chunks.json` and
+measures, for each size:
+
+*   `create_embeddings` throughput (on a sample of the synthetic chunks),
+*   `create_vector_db` build time, index size and process memory growth,
+*   `search_interventions` p50/p99 latency at several values of k,
+*   recall@k against exact FlatIP search, for each `--index-types` entry.
+
+It also compares the query encoder backends in `--encoder-backends` against
+the full-precision "torch" reference: single-query encode latency on the
+example narratives, and embedding/retrieval parity on the real KB.
+
+Query embeddings are served from a pre-warmed `QueryEmbeddingCache`, so the
+search latency covers the FAISS search and result filtering, not the
+transformer forward pass (that cost is what the embedding throughput measures).
+
+Synthetic vectors are noisy copies of the real chunk embeddings. When the
+embedding model can't be loaded (e.g. offline), deterministic random unit
+vectors are used instead and the embedding stage is skipped; the results
+record which source was used.
+
+Results are written as JSON (by default to `benchmarks/results/`) so runs on
+different commits can be compared with `--baseline`:
+
+    python scripts/benchmark_pipeline.py --sizes 1000 10000 100000
+    python scripts/benchmark_pipeline.py --baseline benchmarks/results/<old>.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import hashlib
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.fot_recommender.config import (  # noqa: E402
+    EMBEDDING_MODEL_NAME,
+    FINAL_KB_CHUNKS_PATH,
+    MIN_SIMILARITY_SCORE,
+)
+from src.fot_recommender.embedding_backends import (  # noqa: E402
+    EMBEDDING_BACKENDS,
+    encoder_parity,
+    load_embedding_model,
+    query_latency,
+)
+from src.fot_recommender.embedding_cache import QueryEmbeddingCache  # noqa: E402
+from src.fot_recommender.examples import EXAMPLE_NARRATIVES  # noqa: E402
+from src.fot_recommender.rag_pipeline import (  # noqa: E402
+    create_embeddings,
+    create_vector_db,
+    initialize_embedding_model,
+    load_knowledge_base,
+    search_interventions,
+)
+from src.fot_recommender.vector_index import INDEX_TYPES, recall_report  # noqa: E402
+
+DEFAULT_RESULTS_DIR = project_root / "benchmarks" / "results"
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_KS = [1, 3, 10, 50]
+
+
+# --- Synthetic data ---
+def synthesize_chunks(base_chunks: list, n: int) -> list:
+    """Replicates the real chunks up to `n`, making every copy's text unique."""
+    chunks = []
+    for i in range(n):
+        base = base_chunks[i % len(base_chunks)]
+        variant = i // len(base_chunks)
+        chunk = dict(base)
+        chunk["title"] = f"{base['title']} (synthetic {variant})"
+        chunk["content_for_embedding"] = (
+            f"{base['content_for_embedding']} [variant {variant}]"
+        )
+        chunks.append(chunk)
+    return chunks
+
+
+def random_unit_vectors(texts: list, dimension: int) -> np.ndarray:
+    """Deterministic stand-in embeddings, seeded by each text's hash."""
+    vectors = np.empty((len(texts), dimension), dtype="float32")
+    for row, text in enumerate(texts):
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        vectors[row] = np.random.default_rng(seed).standard_normal(dimension)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthesize_embeddings(
+    base_vectors: np.ndarray, n: int, noise: float, seed: int = 0
+) -> np.ndarray:
+    """Tiles the base embeddings to `n` rows, adds noise and re-normalizes."""
+    rng = np.random.default_rng(seed)
+    vectors = np.empty((n, base_vectors.shape[1]), dtype="float32")
+    block = 100_000  # Bound peak memory for the 1M case.
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        chunk = base_vectors[rows % len(base_vectors)]
+        chunk = chunk + noise * rng.standard_normal(chunk.shape).astype("float32")
+        vectors[rows] = chunk / np.linalg.norm(chunk, axis=1, keepdims=True)
+    return vectors
+
+
+# --- Measurement helpers ---
+def _rss_bytes() -> int:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(samples_seconds: list) -> dict:
+    samples_ms = np.asarray(samples_seconds) * 1000
+    return {
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+        "mean_ms": float(samples_ms.mean()),
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silences the pipeline's info-level progress logging inside timed loops."""
+    # The package logs under both names, depending on how a module was imported.
+    loggers = [logging.getLogger(name) for name in ("fot_recommender", "src")]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(max(logger.getEffectiveLevel(), logging.WARNING))
+    try:
+        yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=project_root,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# --- Benchmarks ---
+def bench_embeddings(model, chunks: list) -> dict:
+    with _quiet():
+        start = time.perf_counter()
+        create_embeddings(chunks, model)
+        elapsed = time.perf_counter() - start
+    return {
+        "chunks": len(chunks),
+        "seconds": elapsed,
+        "chunks_per_second": len(chunks) / elapsed,
+    }
+
+
+def bench_encoders(reference, backends: list, corpus: list) -> dict:
+    """Query latency per backend, plus parity with the reference for the others."""
+    queries = [example["narrative"] for example in EXAMPLE_NARRATIVES]
+    results = {"torch": {"latency": query_latency(reference, queries)}}
+    for backend in backends:
+        if backend == "torch":
+            continue
+        try:
+            with _quiet():
+                model = load_embedding_model(backend=backend)
+        except Exception as e:  # e.g. the onnx extras aren't installed.
+            print(f"WARNING: Skipping encoder backend {backend}: {e}")
+            continue
+        results[backend] = {
+            "latency": query_latency(model, queries),
+            "parity": encoder_parity(reference, model, queries, corpus),
+        }
+    return results
+
+
+def bench_build(vectors: np.ndarray, index_type: str) -> tuple:
+    rss_before = _rss_bytes()
+    with _quiet():
+        start = time.perf_counter()
+        index = create_vector_db(vectors, index_type=index_type)
+        elapsed = time.perf_counter() - start
+    return index, {
+        "seconds": elapsed,
+        "index_bytes": int(faiss.serialize_index(index).nbytes),
+        "rss_growth_bytes": max(_rss_bytes() - rss_before, 0),
+    }
+
+
+def bench_search(
+    index, knowledge_base: list, query_vectors: np.ndarray, ks: list
+) -> dict:
+    queries = [f"benchmark query {i}" for i in range(len(query_vectors))]
+    query_cache = QueryEmbeddingCache(maxsize=len(queries))
+    for query, vector in zip(queries, query_vectors):
+        query_cache.put(query, EMBEDDING_MODEL_NAME, vector)
+
+    results = {}
+    for k in ks:
+        latencies = []
+        with _quiet():
+            for query in queries:
+                start = time.perf_counter()
+                search_interventions(
+                    query=query,
+                    model=None,  # Never called: every query is cached.
+                    index=index,
+                    knowledge_base=knowledge_base,
+                    k=k,
+                    min_similarity_score=MIN_SIMILARITY_SCORE,
+                    query_cache=query_cache,
+                )
+                latencies.append(time.perf_counter() - start)
+        results[f"k={k}"] = _percentiles(latencies)
+    return results
+
+
+def run(args) -> dict:
+    base_chunks = load_knowledge_base(str(FINAL_KB_CHUNKS_PATH))
+    base_texts = [c["content_for_embedding"] for c in base_chunks]
+
+    model = None
+    if not args.skip_embed:
+        try:
+            model = initialize_embedding_model(backend="torch")
+        except Exception as e:  # Typically no network access to the model hub.
+            print(f"WARNING: Embedding model unavailable ({e}); using random vectors.")
+
+    if model is not None:
+        base_vectors = np.asarray(model.encode(base_texts)).astype("float32")
+        base_vectors /= np.linalg.norm(base_vectors, axis=1, keepdims=True)
+    else:
+        base_vectors = random_unit_vectors(base_texts, args.dimension)
+
+    results = {
+        "metadata": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "faiss": faiss.__version__,
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+            "embedding_source": "model" if model is not None else "random",
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "noise": args.noise,
+            "queries": args.queries,
+            "ks": args.ks,
+            "index_types": args.index_types,
+        },
+        "sizes": {},
+    }
+
+    if model is not None:
+        print("\n--- Query encoder backends ---")
+        results["encoders"] = bench_encoders(model, args.encoder_backends, base_texts)
+        for backend, stats in results["encoders"].items():
+            latency = stats["latency"]
+            line = (
+                f"[{backend}] encode 1 query: p50 {latency['p50_ms']:.2f} ms, "
+                f"p95 {latency['p95_ms']:.2f} ms"
+            )
+            if "parity" in stats:
+                parity = stats["parity"]
+                line += (
+                    f"; cosine vs torch min {parity['min_cosine']:.4f}, "
+                    f"top-1 agreement {parity['top1_agreement']:.0%}"
+                )
+            print(line)
+
+    for size in args.sizes:
+        print(f"\n--- Synthetic KB with {size:,} chunks ---")
+        chunks = synthesize_chunks(base_chunks, size)
+        size_results: dict = {}
+
+        if model is not None:
+            sample = chunks[: min(size, args.embed_sample)]
+            size_results["embeddings"] = bench_embeddings(model, sample)
+            print(
+                f"create_embeddings: {size_results['embeddings']['chunks_per_second']:.1f} chunks/s"
+            )
+
+        vectors = synthesize_embeddings(base_vectors, size, args.noise)
+        query_vectors = synthesize_embeddings(
+            base_vectors, args.queries, args.noise, seed=1
+        )
+        size_results["indexes"] = {}
+        for index_type in args.index_types:
+            index, build_stats = bench_build(vectors, index_type)
+            print(
+                f"[{index_type}] create_vector_db: {build_stats['seconds'] * 1000:.1f} ms, "
+                f"{build_stats['index_bytes'] / 2**20:.1f} MiB index"
+            )
+            search_stats = bench_search(index, chunks, query_vectors, args.ks)
+            for k, stats in search_stats.items():
+                print(
+                    f"[{index_type}] search_interventions {k}: "
+                    f"p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms"
+                )
+            with _quiet():
+                recall = recall_report(
+                    index, vectors, ks=args.ks, n_queries=args.queries
+                )["recall"]
+            print(f"[{index_type}] {recall}")
+            size_results["indexes"][index_type] = {
+                "build": build_stats,
+                "search": search_stats,
+                "recall": recall,
+            }
+            del index
+
+        results["sizes"][str(size)] = size_results
+        del vectors, chunks
+
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Prints how this run's timings compare to a previous results file."""
+    print(f"\n--- Compared to {baseline['metadata']['git_commit']} (ratio new/old) ---")
+    for size, current in results["sizes"].items():
+        previous_indexes = baseline["sizes"].get(size, {}).get("indexes", {})
+        for index_type, stats in current["indexes"].items():
+            previous = previous_indexes.get(index_type)
+            if previous is None:
+                continue
+            build_ratio = stats["build"]["seconds"] / previous["build"]["seconds"]
+            print(f"{size:>8} chunks [{index_type}] build x{build_ratio:.2f}")
+            for k, search in stats["search"].items():
+                if k in previous["search"]:
+                    p99_ratio = search["p99_ms"] / previous["search"][k]["p99_ms"]
+                    print(
+                        f"{'':>8}        [{index_type}] search {k} p99 x{p99_ratio:.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval and KB build.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ks", type=int, nargs="+", default=DEFAULT_KS)
+    parser.add_argument(
+        "--index-types",
+        nargs="+",
+        choices=INDEX_TYPES,
+        default=["flat"],
+        help="FAISS index types to build and search; recall is against exact FlatIP.",
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--embed-sample",
+        type=int,
+        default=1_000,
+        help="Max chunks per size to actually encode for the throughput number.",
+    )
+    parser.add_argument("--skip-embed", action="store_true")
+    parser.add_argument(
+        "--encoder-backends",
+        nargs="+",
+        choices=EMBEDDING_BACKENDS,
+        default=["torch", "torch-int8"],
+        help="Query encoder backends to time and check against the torch reference.",
+    )
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument(
+        "--dimension",
+        type=int,
+        default=384,
+        help="Vector size for random embeddings (all-MiniLM-L6-v2 is 384).",
+    )
+    parser.add_argument("--output", help="Results path (default: benchmarks/results/).")
+    parser.add_argument("--baseline", help="Previous results file to compare against.")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    output = Path(
+        args.output
+        or DEFAULT_RESULTS_DIR
+        / f"{datetime.datetime.now():%Y%m%d-%H%M%S}_{results['metadata']['git_commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✅ Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
@@ -0,0 +1,110 @@
+"""
+Measures cold-start cost: how long it takes to import the package modules and
+how long the API takes to become ready to serve its first request.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+
+    python scripts/benchmark_startup.py --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+IMPORT_TARGETS = [
+    "fot_recommender.utils",
+    "fot_recommender.semantic_chunker",
+    "fot_recommender.rag_pipeline",
+    "fot_recommender",
+]
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+# `import app` brings up the Gradio UI and starts the background warmup;
+# `warmup()` then blocks until the model and index are resident.
+READY_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.warmup()
+ready = time.perf_counter()
+print(json.dumps({{"import_app_seconds": imported - start,
+                  "time_to_ready_seconds": ready - start}}))
+"""
+
+
+def _run_snippet(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=project_root,
+    )
+    # The measurement is always the last line; everything else is log output.
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summarize(samples: list) -> dict:
+    return {
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "max_seconds": max(samples),
+        "samples": samples,
+    }
+
+
+def run(repeat: int, include_app: bool) -> dict:
+    results: dict = {"python": sys.version.split()[0], "imports": {}}
+
+    for module in IMPORT_TARGETS:
+        samples = [
+            _run_snippet(IMPORT_SNIPPET.format(module=module))["seconds"]
+            for _ in range(repeat)
+        ]
+        results["imports"][module] = _summarize(samples)
+        print(f"import {module:<35} {statistics.median(samples) * 1000:8.1f} ms")
+
+    if include_app:
+        samples = [
+            _run_snippet(READY_SNIPPET.format(root=str(project_root)))
+            for _ in range(repeat)
+        ]
+        results["app"] = {
+            key: _summarize([s[key] for s in samples])
+            for key in ("import_app_seconds", "time_to_ready_seconds")
+        }
+        for key, summary in results["app"].items():
+            print(f"app {key:<39} {summary['median_seconds'] * 1000:8.1f} ms")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark import and startup time.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--skip-app",
+        action="store_true",
+        help="Only measure package imports (no model download or index load).",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat, include_app=not args.skip_app)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
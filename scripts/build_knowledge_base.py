@@ -1,8 +1,12 @@
+import argparse
+import hashlib
 import json
+import logging
+import os
 import sys
-import faiss
 import numpy as np
 from pathlib import Path
+from typing import Iterator
 
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
@@ -15,52 +19,395 @@ from src.fot_recommender.config import (  # noqa: E402
     FINAL_KB_CHUNKS_PATH,
     FAISS_INDEX_PATH,
     EMBEDDING_MODEL_NAME,
+    EMBEDDING_CONTENT_KEY,
+    EMBEDDING_CACHE_PATH,
+    KB_EMBEDDINGS_PATH,
+    BUILD_STATE_PATH,
+    FAISS_INDEX_TYPE,
+    EMBEDDING_STORAGE_DTYPE,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_NUM_WORKERS,
+    EMBEDDING_STREAM_WINDOW,
+    INDEX_RECALL_REPORT_PATH,
+    KB_CHUNK_STORE_PATH,
+    KB_CHUNK_OFFSETS_PATH,
+    KB_ID_MAPS_PATH,
+    KB_MANIFEST_PATH,
+    PROFILE_ENABLED,
+)
+from src.fot_recommender.semantic_chunker import (  # noqa: E402
+    chunk_by_concept,
+    iter_raw_items_jsonl,
+    stream_chunks_by_concept,
 )
-from src.fot_recommender.semantic_chunker import chunk_by_concept  # noqa: E402
 from src.fot_recommender.rag_pipeline import (  # noqa: E402
     initialize_embedding_model,
     create_embeddings,
 )
+from src.fot_recommender.chunk_store import (  # noqa: E402
+    open_chunk_store,
+    write_chunk_store,
+)
+from src.fot_recommender.metadata_filter import (  # noqa: E402
+    build_id_maps,
+    write_id_maps,
+)
+from src.fot_recommender.embedding_cache import (  # noqa: E402
+    EmbeddingStore,
+)
+from src.fot_recommender.kb_snapshot import (  # noqa: E402
+    build_manifest,
+    default_artifacts,
+    publish_version,
+)
+from src.fot_recommender.profiling import profiled  # noqa: E402
+from src.fot_recommender.utils import configure_logging, sha256_file  # noqa: E402
+from src.fot_recommender.vector_index import (  # noqa: E402
+    INDEX_TYPES,
+    STORAGE_DTYPES,
+    build_index,
+    describe_index,
+    index_params,
+    load_index,
+    quantization_report,
+    recall_report,
+    save_index,
+)
+
+logger = logging.getLogger("build_knowledge_base")
+
+
+def _load_build_state() -> dict:
+    try:
+        with open(BUILD_STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_build_state(state: dict) -> None:
+    BUILD_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(BUILD_STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+
+
+def _stage_is_current(state: dict, stage: str, input_hash: str, output: Path) -> bool:
+    """A stage can be skipped if its output exists and was built from these inputs."""
+    return output.exists() and state.get(stage, {}).get("input_hash") == input_hash
 
 
-def build():
+def _tee_to_json_array(chunks: Iterator[dict], path: Path) -> Iterator[dict]:
+    """Passes chunks through while writing them to `path` as a JSON array."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, chunk in enumerate(chunks):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(chunk, indent=4))
+            yield chunk
+        f.write("\n]")
+    os.replace(tmp_path, path)
+
+
+def build(
+    force: bool = False,
+    raw_path: Path = RAW_KB_PATH,
+    index_type: str = FAISS_INDEX_TYPE,
+    storage_dtype: str = EMBEDDING_STORAGE_DTYPE,
+    num_workers: int = EMBEDDING_NUM_WORKERS,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+):
     """
     Builds the entire knowledge base artifact set needed by the application:
     1.  The processed, semantically chunked JSON file.
-    2.  The Facebook AI Similarity Search (FAISS) vector index file (`faiss_index.bin`).
+    2.  The random-access chunk store (content blob + offset table) that the
+        app memory-maps instead of loading the JSON file.
+    3.  Per-source and per-concept row id maps for filtered search.
+    4.  The Facebook AI Similarity Search (FAISS) vector index file (`faiss_index.bin`).
+
+    Rebuilds are incremental across runs: each stage (chunk -> embed ->
+    index) records a hash of its inputs in `BUILD_STATE_PATH` and is skipped
+    when those inputs are unchanged. Chunk embeddings are kept in a
+    content-addressed `EmbeddingStore`, so after a small KB edit only the
+    changed chunks are re-encoded. Pass `force=True` to ignore the recorded
+    state.
+
+    The index type comes from `FAISS_INDEX_TYPE` (or `index_type`). Trainable
+    types (IVF, IVF-PQ) are trained here on the full embedding set, and a
+    recall@k report against the exact FlatIP baseline is written to
+    `INDEX_RECALL_REPORT_PATH`.
+
+    Embeddings are L2-normalized. With `storage_dtype` "float16" or "int8"
+    (default `EMBEDDING_STORAGE_DTYPE`) the index is scalar-quantized, and the
+    report also records the memory saved and the score drift against float32,
+    including how many top-k scores cross `MIN_SIMILARITY_SCORE`.
+
+    With `num_workers` > 1, uncached chunks are encoded in a pool of worker
+    processes (each loading its own model) in batches of `batch_size`; the
+    result is the same array the serial path produces.
+
+    A `.jsonl` `raw_path` selects streaming ingestion: raw items are read line
+    by line and grouped by `stream_chunks_by_concept` with bounded memory, and
+    the chunks are written straight into the chunk store. The stages still
+    run one after another: the whole chunk store (and the chunks JSON, whose
+    hash keys the later stages) is written before embedding starts. Embedding
+    then reads the chunks back from the memory-mapped store in windows of
+    `EMBEDDING_STREAM_WINDOW` chunks, so streaming bounds memory, not wall
+    time: the full chunk list is never held in memory, but chunking and
+    encoding do not overlap.
+
+    Finally the build is published as a new version: its artifacts are copied
+    under `KB_VERSIONS_DIR` and `KB_MANIFEST_PATH` is swapped to point at them
+    (see `publish_version`), which is what a running server reloads from.
     """
-    print("--- Building Final Knowledge Base and FAISS Index ---")
+    logger.info("--- Building Final Knowledge Base and FAISS Index ---")
+    state = {} if force else _load_build_state()
 
     # --- Create Final Chunks ---
-    print(f"Loading raw knowledge base from: {RAW_KB_PATH}")
-    with open(RAW_KB_PATH, "r", encoding="utf-8") as f:
-        raw_kb = json.load(f)
+    raw_path = Path(raw_path)
+    raw_hash = sha256_file(raw_path)
+    final_chunks = None
+    streamed_store = False
+    if _stage_is_current(state, "chunks", raw_hash, FINAL_KB_CHUNKS_PATH):
+        logger.info("Raw knowledge base unchanged; reusing existing chunks.")
+    elif raw_path.suffix == ".jsonl":
+        logger.info("Streaming raw knowledge base from: %s", raw_path)
+        chunks = stream_chunks_by_concept(iter_raw_items_jsonl(raw_path))
+        count = write_chunk_store(
+            _tee_to_json_array(chunks, FINAL_KB_CHUNKS_PATH),
+            KB_CHUNK_STORE_PATH,
+            KB_CHUNK_OFFSETS_PATH,
+        )
+        state["chunks"] = {"input_hash": raw_hash}
+        streamed_store = True
+        logger.info("✅ Saved %d semantic chunks to %s", count, FINAL_KB_CHUNKS_PATH)
+    else:
+        logger.info("Loading raw knowledge base from: %s", raw_path)
+        with open(raw_path, "r", encoding="utf-8") as f:
+            raw_kb = json.load(f)
 
-    final_chunks = chunk_by_concept(raw_kb)
-    PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(FINAL_KB_CHUNKS_PATH, "w", encoding="utf-8") as f:
-        json.dump(final_chunks, f, indent=4)
-    print(f"✅ Saved {len(final_chunks)} semantic chunks to {FINAL_KB_CHUNKS_PATH}")
+        final_chunks = chunk_by_concept(raw_kb)
+        PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(FINAL_KB_CHUNKS_PATH, "w", encoding="utf-8") as f:
+            json.dump(final_chunks, f, indent=4)
+        state["chunks"] = {"input_hash": raw_hash}
+        logger.info(
+            "✅ Saved %d semantic chunks to %s", len(final_chunks), FINAL_KB_CHUNKS_PATH
+        )
 
-    # --- Create and Save FAISS Index ---
-    print("\n--- Creating FAISS Index ---")
+    # --- Create Chunk Store ---
+    chunks_hash = sha256_file(FINAL_KB_CHUNKS_PATH)
+    if streamed_store:
+        state["chunk_store"] = {"input_hash": chunks_hash}
+        logger.info("✅ Saved chunk store to %s", KB_CHUNK_STORE_PATH)
+    elif (
+        _stage_is_current(state, "chunk_store", chunks_hash, KB_CHUNK_STORE_PATH)
+        and KB_CHUNK_OFFSETS_PATH.exists()
+    ):
+        logger.info("Chunks unchanged; reusing existing chunk store.")
+    else:
+        if final_chunks is None:
+            with open(FINAL_KB_CHUNKS_PATH, "r", encoding="utf-8") as f:
+                final_chunks = json.load(f)
+        count = write_chunk_store(
+            final_chunks, KB_CHUNK_STORE_PATH, KB_CHUNK_OFFSETS_PATH
+        )
+        state["chunk_store"] = {"input_hash": chunks_hash}
+        logger.info(
+            "✅ Saved chunk store with %d rows to %s", count, KB_CHUNK_STORE_PATH
+        )
+
+    # --- Create Metadata Id Maps ---
+    if _stage_is_current(state, "id_maps", chunks_hash, KB_ID_MAPS_PATH):
+        logger.info("Chunks unchanged; reusing existing metadata id maps.")
+    else:
+        store = open_chunk_store(KB_CHUNK_STORE_PATH, KB_CHUNK_OFFSETS_PATH)
+        id_maps = build_id_maps(store)
+        store.close()
+        write_id_maps(id_maps, KB_ID_MAPS_PATH)
+        state["id_maps"] = {"input_hash": chunks_hash}
+        logger.info(
+            "✅ Saved id maps for %d sources and %d concepts to %s",
+            len(id_maps["source_document"]),
+            len(id_maps["concept"]),
+            KB_ID_MAPS_PATH,
+        )
 
-    # Initialize model using the name from the config file
-    model = initialize_embedding_model(model_name=EMBEDDING_MODEL_NAME)
-    embeddings = create_embeddings(final_chunks, model)
+    # --- Create Embeddings ---
+    logger.info("--- Creating Embeddings ---")
+    embed_hash = hashlib.sha256(
+        f"{chunks_hash}:{EMBEDDING_MODEL_NAME}".encode("utf-8")
+    ).hexdigest()
+    if _stage_is_current(state, "embeddings", embed_hash, KB_EMBEDDINGS_PATH):
+        logger.info(
+            "Chunks and embedding model unchanged; reusing existing embeddings."
+        )
+        embeddings = np.load(KB_EMBEDDINGS_PATH)
+    else:
+        cache = EmbeddingStore(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL_NAME)
+        store = open_chunk_store(KB_CHUNK_STORE_PATH, KB_CHUNK_OFFSETS_PATH)
+        model = None
+        parts = []
+        for start in range(0, len(store), EMBEDDING_STREAM_WINDOW):
+            window = store[start : start + EMBEDDING_STREAM_WINDOW]
+            texts = [chunk[EMBEDDING_CONTENT_KEY] for chunk in window]
+            # Only pay for loading the model if something actually needs
+            # encoding here; pool workers load their own copy.
+            if model is None and num_workers <= 1 and cache.missing(texts):
+                model = initialize_embedding_model(
+                    model_name=EMBEDDING_MODEL_NAME, backend="torch"
+                )
+            parts.append(
+                create_embeddings(
+                    window,
+                    model,
+                    cache=cache,
+                    num_workers=num_workers,
+                    batch_size=batch_size,
+                )
+            )
+        store.close()
+        embeddings = np.concatenate(parts)
+        cache.save()
+
+        # Explicitly set dtype for FAISS
+        embeddings = np.asarray(embeddings).astype("float32")
+        KB_EMBEDDINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        np.save(KB_EMBEDDINGS_PATH, embeddings)
+        state["embeddings"] = {"input_hash": embed_hash}
+
+    # --- Create and Save FAISS Index ---
+    logger.info("--- Creating FAISS Index (%s, %s) ---", index_type, storage_dtype)
+    params = index_params(index_type, storage_dtype)
+    index_hash = hashlib.sha256(
+        f"{sha256_file(KB_EMBEDDINGS_PATH)}:{json.dumps(params, sort_keys=True)}".encode(
+            "utf-8"
+        )
+    ).hexdigest()
+    if _stage_is_current(state, "index", index_hash, FAISS_INDEX_PATH):
+        logger.info(
+            "Embeddings and index settings unchanged; reusing existing FAISS index."
+        )
+    else:
+        index = build_index(
+            embeddings, index_type=index_type, storage_dtype=storage_dtype
+        )
 
-    # Explicitly set dtype for FAISS
-    embeddings = np.asarray(embeddings).astype("float32")
+        save_index(index, FAISS_INDEX_PATH)
+        state["index"] = {"input_hash": index_hash}
+        logger.info(
+            "✅ Saved FAISS index with %d vectors to %s", index.ntotal, FAISS_INDEX_PATH
+        )
 
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-    index.add(embeddings)  # type: ignore
+        report = {
+            "params": params,
+            **recall_report(index, embeddings),
+            "quantization": quantization_report(index, embeddings),
+        }
+        with open(INDEX_RECALL_REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        recall_summary = ", ".join(
+            f"{name}={value:.3f}" for name, value in report["recall"].items()
+        )
+        logger.info("Recall vs. exact FlatIP: %s", recall_summary)
+        memory = report["quantization"]["memory"]
+        drift = report["quantization"]["score_drift"]
+        logger.info(
+            "Index size: %d bytes vs. %d for float32 (%.0f%% smaller)",
+            memory["index_bytes"],
+            memory["float32_bytes"],
+            memory["reduction"] * 100,
+        )
+        logger.info(
+            "Score drift vs. float32: mean=%.4f, max=%.4f, %d of %d top-k "
+            "scores cross %s",
+            drift["mean_abs"],
+            drift["max_abs"],
+            drift["threshold_crossings"],
+            drift["pairs"],
+            drift["threshold"],
+        )
+        logger.info("✅ Saved recall report to %s", INDEX_RECALL_REPORT_PATH)
 
-    faiss.write_index(index, str(FAISS_INDEX_PATH))
-    print(f"✅ Saved FAISS index with {index.ntotal} vectors to {FAISS_INDEX_PATH}")
+    _save_build_state(state)
 
-    print("\n🎉 Success! All artifacts are built and ready for the application.")
+    # --- Publish the Version ---
+    # Done last: the artifacts are copied into their own version directory and
+    # only then does the manifest point at them, so a running server or a
+    # replica starting mid-build never sees a half-written version.
+    index = load_index(str(FAISS_INDEX_PATH))
+    store = open_chunk_store(KB_CHUNK_STORE_PATH, KB_CHUNK_OFFSETS_PATH)
+    artifacts = default_artifacts()
+    manifest = build_manifest(
+        artifacts,
+        embedding_model=EMBEDDING_MODEL_NAME,
+        dimension=index.d,
+        chunk_count=len(store),
+        index_info={**describe_index(index), "storage_dtype": storage_dtype},
+    )
+    store.close()
+    publish_version(manifest, artifacts, KB_MANIFEST_PATH)
+    logger.info(
+        "✅ Published knowledge base version %s to %s",
+        manifest["version"],
+        KB_MANIFEST_PATH,
+    )
+    logger.info("🎉 Success! All artifacts are built and ready for the application.")
 
 
 if __name__ == "__main__":
-    build()
+    parser = argparse.ArgumentParser(description="Build the knowledge base artifacts.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every stage, ignoring the recorded build state.",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=FAISS_INDEX_TYPE,
+        help="FAISS index type (default: FAISS_INDEX_TYPE from the config).",
+    )
+    parser.add_argument(
+        "--storage-dtype",
+        choices=STORAGE_DTYPES,
+        default=EMBEDDING_STORAGE_DTYPE,
+        help="Embedding/index precision (default: EMBEDDING_STORAGE_DTYPE).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBEDDING_NUM_WORKERS,
+        help="Processes used to encode chunks (default: EMBEDDING_NUM_WORKERS).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBEDDING_BATCH_SIZE,
+        help="Chunks per encode call (default: EMBEDDING_BATCH_SIZE).",
+    )
+    parser.add_argument(
+        "--raw",
+        type=Path,
+        default=RAW_KB_PATH,
+        help="Raw knowledge base (.json, or .jsonl to stream it; default: RAW_KB_PATH).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=PROFILE_ENABLED,
+        help="Profile the build with cProfile and write it under PROFILE_DIR "
+        "(default: FOT_PROFILE).",
+    )
+    args = parser.parse_args()
+    configure_logging()
+    with profiled("build", enabled=args.profile):
+        build(
+            force=args.force,
+            raw_path=args.raw,
+            index_type=args.index_type,
+            storage_dtype=args.storage_dtype,
+            num_workers=args.workers,
+            batch_size=args.batch_size,
+        )
@@ -0,0 +1,168 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fot_recommender.config import (
+    AUDIT_LOG_BACKUP_COUNT,
+    AUDIT_LOG_BATCH_SIZE,
+    AUDIT_LOG_FLUSH_SECONDS,
+    AUDIT_LOG_MAX_BYTES,
+    AUDIT_LOG_PATH,
+    AUDIT_LOG_QUEUE_SIZE,
+    EXPORT_DIR,
+    EXPORT_TTL_SECONDS,
+)
+from fot_recommender.metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+AUDIT_RECORDS = REGISTRY.register(
+    Counter(
+        "fot_audit_records_total",
+        "Evaluation bundles handed to the audit log, by outcome.",
+        labelnames=("status",),
+    )
+)
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Appends evaluation bundles to a gzipped JSONL log from a background thread.
+
+    `write` only enqueues the record, so the request path never waits on
+    disk; if the queue is full the record is dropped and counted instead.
+    The writer thread drains the queue in batches of up to `batch_size`,
+    flushing at least every `flush_seconds`. Each batch is appended as its
+    own gzip member (concatenated members are a valid gzip stream that
+    `gzip.open` reads straight through), so a crash loses at most the batch
+    in flight. Once the log reaches `max_bytes` it is rotated to `<path>.1`,
+    `<path>.2`, ... keeping `backup_count` old files.
+    """
+
+    def __init__(
+        self,
+        path: Path = AUDIT_LOG_PATH,
+        max_bytes: int = AUDIT_LOG_MAX_BYTES,
+        backup_count: int = AUDIT_LOG_BACKUP_COUNT,
+        batch_size: int = AUDIT_LOG_BATCH_SIZE,
+        flush_seconds: float = AUDIT_LOG_FLUSH_SECONDS,
+        queue_size: int = AUDIT_LOG_QUEUE_SIZE,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="fot-audit-log", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Queues `record` for the log. Returns False if it had to be dropped."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            AUDIT_RECORDS.inc(status="dropped")
+            logger.warning("Audit log queue full; dropping a record.")
+            return False
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Writes everything queued so far and stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(
+                        timeout=max(deadline - time.monotonic(), 0.001)
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                self._rotate()
+            lines = "".join(json.dumps(record, default=str) + "\n" for record in batch)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(lines)
+            AUDIT_RECORDS.inc(len(batch), status="written")
+        except OSError as e:
+            AUDIT_RECORDS.inc(len(batch), status="failed")
+            logger.error("Could not write %d audit records: %s", len(batch), e)
+
+    def _rotate(self) -> None:
+        for i in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+
+def purge_expired_exports(
+    export_dir: Path = EXPORT_DIR, ttl_seconds: float = EXPORT_TTL_SECONDS
+) -> int:
+    """Deletes evaluation exports older than `ttl_seconds`; returns how many."""
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    for path in Path(export_dir).glob("fot_evaluation_*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass  # Removed concurrently by another worker.
+    return removed
+
+
+def write_evaluation_export(
+    evaluation_data: Dict[str, Any],
+    export_dir: Path = EXPORT_DIR,
+    ttl_seconds: float = EXPORT_TTL_SECONDS,
+) -> Path:
+    """
+    Writes an evaluation bundle as an indented JSON file for download, first
+    clearing out exports that have expired.
+    """
+    purge_expired_exports(export_dir, ttl_seconds)
+    Path(export_dir).mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        mode="w",
+        delete=False,
+        dir=export_dir,
+        prefix="fot_evaluation_",
+        suffix=".json",
+        encoding="utf-8",
+    ) as f:
+        json.dump(evaluation_data, f, indent=4)
+    return Path(f.name)
@@ -0,0 +1,269 @@
+import csv
+import itertools
+import json
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from fot_recommender.config import (
+    BATCH_MAX_CONCURRENCY,
+    BATCH_RETRIEVAL_SIZE,
+    MIN_SIMILARITY_SCORE,
+    SEARCH_RESULT_COUNT_K,
+)
+from fot_recommender.rag_pipeline import (
+    GenerationError,
+    generate_recommendation_summary,
+    search_interventions_batch,
+)
+from fot_recommender.utils import create_evaluation_bundle
+
+logger = logging.getLogger(__name__)
+
+INDICATOR_COLUMN_PREFIX = "indicators."
+
+
+def _parse_csv_value(value: str) -> Any:
+    """Converts numeric-looking CSV cells back into numbers."""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            continue
+    return value
+
+
+def _profile_from_csv_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Rebuilds a student profile from a flat CSV row.
+
+    Indicators may be given either as a single JSON-encoded `indicators`
+    column or as one column per indicator named `indicators.<name>`.
+    """
+    profile: Dict[str, Any] = {}
+    indicators: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column == "indicators":
+            indicators.update(json.loads(value) if value else {})
+        elif column.startswith(INDICATOR_COLUMN_PREFIX):
+            if value != "":
+                indicators[column[len(INDICATOR_COLUMN_PREFIX) :]] = _parse_csv_value(
+                    value
+                )
+        else:
+            profile[column] = value
+    profile["indicators"] = indicators
+    return profile
+
+
+def iter_student_profiles(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams student profiles from a JSONL or CSV file, one at a time.
+
+    Each profile has the same shape as `main.sample_student_profile`
+    (`student_id`, `indicators`, `narrative_summary_for_embedding`).
+    """
+    if Path(path).suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield _profile_from_csv_row(row)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """
+    Reads the student ids already present in an output JSONL file.
+
+    The output file doubles as the checkpoint: every line is written only
+    after its student is fully processed, so a truncated final line from a
+    crashed run is simply ignored and that student is redone.
+    """
+    completed: Set[str] = set()
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted write.
+                completed.add(str(record["student_id"]))
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def _truncate_partial_line(output_path: str) -> None:
+    """Drops a trailing, partially written line left behind by a crashed run."""
+    try:
+        with open(output_path, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def _generate_record(
+    profile: Dict[str, Any],
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    api_key: str,
+    persona: str,
+    citations_map: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Runs the generation step for one student and builds its output record."""
+    narrative = profile["narrative_summary_for_embedding"]
+    if retrieved_chunks:
+        try:
+            recommendation, _ = generate_recommendation_summary(
+                retrieved_chunks, narrative, api_key=api_key, persona=persona
+            )
+            status = "ok"
+        except GenerationError as e:
+            recommendation = str(e)
+            status = "llm_error"
+    else:
+        recommendation = "Could not find relevant interventions."
+        status = "no_interventions"
+
+    record = create_evaluation_bundle(
+        student_narrative=narrative,
+        persona=persona,
+        retrieved_chunks_with_scores=retrieved_chunks,
+        synthesized_recommendation=recommendation,
+        citations_map=citations_map,
+    )
+    record["student_id"] = str(profile["student_id"])
+    record["indicators"] = profile.get("indicators", {})
+    record["status"] = status
+    return record
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    model,
+    index,
+    knowledge_base: Sequence[Dict[str, Any]],
+    api_key: str,
+    persona: str = "teacher",
+    citations_map: Optional[Dict[str, Any]] = None,
+    retrieval_batch_size: int = BATCH_RETRIEVAL_SIZE,
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    k: int = SEARCH_RESULT_COUNT_K,
+    min_similarity_score: float = MIN_SIMILARITY_SCORE,
+    resume: bool = True,
+    search_params=None,
+) -> Dict[str, int]:
+    """
+    Generates recommendations for every student profile in `input_path`.
+
+    Profiles are streamed from disk and retrieved `retrieval_batch_size` at a
+    time with a single batched search. Generation calls run on a pool of
+    `max_concurrency` threads, and each result is appended to `output_path`
+    as soon as it completes. With `resume=True`, students already present in
+    the output file are skipped, so an interrupted run picks up where it
+    stopped. Students whose generation failed (e.g. the LLM stayed
+    unavailable through every retry) are not written, so they are retried
+    on the next run. `search_params` (from `IdMaps.search_parameters`) restricts
+    retrieval to certain sources or concepts.
+
+    Returns:
+        A summary dictionary with `processed`, `skipped` and `failed` counts.
+    """
+    citations_map = citations_map or {}
+    completed = set()
+    if resume:
+        _truncate_partial_line(output_path)
+        completed = load_completed_ids(output_path)
+    if completed:
+        logger.info("Resuming: %d students already in %s", len(completed), output_path)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    summary = {"processed": 0, "skipped": 0, "failed": 0}
+    profiles = iter_student_profiles(input_path)
+    # Cap queued work so a large roster never sits in memory all at once.
+    max_in_flight = max_concurrency * 2
+
+    with (
+        open(output_path, "a" if resume else "w", encoding="utf-8") as out,
+        ThreadPoolExecutor(max_workers=max_concurrency) as executor,
+    ):
+        in_flight: Set[Future] = set()
+
+        def drain(until: int) -> None:
+            nonlocal in_flight
+            while len(in_flight) > until:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    if record["status"] == "llm_error":
+                        # Not checkpointed, so the next run retries it.
+                        logger.warning(
+                            "Generation failed for student %s: %s",
+                            record["student_id"],
+                            record["llm_output"]["synthesized_recommendation"],
+                        )
+                        summary["failed"] += 1
+                        continue
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    summary["processed"] += 1
+
+        while True:
+            batch = list(itertools.islice(profiles, retrieval_batch_size))
+            if not batch:
+                break
+
+            pending = []
+            for profile in batch:
+                student_id = str(profile["student_id"])
+                if student_id in completed:
+                    summary["skipped"] += 1
+                    continue
+                completed.add(student_id)
+                pending.append(profile)
+            if not pending:
+                continue
+
+            batch_results = search_interventions_batch(
+                queries=[p["narrative_summary_for_embedding"] for p in pending],
+                model=model,
+                index=index,
+                knowledge_base=knowledge_base,
+                k=k,
+                min_similarity_score=min_similarity_score,
+                search_params=search_params,
+            )
+            for profile, retrieved_chunks in zip(pending, batch_results):
+                drain(until=max_in_flight - 1)
+                in_flight.add(
+                    executor.submit(
+                        _generate_record,
+                        profile,
+                        retrieved_chunks,
+                        api_key,
+                        persona,
+                        citations_map,
+                    )
+                )
+            logger.info(
+                "Retrieved batch of %d students (%d written so far).",
+                len(pending),
+                summary["processed"],
+            )
+
+        drain(until=0)
+
+    logger.info(
+        "Batch complete: %d processed, %d skipped (already done), %d failed.",
+        summary["processed"],
+        summary["skipped"],
+        summary["failed"],
+    )
+    return summary
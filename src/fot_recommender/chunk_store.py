@@ -0,0 +1,86 @@
+import json
+import mmap
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Union
+
+import numpy as np
+
+OFFSET_DTYPE = np.dtype("<u8")
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def write_chunk_store(
+    chunks: Iterable[Dict[str, Any]], blob_path: PathLike, offsets_path: PathLike
+) -> int:
+    """
+    Writes chunks as a random-access store: a JSONL content blob plus a table
+    of little-endian uint64 byte offsets (one per row, plus the end offset).
+
+    Chunks are streamed, so the full knowledge base never has to be in memory.
+    Both files are written to temporary paths and swapped in atomically.
+
+    Returns:
+        The number of chunks written.
+    """
+    blob_path, offsets_path = Path(blob_path), Path(offsets_path)
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_blob = blob_path.with_name(blob_path.name + ".tmp")
+    tmp_offsets = offsets_path.with_name(offsets_path.name + ".tmp")
+
+    offsets = [0]
+    with open(tmp_blob, "wb") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+    np.asarray(offsets, dtype=OFFSET_DTYPE).tofile(tmp_offsets)
+
+    os.replace(tmp_offsets, offsets_path)
+    os.replace(tmp_blob, blob_path)
+    return len(offsets) - 1
+
+
+class ChunkStore(Sequence):
+    """
+    Read-only, memory-mapped access to chunks by row id.
+
+    Behaves like the list returned by `load_knowledge_base` (`len`, indexing,
+    iteration), but only the rows actually requested are read and decoded.
+    Both files are mapped read-only, so every worker process serving the same
+    store shares one copy in the OS page cache.
+    """
+
+    def __init__(self, blob_path: PathLike, offsets_path: PathLike):
+        self.blob_path = Path(blob_path)
+        self._offsets = np.memmap(offsets_path, dtype=OFFSET_DTYPE, mode="r")
+        self._file = open(self.blob_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):  # type: ignore[override]
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        row = int(row)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Chunk row {row} out of range for {len(self)} chunks.")
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(self._blob[start:end])
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+
+def open_chunk_store(blob_path: PathLike, offsets_path: PathLike) -> ChunkStore:
+    """Opens a chunk store written by `write_chunk_store`."""
+    return ChunkStore(blob_path, offsets_path)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -18,16 +19,172 @@ RAW_KB_PATH = PROCESSED_DATA_DIR / "knowledge_base_raw.json"
 FINAL_KB_CHUNKS_PATH = PROCESSED_DATA_DIR / "knowledge_base_final_chunks.json"
 FAISS_INDEX_PATH = PROCESSED_DATA_DIR / "faiss_index.bin"
 CITATIONS_PATH = PROCESSED_DATA_DIR / "citations.json"
+INDEX_RECALL_REPORT_PATH = PROCESSED_DATA_DIR / "index_recall_report.json"
+# Random-access chunk store used by the serving path (see chunk_store.py):
+# a JSONL content blob plus a uint64 byte-offset table, one entry per row id.
+KB_CHUNK_STORE_PATH = PROCESSED_DATA_DIR / "knowledge_base_chunks.jsonl"
+KB_CHUNK_OFFSETS_PATH = PROCESSED_DATA_DIR / "knowledge_base_chunks.idx"
+# Row ids per source document and per concept, used for filtered search.
+KB_ID_MAPS_PATH = PROCESSED_DATA_DIR / "knowledge_base_id_maps.json"
+# Written last by the build: the version, embedding model, dimension, chunk
+# count and content hashes of the artifacts above (see kb_snapshot.py).
+KB_MANIFEST_PATH = PROCESSED_DATA_DIR / "kb_manifest.json"
+# Each published version's artifacts are copied into their own directory here,
+# which the manifest points at, so a build rewriting the artifacts above never
+# touches a version that is being served. The newest few versions are kept.
+KB_VERSIONS_DIR = PROCESSED_DATA_DIR / "kb_versions"
+KB_VERSIONS_TO_KEEP = 2
+
+# Build caches. These are derived from the artifacts above and safe to delete;
+# the next build just does a full rebuild.
+CACHE_DIR = DATA_DIR / "cache"
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embedding_cache.npz"
+KB_EMBEDDINGS_PATH = CACHE_DIR / "knowledge_base_embeddings.npy"
+BUILD_STATE_PATH = CACHE_DIR / "build_state.json"
+LLM_CACHE_DIR = CACHE_DIR / "llm_responses"
 
 
 # --- Model and RAG Pipeline Parameters ---
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# How the serving path runs the query encoder on CPU (see embedding_backends.py):
+# "torch" (full precision), "torch-int8" (dynamically quantized linear layers)
+# or "onnx" (ONNX Runtime; needs `pip install sentence-transformers[onnx]`).
+# Knowledge-base embeddings are always built with the "torch" reference.
+EMBEDDING_BACKEND = os.environ.get("FOT_EMBEDDING_BACKEND", "torch")
 GENERATIVE_MODEL_NAME = "gemini-1.5-flash-latest"
+# "gemini" calls the Google Gemini API; "fake" uses an offline stand-in with a
+# fixed latency (see fake_llm.py) for load testing without an API key.
+LLM_BACKEND = os.environ.get("FOT_LLM_BACKEND", "gemini")
+FAKE_LLM_LATENCY_SECONDS = float(os.environ.get("FOT_FAKE_LLM_LATENCY", "1.0"))
 SEARCH_RESULT_COUNT_K = 3
 MIN_SIMILARITY_SCORE = 0.4
+# "topk" asks FAISS for SEARCH_RESULT_COUNT_K results, then drops those under
+# MIN_SIMILARITY_SCORE. "range" range-searches at MIN_SIMILARITY_SCORE and
+# returns every qualifying chunk, best first, capped at RANGE_SEARCH_MAX_RESULTS.
+RETRIEVAL_MODE = os.environ.get("FOT_RETRIEVAL_MODE", "topk")
+RANGE_SEARCH_MAX_RESULTS = 10
+# Optional token budget for the retrieved-chunk context in the LLM prompt (see
+# context_builder.py). Off by default, so prompts carry every chunk in full;
+# set e.g. FOT_CONTEXT_TOKEN_BUDGET=1200 to keep only the most query-relevant
+# passages of chunks over their share.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("FOT_CONTEXT_TOKEN_BUDGET", "0")) or None
+# FAISS index type used by the build: "flat" (exact), "ivf", "hnsw" or "ivfpq".
+# See vector_index.build_index; the build writes a recall@k report for the
+# chosen type against the exact baseline to INDEX_RECALL_REPORT_PATH.
+FAISS_INDEX_TYPE = os.environ.get("FOT_FAISS_INDEX_TYPE", "flat")
+# Open the index memory-mapped so worker processes share it via the page cache.
+FAISS_INDEX_MMAP = os.environ.get("FOT_FAISS_INDEX_MMAP", "1") != "0"
+FAISS_IVF_NLIST = 1024  # Capped for small KBs so each list has enough training data.
+FAISS_IVF_NPROBE = 16
+FAISS_PQ_M = 48  # Sub-quantizers; must divide the embedding dimension (384).
+FAISS_PQ_NBITS = 8
+FAISS_HNSW_M = 32
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = 64
+# Precision embeddings are stored at: "float32", "float16" or "int8". Vectors
+# are always L2-normalized, so inner product is cosine similarity. Reduced
+# precisions build FAISS scalar-quantized indexes (QT_fp16 / QT_8bit), and the
+# build reports the memory saved and the score drift against float32. Only the
+# index is quantized: the embedding caches and query vectors stay float32.
+EMBEDDING_STORAGE_DTYPE = os.environ.get("FOT_EMBEDDING_DTYPE", "float32")
+# Knowledge-base builds encode chunks in fixed batches of EMBEDDING_BATCH_SIZE,
+# sharded across EMBEDDING_NUM_WORKERS processes when it is greater than 1.
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_NUM_WORKERS = int(os.environ.get("FOT_EMBEDDING_WORKERS", "1"))
+# Streaming (JSONL) ingestion: raw items the chunker sorts in memory before
+# spilling a run to disk, and chunks embedded per window by the build.
+CHUNKER_MAX_ITEMS_IN_MEMORY = 10_000
+EMBEDDING_STREAM_WINDOW = 4096
 # The key in the JSON chunk that contains the text to be embedded.
 EMBEDDING_CONTENT_KEY = "content_for_embedding"
 
+# Maximum number of query (student narrative) embeddings kept in memory by
+# the serving path's LRU cache.
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# On-disk cache of LLM responses, keyed by the rendered prompt and model name.
+# Set FOT_LLM_CACHE=0 to disable it for the whole process.
+LLM_CACHE_ENABLED = os.environ.get("FOT_LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 10_000
+# Once over LLM_CACHE_MAX_ENTRIES, evict down to this fraction of it, so the
+# directory scan that eviction needs runs once per many writes, not every one.
+LLM_CACHE_EVICT_TO_FRACTION = 0.9
+
+# --- LLM Call Resilience (see resilience.py) ---
+# Client-side limits shared by every LLM call in the process, so a roster run
+# or a burst of app requests stays under the API quota instead of tripping it.
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get("FOT_LLM_RPM", "60"))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get("FOT_LLM_TPM", "1000000"))
+# Retryable errors (rate limits, timeouts, 5xx) are retried with jittered
+# exponential backoff: up to LLM_MAX_RETRIES times, waiting up to
+# LLM_RETRY_BASE_SECONDS * 2**attempt (capped at LLM_RETRY_MAX_SECONDS).
+LLM_MAX_RETRIES = int(os.environ.get("FOT_LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_SECONDS = 1.0
+LLM_RETRY_MAX_SECONDS = 30.0
+# After this many consecutive failed calls, fail fast for
+# LLM_CIRCUIT_RESET_SECONDS before letting a single trial call through.
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5
+LLM_CIRCUIT_RESET_SECONDS = 30.0
+# Fraction of fake-backend calls that fail with a retryable error, for
+# exercising the retry and circuit-breaker paths offline.
+FAKE_LLM_ERROR_RATE = float(os.environ.get("FOT_FAKE_LLM_ERROR_RATE", "0"))
+
+# --- Observability ---
+# Log level for the application's leveled logging (DEBUG adds per-stage timings).
+LOG_LEVEL = os.environ.get("FOT_LOG_LEVEL", "INFO")
+# Serve Prometheus-format stage metrics at http://<host>:<port>/metrics when set.
+METRICS_PORT = int(os.environ.get("FOT_METRICS_PORT", "0")) or None
+# Log a JSON snapshot of the metrics every N seconds (0 disables it).
+METRICS_LOG_INTERVAL_SECONDS = float(os.environ.get("FOT_METRICS_LOG_INTERVAL", "0"))
+# Profile builds, CLI runs and individual app requests (see profiling.py).
+# The CLIs also accept `--profile`.
+PROFILE_ENABLED = os.environ.get("FOT_PROFILE", "0") != "0"
+# Each process writes its profiles into a fresh run directory under this one.
+PROFILE_DIR = Path(os.environ.get("FOT_PROFILE_DIR", str(DATA_DIR / "profiles")))
+
+# --- Evaluation Export and Audit Log ---
+# Evaluation JSON downloads are written here only when the user asks for one,
+# and deleted once older than EXPORT_TTL_SECONDS.
+EXPORT_DIR = Path(tempfile.gettempdir()) / "fot_exports"
+EXPORT_TTL_SECONDS = 60 * 60
+# Every evaluation bundle is appended to a gzipped JSONL audit log by a
+# background writer (see audit_log.py). Set FOT_AUDIT_LOG=0 to disable it.
+AUDIT_LOG_ENABLED = os.environ.get("FOT_AUDIT_LOG", "1") != "0"
+AUDIT_LOG_PATH = Path(
+    os.environ.get(
+        "FOT_AUDIT_LOG_PATH", str(DATA_DIR / "audit" / "evaluations.jsonl.gz")
+    )
+)
+# Rotate once the current file reaches this size, keeping this many old files.
+AUDIT_LOG_MAX_BYTES = 50 * 1024 * 1024
+AUDIT_LOG_BACKUP_COUNT = 5
+# Records are written in batches of up to this many, at least this often.
+AUDIT_LOG_BATCH_SIZE = 64
+AUDIT_LOG_FLUSH_SECONDS = 2.0
+# Records queued beyond this are dropped (and counted) rather than blocking.
+AUDIT_LOG_QUEUE_SIZE = 10_000
+
+# --- Serving: Query Micro-batching ---
+# Concurrent app requests share one retrieval worker that encodes and searches
+# whatever narratives arrive within QUERY_MICROBATCH_MAX_WAIT_MS of each other
+# (up to QUERY_MICROBATCH_MAX_SIZE) in one call (see microbatch.py).
+QUERY_MICROBATCH_ENABLED = os.environ.get("FOT_QUERY_MICROBATCH", "1") != "0"
+QUERY_MICROBATCH_MAX_SIZE = 16
+QUERY_MICROBATCH_MAX_WAIT_MS = float(os.environ.get("FOT_MICROBATCH_WAIT_MS", "5"))
+
+# --- Serving: Knowledge Base Hot Reload ---
+# The app checks KB_MANIFEST_PATH this often and, when a build has published a
+# new version, loads and validates it in the background and swaps it in for
+# new requests. Set FOT_KB_RELOAD_INTERVAL=0 to load the KB once at startup.
+KB_RELOAD_INTERVAL_SECONDS = float(os.environ.get("FOT_KB_RELOAD_INTERVAL", "30"))
+
+# --- Batch (Roster) Mode Parameters ---
+# Number of student narratives encoded and searched together in one pass.
+BATCH_RETRIEVAL_SIZE = 64
+# Maximum number of LLM generation calls in flight at once.
+BATCH_MAX_CONCURRENCY = 4
+
 
 # --- Secrets Management ---
 # Load secrets from the environment. The application will import these variables.
@@ -36,6 +193,4 @@ DEMO_PASSWORD = os.environ.get(
     "DEMO_PASSWORD", "default_password"
 )  # Added a default for safety
 
-DEMO_PASSWORD_2 = os.environ.get(
-    "DEMO_PASSWORD_2", "default_password"
-)  
\ No newline at end of file
+DEMO_PASSWORD_2 = os.environ.get("DEMO_PASSWORD_2", "default_password")
@@ -0,0 +1,155 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fot_recommender.config import CONTEXT_TOKEN_BUDGET
+
+# Words and individual punctuation marks. Subword tokenizers split rare words
+# further, so this slightly undercounts, but it is stable, dependency-free and
+# cheap enough to run on every request (unlike a `count_tokens` API call).
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Sentence ends, but not list numbering such as "1. Make sure...".
+_SENTENCE_BREAK = re.compile(r"(?<=[^\d\s][.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have in is it its of on or "
+    "so than that the their them they this to was were which while with".split()
+)
+GAP_MARKER = "[...]"
+_GAP_MARKER_TOKENS = len(_TOKEN_PATTERN.findall(GAP_MARKER))
+
+
+def count_tokens(text: str) -> int:
+    """Approximate LLM token count of `text`."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD_PATTERN.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def split_passages(text: str) -> List[str]:
+    """
+    Splits chunk content into selectable units: one per line, with prose
+    lines further split into sentences. Markdown table rows stay whole.
+    """
+    passages = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("|"):
+            passages.append(line)
+        else:
+            passages.extend(s for s in _SENTENCE_BREAK.split(line) if s)
+    return passages
+
+
+def select_passages(text: str, query: str, token_budget: int) -> Tuple[str, int]:
+    """
+    Returns `text` unchanged if it fits in `token_budget`, otherwise the most
+    query-relevant passages that fit, in their original order, with
+    `GAP_MARKER` where passages were dropped.
+
+    Relevance is the number of distinct query terms a passage shares,
+    normalized by the square root of its length so long table dumps don't win
+    on size alone.
+
+    Returns:
+        The selected text and its token count.
+    """
+    tokens = count_tokens(text)
+    if tokens <= token_budget:
+        return text, tokens
+
+    query_terms = _terms(query)
+    passages = split_passages(text)
+    costs = [count_tokens(p) for p in passages]
+    ranked = sorted(
+        range(len(passages)),
+        key=lambda i: -len(query_terms & _terms(passages[i])) / max(costs[i], 1) ** 0.5,
+    )
+
+    chosen: set = set()
+    for i in ranked:
+        if _selection_cost(chosen | {i}, costs) <= token_budget:
+            chosen.add(i)
+
+    parts, previous = [], -1
+    for i in sorted(chosen):
+        if i != previous + 1:
+            parts.append(GAP_MARKER)
+        parts.append(passages[i])
+        previous = i
+    if previous != len(passages) - 1:
+        parts.append(GAP_MARKER)
+    return "\n".join(parts), _selection_cost(chosen, costs)
+
+
+def _selection_cost(chosen: set, costs: List[int]) -> int:
+    """Tokens of the chosen passages plus a gap marker for each dropped run."""
+    gaps = sum(
+        1 for i in range(len(costs)) if i not in chosen and (i == 0 or i - 1 in chosen)
+    )
+    return sum(costs[i] for i in chosen) + gaps * _GAP_MARKER_TOKENS
+
+
+def _format_chunk(i: int, chunk: Dict[str, Any], content: str) -> str:
+    return (
+        f"--- Intervention Chunk {i + 1} ---\n"
+        f"Title: {chunk['title']}\n"
+        f"Content: {content}\n"
+        f"(Source Document: {chunk['source_document']})\n\n"
+    )
+
+
+def build_context(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    query: str,
+    token_budget: Optional[int] = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Assembles the prompt context for the retrieved chunks within a token budget.
+
+    The budget covers each chunk's header lines as well as its content, and is
+    shared out in retrieval order: each chunk may use an equal share of what
+    is left, so anything a short chunk doesn't need passes on to the next.
+    Chunks over their share keep only their most query-relevant passages
+    (see `select_passages`). A `token_budget` of None disables trimming.
+
+    Returns:
+        The context string, and a report of the budget and the tokens used
+        in total and per chunk, for `prompt_details`.
+    """
+    context = ""
+    remaining = token_budget
+    chunk_reports = []
+    for i, (chunk, _) in enumerate(retrieved_chunks):
+        content = chunk["original_content"]
+        original_tokens = count_tokens(content)
+        if remaining is not None:
+            overhead = count_tokens(_format_chunk(i, chunk, ""))
+            share = remaining // (len(retrieved_chunks) - i)
+            content, _ = select_passages(content, query, max(share - overhead, 0))
+        formatted = _format_chunk(i, chunk, content)
+        used = count_tokens(formatted)
+        if remaining is not None:
+            remaining = max(remaining - used, 0)
+        context += formatted
+        chunk_reports.append(
+            {
+                "title": chunk["title"],
+                "original_content_tokens": original_tokens,
+                "content_tokens": count_tokens(content),
+                "trimmed": content != chunk["original_content"],
+            }
+        )
+
+    report = {
+        "token_budget": token_budget,
+        "context_tokens": count_tokens(context),
+        "untrimmed_content_tokens": sum(
+            c["original_content_tokens"] for c in chunk_reports
+        ),
+        "chunks": chunk_reports,
+    }
+    return context, report
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+import numpy as np
+
+from fot_recommender.config import EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME
+from fot_recommender.utils import lazy_import
+from fot_recommender.vector_index import l2_normalize
+
+if TYPE_CHECKING:
+    import sentence_transformers
+    import torch
+    from sentence_transformers import SentenceTransformer
+else:
+    sentence_transformers = lazy_import("sentence_transformers")
+    torch = lazy_import("torch")
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def load_embedding_model(
+    model_name: str = EMBEDDING_MODEL_NAME, backend: str = EMBEDDING_BACKEND
+) -> SentenceTransformer:
+    """
+    Loads the sentence encoder for one of `EMBEDDING_BACKENDS`.
+
+    "torch" is the full-precision reference. "torch-int8" swaps every
+    `nn.Linear` for a dynamically quantized int8 version on CPU, which is
+    most of MiniLM's compute; weights are quantized once at load and
+    activations per call. "onnx" runs the exported graph in ONNX Runtime
+    (sentence-transformers exports it on first load if the model repo has
+    no ONNX file). All three keep the `SentenceTransformer.encode` API.
+
+    Check a non-reference backend with `encoder_parity` before serving it.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. "
+            f"Choose one of: {', '.join(EMBEDDING_BACKENDS)}."
+        )
+    if backend == "onnx":
+        return sentence_transformers.SentenceTransformer(
+            model_name, backend="onnx", device="cpu"
+        )
+    if backend == "torch-int8":
+        model = sentence_transformers.SentenceTransformer(model_name, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return sentence_transformers.SentenceTransformer(model_name)
+
+
+def encoder_parity(
+    reference: Any, candidate: Any, texts: List[str], corpus: List[str], k: int = 3
+) -> Dict[str, Any]:
+    """
+    Compares a candidate encoder against the reference on the same inputs.
+
+    Reports the cosine similarity between the two encoders' embeddings of
+    each of `texts` and `corpus`, and, using `texts` as queries against the
+    reference embeddings of `corpus` (as the serving path does against the
+    prebuilt index), how many of each query's top-`k` results agree.
+    """
+    ref_texts = l2_normalize(reference.encode(texts))
+    cand_texts = l2_normalize(candidate.encode(texts))
+    ref_corpus = l2_normalize(reference.encode(corpus))
+    cand_corpus = l2_normalize(candidate.encode(corpus))
+
+    cosines = np.concatenate(
+        [
+            np.sum(ref_texts * cand_texts, axis=1),
+            np.sum(ref_corpus * cand_corpus, axis=1),
+        ]
+    )
+    k = min(k, len(corpus))
+    ref_top = np.argsort(-(ref_texts @ ref_corpus.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(cand_texts @ ref_corpus.T), axis=1)[:, :k]
+    overlap = [len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]
+    return {
+        "texts": len(cosines),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "top1_agreement": float(np.mean(ref_top[:, 0] == cand_top[:, 0])),
+        f"top{k}_overlap": float(np.mean(overlap)),
+    }
+
+
+def query_latency(model: Any, queries: List[str], repeats: int = 3) -> Dict[str, float]:
+    """Single-query encode latency percentiles, in milliseconds."""
+    model.encode(queries[:1])  # Warm-up: lazy init, first-call allocations.
+    samples = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode([query])
+            samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "mean_ms": float(np.mean(samples)),
+    }
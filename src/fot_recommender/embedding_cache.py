@@ -0,0 +1,158 @@
+import collections
+import hashlib
+import logging
+import os
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from fot_recommender.config import QUERY_EMBEDDING_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Cached vectors stay full precision whatever EMBEDDING_STORAGE_DTYPE is; only
+# the FAISS index is quantized, so the build can still measure its drift
+# against float32 and a cached query scores exactly like an uncached one.
+CACHE_DTYPE = np.dtype("float32")
+
+
+def embedding_key(text: str, model_name: str) -> str:
+    """Content address of one embedding: the model name plus the exact text."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    A persistent, content-addressed store of chunk embeddings.
+
+    Vectors are keyed by `embedding_key(content_for_embedding, model_name)`,
+    so an unchanged chunk is never re-encoded, no matter where it moves in the
+    knowledge base. The store is a single `.npz` file holding a key array and
+    a matching matrix of float32 vectors.
+    """
+
+    def __init__(self, path: Path, model_name: str):
+        self.path = Path(path)
+        self.model_name = model_name
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if data["vectors"].dtype != CACHE_DTYPE:
+                    # Upcasting a float16 cache would silently keep its rounding.
+                    logger.info(
+                        "Embedding cache at %s is %s, not %s; re-encoding.",
+                        self.path,
+                        data["vectors"].dtype,
+                        CACHE_DTYPE,
+                    )
+                    return
+                self._vectors = dict(zip(data["keys"].tolist(), data["vectors"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(
+                "Ignoring unreadable embedding cache at %s: %s", self.path, e
+            )
+            self._vectors = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def missing(self, texts: Iterable[str]) -> List[str]:
+        """Returns the texts (deduplicated, in order) with no cached vector."""
+        seen = set()
+        missing = []
+        for text in texts:
+            key = embedding_key(text, self.model_name)
+            if key not in self._vectors and key not in seen:
+                seen.add(key)
+                missing.append(text)
+        return missing
+
+    def get_many(self, texts: List[str]) -> np.ndarray:
+        """Returns cached vectors for `texts`, in order. All must be present."""
+        return np.stack(
+            [self._vectors[embedding_key(text, self.model_name)] for text in texts]
+        )
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        for text, vector in zip(texts, np.asarray(vectors, dtype=CACHE_DTYPE)):
+            self._vectors[embedding_key(text, self.model_name)] = vector
+        self._dirty = self._dirty or len(texts) > 0
+
+    def save(self) -> None:
+        """Writes the store to disk atomically if anything was added."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = list(self._vectors.keys())
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            keys=np.array(keys),
+            vectors=np.stack([self._vectors[key] for key in keys]),
+        )
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+class QueryEmbeddingCache:
+    """
+    A bounded, thread-safe LRU cache of query embeddings for the serving path.
+
+    Entries are keyed by (model name, normalized narrative), where
+    normalization applies Unicode NFC and collapses runs of whitespace, so a
+    resubmitted narrative skips the transformer forward pass entirely.
+    Vectors are held as float32, so a hit scores exactly like a fresh encode.
+    """
+
+    def __init__(self, maxsize: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: collections.OrderedDict[Tuple[str, str], np.ndarray] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def get(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, model_name: str, vector: np.ndarray) -> None:
+        key = (model_name, self.normalize(text))
+        with self._lock:
+            self._entries[key] = np.asarray(vector, dtype=CACHE_DTYPE)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
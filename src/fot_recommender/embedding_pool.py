@@ -0,0 +1,106 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+import numpy as np
+
+from fot_recommender.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_NUM_WORKERS,
+)
+from fot_recommender.utils import lazy_import
+
+if TYPE_CHECKING:
+    import torch
+else:
+    torch = lazy_import("torch")
+
+logger = logging.getLogger(__name__)
+
+# The model loaded once per worker process by `_init_worker`.
+_worker_model: Any = None
+
+
+def _default_model_factory(model_name: str) -> Any:
+    from fot_recommender.rag_pipeline import initialize_embedding_model
+
+    # Stored knowledge-base embeddings always come from the reference backend.
+    return initialize_embedding_model(model_name=model_name, backend="torch")
+
+
+def threads_per_worker(workers: int) -> int:
+    """An even share of the CPU cores for each of `workers` processes."""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _init_worker(
+    model_factory: Callable[[str], Any], model_name: str, num_threads: int
+) -> None:
+    global _worker_model
+    # torch defaults every process to one intra-op thread per core, so N
+    # workers would oversubscribe the CPU N times over; give each its share.
+    torch.set_num_threads(num_threads)
+    _worker_model = model_factory(model_name)
+
+
+def _encode_batch(batch: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode(batch, batch_size=len(batch)))
+
+
+def _batches(texts: List[str], batch_size: int) -> List[List[str]]:
+    return [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+
+def encode_texts(
+    texts: List[str],
+    model: Optional[Any] = None,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    num_workers: int = EMBEDDING_NUM_WORKERS,
+    model_factory: Callable[[str], Any] = _default_model_factory,
+) -> np.ndarray:
+    """
+    Encodes `texts` in fixed, contiguous batches of `batch_size`, either in
+    this process (with `model`) or sharded across `num_workers` processes.
+
+    Both paths send exactly the same batches to `model.encode`, and results
+    are reassembled in input order, so the pool produces the same array as
+    the serial path. Each worker loads its own model once via
+    `model_factory(model_name)` and runs torch on its share of the CPU cores
+    (`threads_per_worker`); `model` is only needed when `num_workers` is 1.
+    Workers are started with "spawn", which is safe with torch.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype="float32")
+
+    batches = _batches(texts, batch_size)
+    start = time.perf_counter()
+    if num_workers <= 1:
+        if model is None:
+            model = model_factory(model_name)
+        encoded = [np.asarray(model.encode(b, batch_size=len(b))) for b in batches]
+    else:
+        workers = min(num_workers, len(batches))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_factory, model_name, threads_per_worker(workers)),
+        ) as pool:
+            # `map` yields results in submission order.
+            encoded = list(pool.map(_encode_batch, batches))
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        "Encoded %d texts in %.2fs (%.1f texts/s, %d worker(s), batch size %d).",
+        len(texts),
+        elapsed,
+        len(texts) / elapsed,
+        max(num_workers, 1),
+        batch_size,
+    )
+    return np.concatenate(encoded)
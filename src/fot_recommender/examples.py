@@ -0,0 +1,19 @@
+# Example student narratives shown in the app, also used to pre-warm the query
+# cache and as realistic queries for encoder parity checks and benchmarks.
+EXAMPLE_NARRATIVES = [
+    {
+        "short_title": "Overwhelmed",
+        "title": "Overwhelmed Freshman (Academic & Attendance)",
+        "narrative": "A comprehensive support plan is urgently needed for this freshman. Academic performance is a critical concern, with failures in both Math and English leading to a credit deficiency of only 2 out of 4 expected credits. This academic struggle is compounded by a drop in attendance to 85% and a recent behavioral flag for an outburst in class, suggesting the student is significantly overwhelmed by the transition to high school.",
+    },
+    {
+        "short_title": "Withdrawn",
+        "title": "Withdrawn Freshman (Social-Emotional)",
+        "narrative": "Academically, this freshman appears to be thriving, with a high GPA and perfect attendance. A closer look at classroom performance, however, reveals a student who is completely withdrawn. They do not participate in discussions or engage in any extracurricular activities, and teacher notes repeatedly describe them as 'isolated.' The lack of behavioral flags is a result of non-engagement, not positive conduct, pointing to a clear need for interventions focused on social-emotional learning and school connectedness.",
+    },
+    {
+        "short_title": "Disruptive",
+        "title": "Disruptive Freshman (Behavioral)",
+        "narrative": "While this student's academics and credits earned are currently on track and attendance is acceptable at 92%, a significant pattern of disruptive behavior is jeopardizing their long-term success. An accumulation of five behavioral flags across multiple classes indicates a primary need for interventions in behavior management and positive conduct. Support should be focused on mentoring and strategies to foster appropriate classroom engagement before these behaviors begin to negatively impact their academic standing.",
+    },
+]
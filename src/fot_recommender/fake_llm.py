@@ -0,0 +1,90 @@
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+
+from fot_recommender.config import FAKE_LLM_ERROR_RATE, FAKE_LLM_LATENCY_SECONDS
+
+
+class FakeLLMError(Exception):
+    """A retryable upstream error, shaped like the Gemini SDK's (`.code`)."""
+
+    def __init__(self, code: int = 429, message: str = "Resource exhausted (fake)"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeResponse:
+    """Mimics the `.text` attribute of a Gemini `GenerateContentResponse`."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    An offline stand-in for `genai.GenerativeModel`.
+
+    It sleeps for `latency_seconds` (to simulate network and generation time,
+    spread across the chunks when streaming) and returns a deterministic
+    recommendation derived from the prompt, so the app and batch paths can be
+    exercised and load-tested without an API key. Enable it with
+    `FOT_LLM_BACKEND=fake`.
+
+    A fraction `error_rate` of calls raise `FakeLLMError` (a 429) instead,
+    to exercise retries and the circuit breaker (`FOT_FAKE_LLM_ERROR_RATE`).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        latency_seconds: float = FAKE_LLM_LATENCY_SECONDS,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        rng: Optional[random.Random] = None,
+    ):
+        self.model_name = model_name
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise FakeLLMError()
+
+    def _render(self, prompt: str) -> str:
+        return (
+            f"### Recommendation (offline `{self.model_name}` fake)\n\n"
+            f"- Synthesized from a prompt of {len(prompt.split())} words.\n"
+            f"- {prompt.count('--- Intervention Chunk')} intervention chunks were provided."
+        )
+
+    def _stream_parts(self, prompt: str) -> List[str]:
+        return self._render(prompt).splitlines(keepends=True)
+
+    def _iter_stream(self, prompt: str) -> Iterator[FakeResponse]:
+        parts = self._stream_parts(prompt)
+        for part in parts:
+            time.sleep(self.latency_seconds / len(parts))
+            yield FakeResponse(part)
+
+    async def _aiter_stream(self, prompt: str) -> AsyncIterator[FakeResponse]:
+        parts = self._stream_parts(prompt)
+        for part in parts:
+            await asyncio.sleep(self.latency_seconds / len(parts))
+            yield FakeResponse(part)
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        """Returns a response, or an iterator of partial responses if `stream`."""
+        self._maybe_fail()
+        if stream:
+            return self._iter_stream(prompt)
+        time.sleep(self.latency_seconds)
+        return FakeResponse(self._render(prompt))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        """Async counterpart; with `stream`, the result supports `async for`."""
+        self._maybe_fail()
+        if stream:
+            return self._aiter_stream(prompt)
+        await asyncio.sleep(self.latency_seconds)
+        return FakeResponse(self._render(prompt))
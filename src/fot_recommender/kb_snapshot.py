@@ -0,0 +1,409 @@
+import contextlib
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from fot_recommender.chunk_store import open_chunk_store
+from fot_recommender.config import (
+    CITATIONS_PATH,
+    EMBEDDING_MODEL_NAME,
+    FAISS_INDEX_PATH,
+    KB_CHUNK_OFFSETS_PATH,
+    KB_CHUNK_STORE_PATH,
+    KB_ID_MAPS_PATH,
+    KB_MANIFEST_PATH,
+    KB_RELOAD_INTERVAL_SECONDS,
+    KB_VERSIONS_DIR,
+    KB_VERSIONS_TO_KEEP,
+)
+from fot_recommender.metrics import REGISTRY, Counter
+from fot_recommender.rag_pipeline import load_chunk_store
+from fot_recommender.utils import load_citations, sha256_file
+from fot_recommender.vector_index import load_index
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SCHEMA = 1
+UNVERSIONED = "unversioned"
+
+KB_RELOADS = REGISTRY.register(
+    Counter(
+        "fot_kb_reloads_total",
+        "Knowledge base versions the server tried to hot-load, by outcome.",
+        labelnames=("status",),
+    )
+)
+
+
+def default_artifacts() -> Dict[str, Path]:
+    """The build's published artifacts, by name, as recorded in the manifest."""
+    artifacts = {
+        "index": FAISS_INDEX_PATH,
+        "chunk_store": KB_CHUNK_STORE_PATH,
+        "chunk_offsets": KB_CHUNK_OFFSETS_PATH,
+        "id_maps": KB_ID_MAPS_PATH,
+        "citations": CITATIONS_PATH,
+    }
+    return {name: path for name, path in artifacts.items() if Path(path).exists()}
+
+
+def build_manifest(
+    artifacts: Dict[str, Path],
+    embedding_model: str,
+    dimension: int,
+    chunk_count: int,
+    index_info: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Describes one published version of the knowledge base.
+
+    The version is derived from the artifacts' SHA-256 hashes, so rebuilding
+    identical content yields the same version and the server won't reload it.
+    Artifact paths are stored relative to the manifest's directory.
+    """
+    hashes = {name: sha256_file(path) for name, path in sorted(artifacts.items())}
+    version = hashlib.sha256(
+        json.dumps(hashes, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    return {
+        "schema": MANIFEST_SCHEMA,
+        "version": version,
+        "built_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "embedding_model": embedding_model,
+        "dimension": int(dimension),
+        "chunk_count": int(chunk_count),
+        "index": index_info or {},
+        "artifacts": {
+            name: {"file": Path(artifacts[name]).name, "sha256": digest}
+            for name, digest in hashes.items()
+        },
+    }
+
+
+def write_manifest(manifest: Dict[str, Any], path: Path = KB_MANIFEST_PATH) -> None:
+    """
+    Writes the manifest, swapping the file in atomically, so a reader sees
+    either the previous manifest or the new one, never a partial file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def publish_version(
+    manifest: Dict[str, Any],
+    artifacts: Dict[str, Path],
+    manifest_path: Path = KB_MANIFEST_PATH,
+    versions_dir: Path = KB_VERSIONS_DIR,
+    keep: int = KB_VERSIONS_TO_KEEP,
+) -> Dict[str, Any]:
+    """
+    Publishes the version described by `manifest` (from `build_manifest`).
+
+    The artifacts are copied into `versions_dir/<version>/`, which appears
+    complete or not at all, and only then is the manifest swapped to point at
+    the copies. A server or replica reading the manifest at any moment thus
+    finds a whole, matching version, even while the next build is rewriting
+    the working artifacts. The directories of all but the newest `keep`
+    versions are removed. Returns the manifest as written.
+    """
+    manifest_path = Path(manifest_path)
+    versions_dir = Path(versions_dir)
+    version_dir = versions_dir / manifest["version"]
+    if version_dir.exists():
+        os.utime(version_dir)  # Republished: now among the newest again.
+    else:
+        staging = versions_dir / f".{manifest['version']}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name, entry in manifest["artifacts"].items():
+            shutil.copy2(artifacts[name], staging / entry["file"])
+        os.replace(staging, version_dir)
+
+    published = dict(manifest)
+    published["artifacts"] = {
+        name: {
+            **entry,
+            "file": Path(
+                os.path.relpath(version_dir / entry["file"], manifest_path.parent)
+            ).as_posix(),
+        }
+        for name, entry in manifest["artifacts"].items()
+    }
+    write_manifest(published, manifest_path)
+
+    published_dirs = sorted(
+        (
+            d
+            for d in versions_dir.iterdir()
+            if d.is_dir() and not d.name.startswith(".")
+        ),
+        key=lambda d: d.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for stale in published_dirs[keep:]:
+        if stale != version_dir:
+            shutil.rmtree(stale, ignore_errors=True)
+            logger.info("Removed knowledge base version %s.", stale.name)
+    return published
+
+
+def read_manifest(path: Path = KB_MANIFEST_PATH) -> Optional[Dict[str, Any]]:
+    """The manifest at `path`, or None if no build has written one yet."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class KnowledgeBaseSnapshot:
+    """
+    One loaded, validated version of the index, chunk store and citations.
+
+    Snapshots are never modified once loaded. A request pins the current one
+    at its start (`SnapshotManager.pinned`) and uses it throughout, so a swap
+    never mixes versions within a request. A snapshot that has been swapped
+    out is retired, and its chunk store is closed once its last request ends.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        index: Any,
+        knowledge_base: Sequence[Dict[str, Any]],
+        citations_map: Dict[str, Any],
+        manifest: Optional[Dict[str, Any]] = None,
+    ):
+        self.version = version
+        self.index = index
+        self.knowledge_base = knowledge_base
+        self.citations_map = citations_map
+        self.manifest = manifest
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._retired = False
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._readers += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._readers -= 1
+            close = self._retired and self._readers == 0
+        if close:
+            self._close()
+
+    def retire(self) -> None:
+        """Marks the snapshot as replaced; it is closed when no one holds it."""
+        with self._lock:
+            self._retired = True
+            close = self._readers == 0
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        close = getattr(self.knowledge_base, "close", None)
+        if close is not None:
+            close()
+        logger.info("Closed knowledge base version %s.", self.version)
+
+
+def load_snapshot(
+    manifest_path: Path = KB_MANIFEST_PATH,
+    embedding_model: str = EMBEDDING_MODEL_NAME,
+) -> KnowledgeBaseSnapshot:
+    """
+    Loads the knowledge base version described by the manifest and checks it
+    against the manifest before it can serve: every artifact's hash, the index
+    dimension and size, the chunk count and the embedding model the queries
+    will be encoded with. Raises ValueError if anything disagrees.
+
+    Without a manifest (a tree built before manifests existed) it loads the
+    default artifact paths unchecked, as version "unversioned".
+    """
+    manifest = read_manifest(manifest_path)
+    if manifest is None:
+        logger.warning(
+            "No knowledge base manifest at %s; loading unversioned artifacts.",
+            manifest_path,
+        )
+        return KnowledgeBaseSnapshot(
+            UNVERSIONED,
+            load_index(str(FAISS_INDEX_PATH)),
+            load_chunk_store(),
+            load_citations(str(CITATIONS_PATH)),
+        )
+
+    version = manifest.get("version", UNVERSIONED)
+    if manifest.get("schema") != MANIFEST_SCHEMA:
+        raise ValueError(
+            f"KB {version}: unsupported manifest schema {manifest.get('schema')}"
+        )
+    if manifest["embedding_model"] != embedding_model:
+        raise ValueError(
+            f"KB {version} was embedded with '{manifest['embedding_model']}', "
+            f"but queries are encoded with '{embedding_model}'"
+        )
+
+    base_dir = Path(manifest_path).parent
+    paths = {
+        name: base_dir / entry["file"] for name, entry in manifest["artifacts"].items()
+    }
+    for name, entry in manifest["artifacts"].items():
+        if sha256_file(paths[name]) != entry["sha256"]:
+            raise ValueError(
+                f"KB {version}: {paths[name]} does not match the manifest hash"
+            )
+
+    index = load_index(str(paths["index"]))
+    knowledge_base = open_chunk_store(paths["chunk_store"], paths["chunk_offsets"])
+    if index.d != manifest["dimension"]:
+        raise ValueError(
+            f"KB {version}: index dimension {index.d} != {manifest['dimension']}"
+        )
+    if not index.ntotal == len(knowledge_base) == manifest["chunk_count"]:
+        raise ValueError(
+            f"KB {version}: {index.ntotal} vectors and {len(knowledge_base)} "
+            f"chunks, but the manifest lists {manifest['chunk_count']}"
+        )
+    citations_map = (
+        load_citations(str(paths["citations"])) if "citations" in paths else {}
+    )
+    return KnowledgeBaseSnapshot(
+        version, index, knowledge_base, citations_map, manifest
+    )
+
+
+class SnapshotManager:
+    """
+    Holds the knowledge base snapshot the server is currently answering from.
+
+    `watch` polls the manifest from a background thread. When it names a new
+    version, that version is loaded and validated on the watcher thread while
+    requests keep using the current snapshot; only once it has passed is it
+    swapped in, with a single reference assignment. A version that fails to
+    load is logged and counted, and not retried until the manifest changes.
+    The version swapped out is closed once the requests pinning it are done.
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path = KB_MANIFEST_PATH,
+        loader: Callable[[Path], KnowledgeBaseSnapshot] = load_snapshot,
+    ):
+        self.manifest_path = Path(manifest_path)
+        self._loader = loader
+        self._current: Optional[KnowledgeBaseSnapshot] = None
+        self._manifest_stamp: Optional[tuple] = None
+        self._reload_lock = threading.Lock()
+        # Guards the swap against `pinned`, so a retired snapshot is never
+        # pinned; held only briefly, unlike `_reload_lock`.
+        self._swap_lock = threading.Lock()
+
+    @property
+    def current(self) -> KnowledgeBaseSnapshot:
+        """The snapshot being served. Use `pinned` to read from it safely."""
+        if self._current is None:
+            raise RuntimeError("The knowledge base has not been loaded yet.")
+        return self._current
+
+    @contextlib.contextmanager
+    def pinned(self) -> Iterator[KnowledgeBaseSnapshot]:
+        """
+        The current snapshot, kept open until the block exits even if a newer
+        version is swapped in meanwhile.
+        """
+        with self._swap_lock:
+            snapshot = self.current
+            snapshot.acquire()
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+
+    def _swap(self, snapshot: KnowledgeBaseSnapshot) -> None:
+        with self._swap_lock:
+            previous, self._current = self._current, snapshot
+            if previous is not None:
+                previous.retire()
+
+    def _stamp(self) -> Optional[tuple]:
+        try:
+            stat = self.manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def load(self) -> KnowledgeBaseSnapshot:
+        """Loads whatever version is published now and makes it current."""
+        with self._reload_lock:
+            self._manifest_stamp = self._stamp()
+            snapshot = self._loader(self.manifest_path)
+            self._swap(snapshot)
+            logger.info("Serving knowledge base version %s.", snapshot.version)
+            return snapshot
+
+    def check_for_update(self) -> bool:
+        """Loads and swaps in a newly published version; True if it did."""
+        with self._reload_lock:
+            stamp = self._stamp()
+            if stamp is None or stamp == self._manifest_stamp:
+                return False
+            self._manifest_stamp = stamp
+            manifest = read_manifest(self.manifest_path)
+            if manifest is None or (
+                self._current is not None
+                and manifest.get("version") == self._current.version
+            ):
+                return False
+
+            logger.info("Loading knowledge base version %s...", manifest["version"])
+            try:
+                snapshot = self._loader(self.manifest_path)
+            except Exception as e:
+                KB_RELOADS.inc(status="failed")
+                logger.error(
+                    "Knowledge base version %s rejected; still serving %s: %s",
+                    manifest.get("version"),
+                    self._current.version if self._current else None,
+                    e,
+                )
+                return False
+            previous = self._current
+            self._swap(snapshot)
+            KB_RELOADS.inc(status="ok")
+            logger.info(
+                "Swapped knowledge base %s -> %s.",
+                previous.version if previous else None,
+                snapshot.version,
+            )
+            return True
+
+    def watch(
+        self, interval_seconds: float = KB_RELOAD_INTERVAL_SECONDS
+    ) -> threading.Event:
+        """
+        Starts polling for new versions every `interval_seconds` on a daemon
+        thread. Set the returned event to stop it.
+        """
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval_seconds):
+                try:
+                    self.check_for_update()
+                except Exception:
+                    logger.exception("Knowledge base reload check failed.")
+
+        threading.Thread(target=run, name="fot-kb-reload", daemon=True).start()
+        return stop
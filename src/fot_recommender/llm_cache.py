@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from fot_recommender.config import (
+    LLM_CACHE_DIR,
+    LLM_CACHE_EVICT_TO_FRACTION,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+)
+
+
+def response_cache_key(prompt: str, model_name: str) -> str:
+    """Cache key for one LLM call: the model name plus the fully rendered prompt."""
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    A persistent, on-disk cache of LLM responses.
+
+    Each entry is a small JSON file named by `response_cache_key`. Entries
+    older than `ttl_seconds` are treated as misses and removed. When the
+    cache holds more than `max_entries` files, the least recently used ones
+    (by file modification time, which is refreshed on every hit) are evicted
+    until `evict_to_fraction` of `max_entries` remain, so the directory scan
+    this takes is paid once per batch of new entries rather than on every put.
+    """
+
+    def __init__(
+        self,
+        directory: Path = LLM_CACHE_DIR,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        evict_to_fraction: float = LLM_CACHE_EVICT_TO_FRACTION,
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_to = int(max_entries * evict_to_fraction)
+        self._lock = threading.Lock()
+        self._entry_count: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, prompt: str, model_name: str) -> Optional[str]:
+        """Returns the cached response text, or None on a miss or expired entry."""
+        path = self._path(response_cache_key(prompt, model_name))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)  # Mark as recently used for eviction.
+        except OSError:
+            pass
+        return entry["response_text"]
+
+    def put(self, prompt: str, model_name: str, response_text: str) -> None:
+        """Stores a response, evicting the least recently used entries if full."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(response_cache_key(prompt, model_name))
+        entry = {
+            "model_name": model_name,
+            "created_at": time.time(),
+            "response_text": response_text,
+        }
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        is_new = not path.exists()
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._entry_count is None:
+                self._entry_count = len(list(self.directory.glob("*.json")))
+            elif is_new:
+                self._entry_count += 1
+            if self._entry_count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                pass  # Expired and removed by a concurrent `get`.
+        entries.sort()
+        excess = len(entries) - self.evict_to
+        for _, path in entries[: max(excess, 0)]:
+            self._remove(path)
+        self._entry_count = min(len(entries), self.evict_to)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_default_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache, created on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
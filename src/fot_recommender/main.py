@@ -1,16 +1,33 @@
+import argparse
 import os
 
 from dotenv.main import load_dotenv
 
-from fot_recommender.config import PROCESSED_DATA_DIR
+from fot_recommender.batch import run_batch
+from fot_recommender.config import (
+    BATCH_MAX_CONCURRENCY,
+    BATCH_RETRIEVAL_SIZE,
+    CITATIONS_PATH,
+    FAISS_INDEX_PATH,
+    KB_ID_MAPS_PATH,
+    LLM_BACKEND,
+    PROCESSED_DATA_DIR,
+    PROFILE_ENABLED,
+)
 from fot_recommender.rag_pipeline import (
+    load_chunk_store,
     load_knowledge_base,
     initialize_embedding_model,
     create_embeddings,
     create_vector_db,
     search_interventions,
+    GenerationError,
     generate_recommendation_summary,
 )
+from fot_recommender.metadata_filter import load_id_maps
+from fot_recommender.profiling import profiled
+from fot_recommender.utils import configure_logging, load_citations
+from fot_recommender.vector_index import load_index
 
 # --- Sample Student Profile from Project Description ---
 sample_student_profile = {
@@ -30,7 +47,114 @@ sample_student_profile = {
 }
 
 
-def main():
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="fot-recommender",
+        description="FOT Intervention Recommender. Runs the sample student by default, "
+        "or a whole roster with --batch.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="INPUT",
+        help="JSONL or CSV file of student profiles to process in batch mode.",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="OUTPUT",
+        help="JSONL file that batch results are appended to (default: <INPUT>.recommendations.jsonl).",
+    )
+    parser.add_argument("--persona", default="teacher")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_RETRIEVAL_SIZE,
+        help="Number of narratives retrieved together in one batched search.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_MAX_CONCURRENCY,
+        help="Maximum number of concurrent LLM calls.",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start over instead of skipping students already in the output file.",
+    )
+    for flag, noun in (
+        ("--include-source", "source document"),
+        ("--exclude-source", "source document"),
+        ("--include-concept", "concept"),
+        ("--exclude-concept", "concept"),
+    ):
+        action = flag.split("-")[2]
+        parser.add_argument(
+            flag,
+            action="append",
+            metavar="NAME",
+            help=(
+                f"Only retrieve chunks whose {noun} is NAME (repeatable)."
+                if action == "include"
+                else f"Never retrieve chunks whose {noun} is NAME (repeatable)."
+            ),
+        )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=PROFILE_ENABLED,
+        help="Profile the run with cProfile and write it under PROFILE_DIR "
+        "(default: FOT_PROFILE).",
+    )
+    return parser.parse_args(argv)
+
+
+def run_batch_mode(args: argparse.Namespace):
+    """
+    Runs roster-scale batch recommendations using the prebuilt FAISS index.
+    """
+    load_dotenv()
+    # The offline fake backend (FOT_LLM_BACKEND=fake) needs no key.
+    api_key = os.getenv("FOT_GOOGLE_API_KEY") or ""
+    if not api_key and LLM_BACKEND != "fake":
+        return "ERROR: FOT_GOOGLE_API_KEY is not set. Create a .env file with FOT_GOOGLE_API_KEY='YOUR_KEY_HERE'. Get key: https://aistudio.google.com/apikey"
+
+    knowledge_base_chunks = load_chunk_store()
+    if not knowledge_base_chunks:
+        print("Halting execution due to missing knowledge base.")
+        return
+
+    index = load_index(str(FAISS_INDEX_PATH))
+    search_params = None
+    filters = {
+        "include_sources": args.include_source,
+        "exclude_sources": args.exclude_source,
+        "include_concepts": args.include_concept,
+        "exclude_concepts": args.exclude_concept,
+    }
+    if any(filters.values()):
+        search_params = load_id_maps(KB_ID_MAPS_PATH).search_parameters(
+            index, **filters
+        )
+
+    output_path = args.output or f"{args.batch}.recommendations.jsonl"
+    run_batch(
+        input_path=args.batch,
+        output_path=output_path,
+        model=initialize_embedding_model(),
+        index=index,
+        knowledge_base=knowledge_base_chunks,
+        api_key=api_key,
+        persona=args.persona,
+        citations_map=load_citations(str(CITATIONS_PATH)),
+        retrieval_batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+        resume=not args.no_resume,
+        search_params=search_params,
+    )
+    print(f"\n✅ Batch results written to {output_path}")
+
+
+def main(argv=None):
     """
     Main entry point for the FOT Intervention Recommender application.
     This script now executes Phase 2 of the implementation plan:
@@ -39,7 +163,20 @@ def main():
     3. Creates vector embeddings for the knowledge base.
     4. Sets up a FAISS vector database.
     5. Tests the retrieval system with the sample student profile.
+
+    With `--batch INPUT`, a whole roster of student profiles is processed
+    instead (see `run_batch_mode`). With `--profile`, the run is profiled.
     """
+    args = _parse_args(argv)
+    configure_logging()
+    with profiled("main", enabled=args.profile):
+        if args.batch:
+            return run_batch_mode(args)
+        return run_sample()
+
+
+def run_sample():
+    """Recommends interventions for the built-in sample student profile."""
     print("--- FOT Intervention Recommender ---")
 
     # --- Load the final knowledge base ---
@@ -87,9 +224,12 @@ def main():
     if not api_key:
         return "ERROR: FOT_GOOGLE_API_KEY is not set. Create a .env file with FOT_GOOGLE_API_KEY='YOUR_KEY_HERE'. Get key: https://aistudio.google.com/apikey"
 
-    synthesized_recommendation, _ = generate_recommendation_summary(
-        top_interventions, student_query, api_key=api_key, persona="teacher"
-    )
+    try:
+        synthesized_recommendation, _ = generate_recommendation_summary(
+            top_interventions, student_query, api_key=api_key, persona="teacher"
+        )
+    except GenerationError as e:
+        return f"ERROR: {e}"
 
     # --- 5. Display Final Output ---
     print("\n" + "=" * 50)
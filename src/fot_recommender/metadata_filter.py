@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from fot_recommender.config import KB_ID_MAPS_PATH
+from fot_recommender.utils import lazy_import
+
+if TYPE_CHECKING:
+    import faiss  # type: ignore
+else:
+    faiss = lazy_import("faiss")
+
+logger = logging.getLogger(__name__)
+
+# Filterable fields, mapped to the chunk key their values come from.
+FILTER_FIELDS = {"source_document": "source_document", "concept": "title"}
+
+
+def build_id_maps(chunks: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
+    """
+    Maps every value of each filterable field to the sorted row ids (FAISS
+    ids) of the chunks that have it, e.g. `{"source_document": {"doc.pdf":
+    [0, 4, 7]}, "concept": {...}}`.
+    """
+    id_maps: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+    for row, chunk in enumerate(chunks):
+        for field, chunk_key in FILTER_FIELDS.items():
+            id_maps[field].setdefault(chunk[chunk_key], []).append(row)
+    return id_maps
+
+
+def write_id_maps(id_maps: Dict[str, Dict[str, List[int]]], path: Path) -> None:
+    """Writes the id maps as JSON, swapping the file in atomically."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(id_maps, f)
+    os.replace(tmp_path, path)
+
+
+class IdMaps:
+    """
+    Precomputed id sets for metadata filters, pushed into FAISS as ID
+    selectors so a filtered query is a single `index.search` call rather than
+    an over-fetch followed by Python filtering.
+    """
+
+    def __init__(self, id_maps: Dict[str, Dict[str, List[int]]]):
+        self._ids = {
+            field: {
+                value: np.asarray(ids, dtype="int64") for value, ids in values.items()
+            }
+            for field, values in id_maps.items()
+        }
+
+    def values(self, field: str) -> List[str]:
+        """The known values of a field, e.g. every source document."""
+        return sorted(self._ids[field])
+
+    def ids(self, field: str, values: Iterable[str]) -> np.ndarray:
+        """Sorted, unique row ids of chunks whose `field` is any of `values`."""
+        known = self._ids[field]
+        unknown = [value for value in values if value not in known]
+        if unknown:
+            logger.warning("No chunks have %s in %s; ignoring them.", field, unknown)
+        arrays = [known[value] for value in values if value in known]
+        return (
+            np.unique(np.concatenate(arrays)) if arrays else np.empty(0, dtype="int64")
+        )
+
+    def search_parameters(
+        self,
+        index: faiss.Index,
+        include_sources: Optional[List[str]] = None,
+        exclude_sources: Optional[List[str]] = None,
+        include_concepts: Optional[List[str]] = None,
+        exclude_concepts: Optional[List[str]] = None,
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        Builds FAISS search parameters restricting results to chunks that
+        match every `include_*` list given and none of the `exclude_*` lists.
+
+        Returns None when no filter is given, so callers can pass the result
+        straight through to `search_interventions`. Only the include or
+        exclude id sets are materialized, never the full id range. The
+        index's own `nprobe` / `efSearch` are carried over.
+        """
+        allowed: Optional[np.ndarray] = None
+        for field, values in (
+            ("source_document", include_sources),
+            ("concept", include_concepts),
+        ):
+            if values is not None:
+                ids = self.ids(field, values)
+                allowed = ids if allowed is None else np.intersect1d(allowed, ids)
+
+        excluded = np.union1d(
+            self.ids("source_document", exclude_sources or []),
+            self.ids("concept", exclude_concepts or []),
+        ).astype("int64")
+
+        if allowed is None and excluded.size == 0:
+            return None
+        selector: faiss.IDSelector
+        if allowed is not None:
+            allowed = np.setdiff1d(allowed, excluded).astype("int64")
+            selector = faiss.IDSelectorBatch(allowed)
+            keep_alive: List[faiss.IDSelector] = [selector]
+        else:
+            inner = faiss.IDSelectorBatch(excluded)
+            selector = faiss.IDSelectorNot(inner)
+            keep_alive = [inner, selector]
+
+        params: faiss.SearchParameters
+        if hasattr(index, "hnsw"):
+            # Not in the faiss type stubs, but present in every build with HNSW.
+            hnsw_params = faiss.SearchParametersHNSW()  # type: ignore[attr-defined]
+            hnsw_params.efSearch = index.hnsw.efSearch
+            params = hnsw_params
+        elif hasattr(index, "nprobe"):
+            params = faiss.SearchParametersIVF()
+            params.nprobe = index.nprobe
+        else:
+            params = faiss.SearchParameters()
+        params.sel = selector
+        # FAISS holds raw pointers to the selectors; keep the Python objects
+        # alive for as long as the parameters are.
+        params.referenced_objects = keep_alive  # type: ignore[attr-defined]
+        return params
+
+
+def load_id_maps(path: Path = KB_ID_MAPS_PATH) -> IdMaps:
+    """Loads the id maps written by the knowledge base build."""
+    with open(path, "r", encoding="utf-8") as f:
+        return IdMaps(json.load(f))
@@ -0,0 +1,244 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fot_recommender.config import METRICS_LOG_INTERVAL_SECONDS, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, spanning a cached encode up to a slow LLM call.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _snapshot_key(values: Tuple[str, ...]) -> str:
+    return ",".join(values) or "_"
+
+
+def _label_str(labelnames: Sequence[str], values: Tuple[str, ...], **extra) -> str:
+    pairs = list(zip(labelnames, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """A monotonically increasing count, per combination of label values."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_label_str(self.labelnames, key)} {value}"
+            for key, value in sorted(values.items())
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {_snapshot_key(key): value for key, value in self._values.items()}
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observations (Prometheus semantics), per
+    combination of label values. The JSON snapshot adds bucket-interpolated
+    p50/p95/p99 estimates.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label key: [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(
+                key, [[0] * (len(self.buckets) + 1), 0.0, 0]
+            )
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _copy(self) -> Dict[Tuple[str, ...], List[Any]]:
+        with self._lock:
+            return {k: [list(s[0]), s[1], s[2]] for k, s in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._copy().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_label_str(self.labelnames, key, le=le)} "
+                    f"{cumulative}"
+                )
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        target = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                return lower + (bound - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return self.buckets[-1]  # Beyond the last finite bucket.
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            _snapshot_key(key): {
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.5),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99),
+            }
+            for key, (counts, total, count) in self._copy().items()
+        }
+
+
+class MetricsRegistry:
+    """The set of metrics exported by the endpoint and the periodic log."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+
+REGISTRY = MetricsRegistry()
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "fot_stage_duration_seconds",
+        "Wall time spent in each pipeline stage.",
+        labelnames=("stage",),
+    )
+)
+REQUESTS = REGISTRY.register(
+    Counter(
+        "fot_requests_total",
+        "Recommendation requests by outcome.",
+        labelnames=("status",),
+    )
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Records the wall time of the enclosed block under `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        logger.debug("stage=%s duration_ms=%.1f", stage, elapsed * 1000)
+
+
+def start_metrics_server(
+    port: int, registry: MetricsRegistry = REGISTRY, host: str = "0.0.0.0"
+) -> ThreadingHTTPServer:
+    """Serves `GET /metrics` in Prometheus text format from a daemon thread."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics endpoint: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(
+        target=server.serve_forever, name="fot-metrics-server", daemon=True
+    ).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+    return server
+
+
+def start_metrics_log(
+    interval_seconds: float, registry: MetricsRegistry = REGISTRY
+) -> threading.Event:
+    """
+    Logs a JSON snapshot of every metric each `interval_seconds` from a daemon
+    thread. Set the returned event to stop it.
+    """
+    stop = threading.Event()
+
+    def _run():
+        while not stop.wait(interval_seconds):
+            logger.info("metrics %s", json.dumps(registry.snapshot(), sort_keys=True))
+
+    threading.Thread(target=_run, name="fot-metrics-log", daemon=True).start()
+    return stop
+
+
+def start_metrics_exporters(
+    port: Optional[int] = METRICS_PORT,
+    log_interval_seconds: float = METRICS_LOG_INTERVAL_SECONDS,
+) -> None:
+    """Starts whichever exporters are enabled in the config."""
+    if port:
+        start_metrics_server(port)
+    if log_interval_seconds > 0:
+        start_metrics_log(log_interval_seconds)
@@ -0,0 +1,111 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Sequence, Tuple, TypeVar
+
+from fot_recommender.config import (
+    QUERY_MICROBATCH_MAX_SIZE,
+    QUERY_MICROBATCH_MAX_WAIT_MS,
+)
+from fot_recommender.metrics import REGISTRY, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "fot_microbatch_size",
+        "Items processed together per micro-batch.",
+        labelnames=("name",),
+        buckets=(1, 2, 4, 8, 16, 32, 64),
+    )
+)
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesces concurrent single-item calls into batched ones on one worker.
+
+    `submit` queues an item and returns a future. The worker thread takes the
+    first waiting item, keeps collecting for up to `max_wait_ms` (or until it
+    has `max_batch_size` items), then calls `process_batch` once with all of
+    them and resolves each caller's future with its own result. Under light
+    load a request waits at most `max_wait_ms` extra; under heavy load one
+    batched call replaces many contending single-item ones.
+
+    `process_batch` must return one result per item, in order. If it raises,
+    every future in the batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = QUERY_MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = QUERY_MICROBATCH_MAX_WAIT_MS,
+        name: str = "microbatch",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name=f"fot-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        """Queues `item`; the future resolves to its `process_batch` result."""
+        future: "Future[R]" = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self) -> None:
+        """Processes everything already submitted, then stops the worker."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch: List[Tuple[T, Future]] = [first]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._process(batch)
+
+    def _process(self, batch: List[Tuple[T, Future]]) -> None:
+        # Skip callers that gave up (e.g. a cancelled request) while queued.
+        batch = [(item, f) for item, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        BATCH_SIZE.observe(len(batch), name=self.name)
+        try:
+            results = self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name}: got {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            logger.exception("%s batch of %d failed.", self.name, len(batch))
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
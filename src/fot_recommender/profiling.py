@@ -0,0 +1,91 @@
+import cProfile
+import datetime
+import io
+import itertools
+import logging
+import os
+import pstats
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from fot_recommender.config import PROFILE_DIR, PROFILE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Only one cProfile profiler can be active at a time (Python 3.12 hooks it
+# into the interpreter-wide `sys.monitoring`), so concurrent app requests
+# take turns: a request that finds the profiler busy runs unprofiled.
+_profiler_lock = threading.Lock()
+_run_dir: Optional[Path] = None
+_run_dir_lock = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def run_dir(base_dir: Path = PROFILE_DIR) -> Path:
+    """
+    This process's profile directory, `<base_dir>/<timestamp>-<pid>`, created
+    on first use so every build, CLI run or server gets its own.
+    """
+    global _run_dir
+    with _run_dir_lock:
+        if _run_dir is None or _run_dir.parent != Path(base_dir):
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            _run_dir = Path(base_dir) / f"{stamp}-{os.getpid()}"
+            _run_dir.mkdir(parents=True, exist_ok=True)
+        return _run_dir
+
+
+class Profile:
+    """Where a profiled block's stats go; `path` is None if it wasn't profiled."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+
+
+@contextmanager
+def profiled(
+    name: str, enabled: bool = PROFILE_ENABLED, base_dir: Path = PROFILE_DIR
+) -> Iterator[Profile]:
+    """
+    Runs the enclosed block under cProfile when `enabled`.
+
+    The path of the profile is allocated up front (so it can be recorded,
+    e.g. in a request's evaluation bundle, before the block finishes) and
+    written on exit as `<name>-<n>.prof` for `pstats`/snakeviz, with a
+    `.txt` summary of the top functions by cumulative time next to it.
+    """
+    if not enabled:
+        yield Profile()
+        return
+    if not _profiler_lock.acquire(blocking=False):
+        logger.warning("Profiler busy; running %s unprofiled.", name)
+        yield Profile()
+        return
+
+    try:
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        path: Optional[Path] = run_dir(base_dir) / f"{safe_name}-{next(_sequence)}.prof"
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # e.g. a debugger or coverage tool holds the hook
+            logger.warning("Cannot profile %s (%s); running it unprofiled.", name, e)
+            path = None
+        try:
+            yield Profile(path)
+        finally:
+            if path is not None:
+                profiler.disable()
+                profiler.dump_stats(path)
+                summary = io.StringIO()
+                stats = pstats.Stats(profiler, stream=summary)
+                stats.sort_stats("cumulative").print_stats(40)
+                path.with_suffix(".txt").write_text(
+                    summary.getvalue(), encoding="utf-8"
+                )
+                logger.info("Wrote profile of %s to %s", name, path)
+    finally:
+        _profiler_lock.release()
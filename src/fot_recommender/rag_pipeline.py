@@ -1,19 +1,67 @@
-import faiss  # type: ignore
+from __future__ import annotations
+
+import asyncio
 import json
+import logging
+import threading
 import numpy as np
-import google.generativeai as genai
 
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Tuple
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Iterator,
+    List,
+    Dict,
+    Any,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from fot_recommender.chunk_store import open_chunk_store
+from fot_recommender.context_builder import build_context, count_tokens
+from fot_recommender.fake_llm import FakeGenerativeModel
+from fot_recommender.embedding_backends import load_embedding_model
+from fot_recommender.embedding_cache import EmbeddingStore, QueryEmbeddingCache
+from fot_recommender.embedding_pool import encode_texts
+from fot_recommender.llm_cache import ResponseCache, get_default_response_cache
+from fot_recommender.metrics import timed
 from fot_recommender.prompts import PROMPT_TEMPLATES
+from fot_recommender.resilience import get_llm_guard
+from fot_recommender.utils import lazy_import
+from fot_recommender.vector_index import build_index, l2_normalize
 from fot_recommender.config import (
+    CONTEXT_TOKEN_BUDGET,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
     EMBEDDING_MODEL_NAME,
     EMBEDDING_CONTENT_KEY,
+    EMBEDDING_NUM_WORKERS,
+    EMBEDDING_STORAGE_DTYPE,
+    FAISS_INDEX_TYPE,
+    FINAL_KB_CHUNKS_PATH,
     GENERATIVE_MODEL_NAME,
+    KB_CHUNK_OFFSETS_PATH,
+    KB_CHUNK_STORE_PATH,
+    LLM_BACKEND,
+    LLM_CACHE_ENABLED,
     SEARCH_RESULT_COUNT_K,
     MIN_SIMILARITY_SCORE,
+    RANGE_SEARCH_MAX_RESULTS,
+    RETRIEVAL_MODE,
 )
 
+# Heavy dependencies are imported on first use so that importing this module
+# (and anything that imports it) doesn't pull in torch, faiss and the Gemini SDK.
+if TYPE_CHECKING:
+    import faiss  # type: ignore
+    import google.generativeai as genai
+    from sentence_transformers import SentenceTransformer
+else:
+    faiss = lazy_import("faiss")
+    genai = lazy_import("google.generativeai")
+
+logger = logging.getLogger(__name__)
+
 
 def load_knowledge_base(path: str) -> List[Dict[str, Any]]:
     """Loads the processed knowledge base from a JSON file."""
@@ -21,124 +69,384 @@ def load_knowledge_base(path: str) -> List[Dict[str, Any]]:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"ERROR: Knowledge base file not found at {path}")
+        logger.error("Knowledge base file not found at %s", path)
         return []
     except json.JSONDecodeError:
-        print(f"ERROR: Could not decode the JSON file at {path}")
+        logger.error("Could not decode the JSON file at %s", path)
         return []
 
 
+def load_chunk_store(
+    blob_path: str = str(KB_CHUNK_STORE_PATH),
+    offsets_path: str = str(KB_CHUNK_OFFSETS_PATH),
+    fallback_path: str = str(FINAL_KB_CHUNKS_PATH),
+) -> Sequence[Dict[str, Any]]:
+    """
+    Opens the memory-mapped chunk store for serving, so only the retrieved
+    rows are ever read. Falls back to `load_knowledge_base` on the JSON file
+    if the store hasn't been built yet.
+    """
+    try:
+        return open_chunk_store(blob_path, offsets_path)
+    except FileNotFoundError:
+        logger.warning(
+            "Chunk store not found at %s; loading %s into memory instead.",
+            blob_path,
+            fallback_path,
+        )
+        return load_knowledge_base(fallback_path)
+
+
 def initialize_embedding_model(
     model_name: str = EMBEDDING_MODEL_NAME,
+    backend: str = EMBEDDING_BACKEND,
 ) -> SentenceTransformer:
-    """Initializes and returns a SentenceTransformer model."""
-    print(f"Initializing embedding model: {model_name}...")
-    model = SentenceTransformer(model_name)
-    print("Model initialized successfully.")
+    """
+    Initializes and returns a SentenceTransformer model, run by one of the
+    CPU backends in `embedding_backends.EMBEDDING_BACKENDS`.
+    """
+    logger.info("Initializing embedding model: %s (%s)...", model_name, backend)
+    model = load_embedding_model(model_name, backend)
+    logger.info("Model initialized successfully.")
     return model
 
 
 def create_embeddings(
     chunks: List[Dict[str, Any]],
-    model: SentenceTransformer,
+    model: Optional[SentenceTransformer],
     content_key: str = EMBEDDING_CONTENT_KEY,
+    cache: Optional[EmbeddingStore] = None,
+    num_workers: int = EMBEDDING_NUM_WORKERS,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    model_name: str = EMBEDDING_MODEL_NAME,
 ) -> np.ndarray:
-    """Creates vector embeddings for the content of each chunk."""
-    print(f"Creating embeddings for {len(chunks)} chunks...")
+    """
+    Creates L2-normalized float32 embeddings for the content of each chunk.
+
+    If an `EmbeddingStore` is given, only chunks whose content is not already
+    cached are encoded, and the new vectors are added to the store. `model`
+    may be None when every chunk is known to be cached, or when
+    `num_workers` > 1, in which case each worker process loads `model_name`
+    itself (see `embedding_pool.encode_texts`).
+    """
+    logger.info("Creating embeddings for %d chunks...", len(chunks))
     content_to_embed = [chunk[content_key] for chunk in chunks]
-    embeddings = model.encode(content_to_embed, show_progress_bar=True)
-    print("Embeddings created successfully.")
-    return embeddings
+    to_encode = content_to_embed if cache is None else cache.missing(content_to_embed)
+    if cache is not None:
+        logger.info(
+            "%d chunks found in embedding cache.",
+            len(content_to_embed) - len(to_encode),
+        )
+    if to_encode and model is None and num_workers <= 1:
+        raise ValueError("An embedding model is required to encode uncached chunks.")
+
+    encoded = (
+        l2_normalize(
+            encode_texts(
+                to_encode,
+                model,
+                model_name=model_name,
+                batch_size=batch_size,
+                num_workers=num_workers,
+            )
+        )
+        if to_encode
+        else None
+    )
+    logger.info("Embeddings created successfully.")
+    if cache is None:
+        return encoded if encoded is not None else np.empty((0, 0), dtype="float32")
+    if encoded is not None:
+        cache.put_many(to_encode, encoded)
+    return cache.get_many(content_to_embed)
 
 
-def create_vector_db(embeddings: np.ndarray) -> faiss.Index:
-    """Creates and populates a FAISS vector database."""
+def create_vector_db(
+    embeddings: np.ndarray,
+    index_type: str = FAISS_INDEX_TYPE,
+    storage_dtype: str = EMBEDDING_STORAGE_DTYPE,
+) -> faiss.Index:
+    """
+    Creates and populates a FAISS vector database.
+
+    The index type ("flat", "ivf", "hnsw" or "ivfpq") defaults to
+    `FAISS_INDEX_TYPE` and the vector precision to `EMBEDDING_STORAGE_DTYPE`;
+    see `vector_index.build_index`.
+    """
     if embeddings.size == 0:
         raise ValueError("Cannot create vector DB with empty embeddings.")
 
     dimension = embeddings.shape[1]
-    print(f"Creating FAISS index with dimension {dimension}...")
+    logger.info("Creating FAISS %s index with dimension %d...", index_type, dimension)
 
-    # Explicitly set the dtype to float32 for FAISS compatibility
-    embeddings = np.asarray(embeddings).astype("float32")
+    # All index types use Maximum Inner Product search, which is equivalent
+    # to cosine similarity for normalized vectors, so normalize (as float32).
+    embeddings = l2_normalize(embeddings)
+    index = build_index(embeddings, index_type=index_type, storage_dtype=storage_dtype)
 
-    # Using IndexFlatIP as planned for Maximum Inner Product search,
-    # which is equivalent to cosine similarity for normalized vectors.
-    index = faiss.IndexFlatIP(dimension)
+    logger.info("FAISS index created with %d vectors.", index.ntotal)
+    return index
 
-    index.add(embeddings)  # type: ignore
 
-    print(f"FAISS index created with {index.ntotal} vectors.")
-    return index
+def encode_queries(
+    queries: List[str],
+    model: SentenceTransformer,
+    query_cache: Optional[QueryEmbeddingCache] = None,
+    model_name: str = EMBEDDING_MODEL_NAME,
+) -> np.ndarray:
+    """
+    Encodes query texts into an L2-normalized float32 matrix, one row per query.
+
+    With a `QueryEmbeddingCache`, cached queries are looked up and only the
+    misses are sent to the model (in a single batched call).
+    """
+    if query_cache is None:
+        return l2_normalize(model.encode(queries))
+
+    cached = [query_cache.get(query, model_name) for query in queries]
+    missing = [i for i, vector in enumerate(cached) if vector is None]
+    if missing:
+        encoded = l2_normalize(model.encode([queries[i] for i in missing]))
+        for i, vector in zip(missing, encoded):
+            query_cache.put(queries[i], model_name, vector)
+            cached[i] = vector
+    return np.stack(cached).astype("float32")  # type: ignore
 
 
 def search_interventions(
     query: str,
     model: SentenceTransformer,
     index: faiss.Index,
-    knowledge_base: List[Dict[str, Any]],
+    knowledge_base: Sequence[Dict[str, Any]],
     k: int = SEARCH_RESULT_COUNT_K,
     min_similarity_score: float = MIN_SIMILARITY_SCORE,
+    query_cache: Optional[QueryEmbeddingCache] = None,
+    search_params: Optional[faiss.SearchParameters] = None,
+    mode: str = RETRIEVAL_MODE,
+    max_results: int = RANGE_SEARCH_MAX_RESULTS,
 ) -> List[Tuple[Dict[str, Any], float]]:
     """
     Performs a semantic search to find the most relevant interventions.
 
+    Pass `search_params` from `IdMaps.search_parameters` to restrict the
+    search to certain sources or concepts inside FAISS itself. See
+    `search_interventions_batch` for the "topk" and "range" modes.
+
     Returns:
         A list of tuples, where each tuple contains the retrieved chunk
         and its similarity score.
     """
-    print(f"\nSearching for top {k} interventions for query: '{query[:80]}...'")
-    query_embedding = np.asarray(model.encode([query])).astype("float32")
-    scores, indices = index.search(query_embedding, k)  # type: ignore
-    results = []
-    for i, score in zip(indices[0], scores[0]):
-        if i != -1:  # FAISS returns -1 for no result
-            results.append((knowledge_base[i], score))
+    target = f"top {k}" if mode == "topk" else f"up to {max_results}"
+    logger.info("Searching for %s interventions for query: '%s...'", target, query[:80])
+    results = search_interventions_batch(
+        queries=[query],
+        model=model,
+        index=index,
+        knowledge_base=knowledge_base,
+        k=k,
+        min_similarity_score=min_similarity_score,
+        query_cache=query_cache,
+        search_params=search_params,
+        mode=mode,
+        max_results=max_results,
+    )[0]
+    logger.info("Found %d relevant interventions.", len(results))
+    return results
+
+
+def search_interventions_batch(
+    queries: List[str],
+    model: SentenceTransformer,
+    index: faiss.Index,
+    knowledge_base: Sequence[Dict[str, Any]],
+    k: int = SEARCH_RESULT_COUNT_K,
+    min_similarity_score: float = MIN_SIMILARITY_SCORE,
+    query_cache: Optional[QueryEmbeddingCache] = None,
+    search_params: Optional[faiss.SearchParameters] = None,
+    mode: str = RETRIEVAL_MODE,
+    max_results: int = RANGE_SEARCH_MAX_RESULTS,
+) -> List[List[Tuple[Dict[str, Any], float]]]:
+    """
+    Runs the semantic search for many queries at once, e.g. a whole roster.
 
-    filtered_results = [
-        (chunk, score) for chunk, score in results if score >= min_similarity_score
+    All queries are encoded in a single batched `model.encode` call (only the
+    cache misses, if a `query_cache` is given) and searched with a single
+    matrix `index.search` call. The score threshold
+    is applied to the full scores/indices arrays before any Python-level
+    iteration. Metadata filters arrive as `search_params` (an ID selector)
+    and are applied by FAISS during the search.
+
+    In "range" mode, `k` is ignored: every chunk scoring at least
+    `min_similarity_score` is returned, best first, up to `max_results`.
+    Result counts then follow the data instead of a per-deployment k.
+
+    Returns:
+        One list per query (in input order), each in the same
+        `(chunk, score)` shape returned by `search_interventions`.
+    """
+    if not queries:
+        return []
+
+    with timed("encode"):
+        query_embeddings = encode_queries(queries, model, query_cache=query_cache)
+    if mode == "range":
+        with timed("faiss_search"):
+            return _range_search(
+                query_embeddings,
+                index,
+                knowledge_base,
+                min_similarity_score,
+                max_results,
+                search_params,
+            )
+    if mode != "topk":
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Use 'topk' or 'range'.")
+
+    with timed("faiss_search"):
+        if search_params is None:
+            scores, indices = index.search(query_embeddings, k)  # type: ignore
+        else:
+            scores, indices = index.search(query_embeddings, k, params=search_params)  # type: ignore
+    return _filter_top_k(
+        np.asarray(scores), np.asarray(indices), knowledge_base, min_similarity_score
+    )
+
+
+def _filter_top_k(
+    scores: np.ndarray,
+    indices: np.ndarray,
+    knowledge_base: Sequence[Dict[str, Any]],
+    min_similarity_score: float,
+) -> List[List[Tuple[Dict[str, Any], float]]]:
+    # FAISS returns -1 for empty result slots; drop those along with
+    # anything under the similarity threshold in one vectorized pass.
+    keep = (indices != -1) & (scores >= min_similarity_score)
+
+    return [
+        [
+            (knowledge_base[i], score)
+            for i, score in zip(row_indices[row_keep], row_scores[row_keep])
+        ]
+        for row_scores, row_indices, row_keep in zip(scores, indices, keep)
     ]
 
-    print(f"Found {len(filtered_results)} relevant interventions.")
-    return filtered_results
 
+def _range_search(
+    query_embeddings: np.ndarray,
+    index: faiss.Index,
+    knowledge_base: Sequence[Dict[str, Any]],
+    min_similarity_score: float,
+    max_results: int,
+    search_params: Optional[faiss.SearchParameters] = None,
+) -> List[List[Tuple[Dict[str, Any], float]]]:
+    """
+    Range search at the similarity threshold, sorted and capped per query.
 
-def generate_recommendation_summary(
+    Index types without range search support fall back to a top-k search
+    with k = `max_results`, which returns the same capped set.
+    """
+    kwargs = {} if search_params is None else {"params": search_params}
+    try:
+        limits, scores, indices = index.range_search(  # type: ignore
+            query_embeddings, min_similarity_score, **kwargs
+        )
+    except RuntimeError as e:
+        logger.warning("Range search unsupported (%s); using top-k search.", e)
+        scores, indices = index.search(query_embeddings, max_results, **kwargs)  # type: ignore
+        return _filter_top_k(
+            np.asarray(scores),
+            np.asarray(indices),
+            knowledge_base,
+            min_similarity_score,
+        )
+
+    results = []
+    for start, end in zip(limits[:-1], limits[1:]):
+        row_scores, row_indices = scores[start:end], indices[start:end]
+        order = np.argsort(-row_scores, kind="stable")[:max_results]
+        results.append(
+            [
+                (knowledge_base[i], score)
+                for i, score in zip(row_indices[order], row_scores[order])
+            ]
+        )
+    return results
+
+
+def build_recommendation_prompt(
     retrieved_chunks: List[Tuple[Dict[str, Any], float]],
     student_narrative: str,
-    api_key: str,
     persona: str = "teacher",
     model_name: str = GENERATIVE_MODEL_NAME,
-) -> Tuple[str, Dict[str, Any]]:  # Return text and a details dictionary
+    token_budget: Optional[int] = CONTEXT_TOKEN_BUDGET,
+) -> Dict[str, Any]:
     """
-    Generates a synthesized recommendation using the Google Gemini API.
+    Renders the persona prompt for the retrieved chunks.
+
+    The chunk context is assembled by `context_builder.build_context` within
+    `token_budget` (None sends every chunk in full).
 
     Returns:
-        A tuple containing:
-        - The synthesized recommendation text (str).
-        - A dictionary with detailed prompt information for logging (Dict).
+        The prompt details dictionary used for logging, including the
+        `final_prompt_text` to send to the LLM and the `context_budget`
+        report of tokens used.
+
+    Raises:
+        ValueError: If `persona` has no prompt template.
+    """
+    return build_persona_prompts(
+        retrieved_chunks, student_narrative, [persona], model_name, token_budget
+    )[persona]
+
+
+def build_persona_prompts(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    personas: Sequence[str] = tuple(PROMPT_TEMPLATES),
+    model_name: str = GENERATIVE_MODEL_NAME,
+    token_budget: Optional[int] = CONTEXT_TOKEN_BUDGET,
+) -> Dict[str, Dict[str, Any]]:
     """
-    genai.configure(api_key=api_key)  # type: ignore
+    Renders the prompt for each of `personas` from one shared chunk context.
+
+    The context only depends on the chunks and the narrative, so it is
+    assembled once and each persona's template is filled in with it.
+
+    Returns:
+        The prompt details dictionary (see `build_recommendation_prompt`)
+        for each persona, keyed by persona.
 
-    prompt_details = {}
-    if persona not in PROMPT_TEMPLATES:
-        error_message = f"ERROR: Persona '{persona}' is not a valid choice."
-        return error_message, {"error": error_message}
+    Raises:
+        ValueError: If any persona has no prompt template.
+    """
+    for persona in personas:
+        if persona not in PROMPT_TEMPLATES:
+            raise ValueError(f"ERROR: Persona '{persona}' is not a valid choice.")
+
+    with timed("prompt_build"):
+        context, context_budget = build_context(
+            retrieved_chunks, student_narrative, token_budget=token_budget
+        )
+        return {
+            persona: _prompt_details(
+                persona, student_narrative, context, context_budget, model_name
+            )
+            for persona in personas
+        }
 
-    context = ""
-    for i, (chunk, _) in enumerate(retrieved_chunks):
-        context += f"--- Intervention Chunk {i + 1} ---\n"
-        context += f"Title: {chunk['title']}\n"
-        context += f"Content: {chunk['original_content']}\n"
-        context += f"(Source Document: {chunk['source_document']})\n\n"
 
+def _prompt_details(
+    persona: str,
+    student_narrative: str,
+    context: str,
+    context_budget: Dict[str, Any],
+    model_name: str,
+) -> Dict[str, Any]:
     prompt_template = PROMPT_TEMPLATES[persona]
     prompt = prompt_template.format(
         student_narrative=student_narrative, context=context
     )
-
-    # --- Assemble the prompt dictionary ---
-    prompt_details = {
+    return {
         "persona": persona,
         "llm_model_used": model_name,
         "prompt_template": prompt_template,
@@ -147,16 +455,453 @@ def generate_recommendation_summary(
             "context": context,
         },
         "final_prompt_text": prompt,
+        "context_budget": context_budget,
+        "served_from_cache": False,
     }
 
+
+_generative_models: Dict[Tuple[str, str], Any] = {}
+_generative_models_lock = threading.Lock()
+_configured_api_key: Optional[str] = None
+
+
+def get_generative_model(api_key: str, model_name: str = GENERATIVE_MODEL_NAME):
+    """
+    Returns a configured generative model, created once per (api_key, model_name)
+    and reused across requests.
+
+    With `LLM_BACKEND = "fake"` an offline `FakeGenerativeModel` is returned
+    instead, so the generation path can be load-tested without the Gemini API.
+    """
+    global _configured_api_key
+    key = (api_key, model_name)
+    with _generative_models_lock:
+        model = _generative_models.get(key)
+        if model is None:
+            if LLM_BACKEND == "fake":
+                model = FakeGenerativeModel(model_name)
+            else:
+                if _configured_api_key != api_key:
+                    genai.configure(api_key=api_key)  # type: ignore
+                    _configured_api_key = api_key
+                model = genai.GenerativeModel(model_name)  # type: ignore
+            _generative_models[key] = model
+        return model
+
+
+def reset_generative_models() -> None:
+    """Drops all cached model clients (e.g. after rotating the API key)."""
+    global _configured_api_key
+    with _generative_models_lock:
+        _generative_models.clear()
+        _configured_api_key = None
+
+
+class GenerationError(RuntimeError):
+    """
+    Raised when no recommendation could be generated: the prompt could not be
+    built, or the LLM call failed after the guard's retries (or was refused
+    by an open circuit). `prompt_details` holds the request's details with
+    the message under "error", for logs and evaluation bundles.
+    """
+
+    def __init__(self, message: str, prompt_details: Dict[str, Any]):
+        super().__init__(message)
+        self.prompt_details = prompt_details
+
+
+def _generation_failed(
+    prompt_details: Dict[str, Any], error: Exception
+) -> GenerationError:
+    message = f"An error occurred while calling the Gemini API: {error}"
+    prompt_details["error"] = message
+    logger.error(
+        "Generation failed for persona '%s': %s", prompt_details["persona"], error
+    )
+    return GenerationError(message, prompt_details)
+
+
+def _prompt_failed(error: ValueError) -> GenerationError:
+    return GenerationError(str(error), {"error": str(error)})
+
+
+def _lookup_cached_response(
+    prompt_details: Dict[str, Any],
+    use_cache: bool,
+    response_cache: Optional[ResponseCache],
+) -> Tuple[Optional[ResponseCache], Optional[str]]:
+    """Resolves which response cache applies and returns any cached text."""
+    if not (use_cache and LLM_CACHE_ENABLED):
+        return None, None
+    if response_cache is None:
+        response_cache = get_default_response_cache()
+    cached_text = response_cache.get(
+        prompt_details["final_prompt_text"], prompt_details["llm_model_used"]
+    )
+    if cached_text is not None:
+        logger.info(
+            "Serving cached recommendation for persona: '%s'.",
+            prompt_details["persona"],
+        )
+        prompt_details["served_from_cache"] = True
+    return response_cache, cached_text
+
+
+def _store_response(
+    response_cache: Optional[ResponseCache],
+    prompt_details: Dict[str, Any],
+    response_text: str,
+) -> None:
+    if response_cache is not None:
+        response_cache.put(
+            prompt_details["final_prompt_text"],
+            prompt_details["llm_model_used"],
+            response_text,
+        )
+
+
+def generate_recommendation_summary(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    persona: str = "teacher",
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Tuple[str, Dict[str, Any]]:  # Return text and a details dictionary
+    """
+    Generates a synthesized recommendation using the Google Gemini API.
+
+    Responses are cached on disk keyed by the final prompt text and model
+    name (see `ResponseCache`), so a byte-identical request skips the API.
+    Pass `use_cache=False` to force a fresh generation. Whether the answer
+    came from the cache is recorded in `prompt_details["served_from_cache"]`.
+
+    Returns:
+        A tuple containing:
+        - The synthesized recommendation text (str).
+        - A dictionary with detailed prompt information for logging (Dict).
+
+    Raises:
+        GenerationError: If no recommendation could be generated.
+    """
+    try:
+        prompt_details = build_recommendation_prompt(
+            retrieved_chunks, student_narrative, persona, model_name
+        )
+    except ValueError as e:
+        raise _prompt_failed(e) from e
+
+    response_cache, cached_text = _lookup_cached_response(
+        prompt_details, use_cache, response_cache
+    )
+    if cached_text is not None:
+        return cached_text, prompt_details
+
+    try:
+        logger.info(
+            "Synthesizing recommendation for persona: '%s' using %s...",
+            persona,
+            model_name,
+        )
+        model = get_generative_model(api_key, model_name)
+        prompt = prompt_details["final_prompt_text"]
+        with timed("llm_generate"):
+            response = get_llm_guard().call(
+                lambda: model.generate_content(prompt), tokens=count_tokens(prompt)
+            )
+        logger.info("Synthesis complete.")
+        response_text = response.text
+    except Exception as e:
+        raise _generation_failed(prompt_details, e) from e
+
+    _store_response(response_cache, prompt_details, response_text)
+    return response_text, prompt_details
+
+
+async def generate_recommendation_summary_async(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    persona: str = "teacher",
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Async variant of `generate_recommendation_summary`.
+
+    Uses the reusable client from `get_generative_model` and the async
+    generate API, so one event loop can hold many LLM calls in flight without
+    dedicating a thread to each. Caching and return values are identical.
+    """
+    try:
+        prompt_details = build_recommendation_prompt(
+            retrieved_chunks, student_narrative, persona, model_name
+        )
+    except ValueError as e:
+        raise _prompt_failed(e) from e
+
+    return await _generate_from_prompt_async(
+        prompt_details, api_key, model_name, use_cache, response_cache
+    )
+
+
+async def generate_all_personas_async(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    personas: Sequence[str] = tuple(PROMPT_TEMPLATES),
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """
+    Generates the recommendation for every persona from a single retrieval.
+
+    The prompts share one assembled context (see `build_persona_prompts`) and
+    the LLM calls are issued concurrently, so the wall time is about that of
+    the slowest single call rather than the sum of all of them. Each call is
+    cached independently.
+
+    Returns:
+        `(text, prompt_details)` per persona, keyed by persona, exactly as
+        `generate_recommendation_summary_async` returns them.
+
+    Raises:
+        GenerationError: If any persona failed, once every call has finished;
+            its `prompt_details` are keyed by persona.
+    """
+    try:
+        prompts = build_persona_prompts(
+            retrieved_chunks, student_narrative, personas, model_name
+        )
+    except ValueError as e:
+        raise _prompt_failed(e) from e
+
+    results = await asyncio.gather(
+        *(
+            _generate_from_prompt_async(
+                prompts[persona], api_key, model_name, use_cache, response_cache
+            )
+            for persona in personas
+        ),
+        return_exceptions=True,
+    )
+    failures = [r for r in results if isinstance(r, BaseException)]
+    for failure in failures:
+        if not isinstance(failure, GenerationError):
+            raise failure
+    if failures:
+        # The personas that did succeed are cached, so a retry only pays for
+        # the failed ones.
+        raise GenerationError(
+            f"{len(failures)} of {len(personas)} persona generations failed: "
+            f"{failures[0]}",
+            {persona: prompts[persona] for persona in personas},
+        )
+    return dict(zip(personas, results))  # type: ignore[arg-type]
+
+
+def generate_all_personas(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    personas: Sequence[str] = tuple(PROMPT_TEMPLATES),
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """
+    Blocking wrapper around `generate_all_personas_async` for scripts and
+    notebooks. Must not be called from a running event loop; await the async
+    version there instead.
+    """
+    return asyncio.run(
+        generate_all_personas_async(
+            retrieved_chunks,
+            student_narrative,
+            api_key,
+            personas,
+            model_name,
+            use_cache,
+            response_cache,
+        )
+    )
+
+
+async def _generate_from_prompt_async(
+    prompt_details: Dict[str, Any],
+    api_key: str,
+    model_name: str,
+    use_cache: bool,
+    response_cache: Optional[ResponseCache],
+) -> Tuple[str, Dict[str, Any]]:
+    persona = prompt_details["persona"]
+    response_cache, cached_text = _lookup_cached_response(
+        prompt_details, use_cache, response_cache
+    )
+    if cached_text is not None:
+        return cached_text, prompt_details
+
     try:
-        print(
-            f"\nSynthesizing recommendation for persona: '{persona}' using {model_name}..."
+        logger.info(
+            "Synthesizing recommendation for persona: '%s' using %s...",
+            persona,
+            model_name,
         )
-        model = genai.GenerativeModel(model_name)  # type: ignore
-        response = model.generate_content(prompt)
-        print("Synthesis complete.")
-        return response.text, prompt_details
+        model = get_generative_model(api_key, model_name)
+        prompt = prompt_details["final_prompt_text"]
+        with timed("llm_generate"):
+            response = await get_llm_guard().call_async(
+                lambda: model.generate_content_async(prompt),
+                tokens=count_tokens(prompt),
+            )
+        logger.info("Synthesis complete.")
+        response_text = response.text
     except Exception as e:
-        error_message = f"An error occurred while calling the Gemini API: {e}"
-        return error_message, prompt_details
+        raise _generation_failed(prompt_details, e) from e
+
+    _store_response(response_cache, prompt_details, response_text)
+    return response_text, prompt_details
+
+
+def stream_recommendation_summary(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    persona: str = "teacher",
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Tuple[Iterator[str], Dict[str, Any]]:
+    """
+    Streaming variant of `generate_recommendation_summary`.
+
+    The prompt is built immediately; the LLM is only called once the returned
+    iterator is consumed. It yields partial text chunks as they arrive (a
+    cache hit is yielded as a single chunk), and the full response is cached
+    once the stream completes.
+
+    Returns:
+        A tuple containing:
+        - An iterator of partial recommendation text chunks (Iterator[str]).
+        - The prompt details dictionary, filled in as the stream runs (Dict).
+
+    Raises:
+        GenerationError: From the call if the prompt can't be built, or from
+            the iterator if the LLM call fails, possibly after some text.
+    """
+    try:
+        prompt_details = build_recommendation_prompt(
+            retrieved_chunks, student_narrative, persona, model_name
+        )
+    except ValueError as e:
+        raise _prompt_failed(e) from e
+
+    def _stream() -> Iterator[str]:
+        cache, cached_text = _lookup_cached_response(
+            prompt_details, use_cache, response_cache
+        )
+        if cached_text is not None:
+            yield cached_text
+            return
+
+        parts = []
+        try:
+            logger.info(
+                "Streaming recommendation for persona: '%s' using %s...",
+                persona,
+                model_name,
+            )
+            model = get_generative_model(api_key, model_name)
+            prompt = prompt_details["final_prompt_text"]
+
+            # Errors usually surface on the first chunk, so it is fetched
+            # under the guard too; once text has been yielded there are no
+            # more retries.
+            def _open():
+                stream = iter(model.generate_content(prompt, stream=True))
+                return stream, next(stream, None)
+
+            # Covers the whole stream, from the request to the last chunk.
+            with timed("llm_stream"):
+                stream, first = get_llm_guard().call(_open, tokens=count_tokens(prompt))
+                if first is not None:
+                    parts.append(first.text)
+                    yield first.text
+                for chunk in stream:
+                    parts.append(chunk.text)
+                    yield chunk.text
+            logger.info("Synthesis complete.")
+        except Exception as e:
+            raise _generation_failed(prompt_details, e) from e
+        _store_response(cache, prompt_details, "".join(parts))
+
+    return _stream(), prompt_details
+
+
+def stream_recommendation_summary_async(
+    retrieved_chunks: List[Tuple[Dict[str, Any], float]],
+    student_narrative: str,
+    api_key: str,
+    persona: str = "teacher",
+    model_name: str = GENERATIVE_MODEL_NAME,
+    use_cache: bool = True,
+    response_cache: Optional[ResponseCache] = None,
+) -> Tuple[AsyncIterator[str], Dict[str, Any]]:
+    """
+    Async streaming variant; see `stream_recommendation_summary`.
+
+    Returns an async iterator of partial text chunks together with the
+    prompt details dictionary.
+    """
+    try:
+        prompt_details = build_recommendation_prompt(
+            retrieved_chunks, student_narrative, persona, model_name
+        )
+    except ValueError as e:
+        raise _prompt_failed(e) from e
+
+    async def _stream() -> AsyncIterator[str]:
+        cache, cached_text = _lookup_cached_response(
+            prompt_details, use_cache, response_cache
+        )
+        if cached_text is not None:
+            yield cached_text
+            return
+
+        parts = []
+        try:
+            logger.info(
+                "Streaming recommendation for persona: '%s' using %s...",
+                persona,
+                model_name,
+            )
+            model = get_generative_model(api_key, model_name)
+            prompt = prompt_details["final_prompt_text"]
+
+            async def _open():
+                response = await model.generate_content_async(prompt, stream=True)
+                stream = response.__aiter__()
+                try:
+                    return stream, await stream.__anext__()
+                except StopAsyncIteration:
+                    return stream, None
+
+            with timed("llm_stream"):
+                stream, first = await get_llm_guard().call_async(
+                    _open, tokens=count_tokens(prompt)
+                )
+                if first is not None:
+                    parts.append(first.text)
+                    yield first.text
+                async for chunk in stream:
+                    parts.append(chunk.text)
+                    yield chunk.text
+            logger.info("Synthesis complete.")
+        except Exception as e:
+            raise _generation_failed(prompt_details, e) from e
+        _store_response(cache, prompt_details, "".join(parts))
+
+    return _stream(), prompt_details
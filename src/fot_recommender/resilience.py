@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from fot_recommender.config import (
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_RESET_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_TOKENS_PER_MINUTE,
+)
+from fot_recommender.metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited, or a transient upstream failure.
+# Google API errors carry theirs as `.code` (e.g. ResourceExhausted is 429).
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+LLM_CALLS = REGISTRY.register(
+    Counter(
+        "fot_llm_calls_total",
+        "LLM call attempts by outcome.",
+        labelnames=("outcome",),
+    )
+)
+LLM_RETRIES = REGISTRY.register(
+    Counter("fot_llm_retries_total", "LLM calls retried after a retryable error.")
+)
+LLM_CIRCUIT_TRANSITIONS = REGISTRY.register(
+    Counter(
+        "fot_llm_circuit_transitions_total",
+        "Circuit breaker state changes, by new state.",
+        labelnames=("state",),
+    )
+)
+LLM_RATE_LIMIT_WAIT = REGISTRY.register(
+    Histogram(
+        "fot_llm_rate_limit_wait_seconds",
+        "Time LLM calls waited for the client-side rate limiter.",
+    )
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether `error` is transient: a rate limit, timeout or 5xx response."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """
+    Allows `per_minute` units a minute, in bursts of up to a minute's worth.
+
+    `reserve` always succeeds and returns how long the caller must wait
+    before using what it reserved. The balance may go negative, which
+    queues callers in arrival order instead of letting them race.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self._clock = clock
+        self._level = per_minute
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1) -> float:
+        with self._lock:
+            now = self._clock()
+            self._level = min(
+                self.capacity, self._level + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # A single call larger than the bucket waits for a full bucket.
+            self._level -= min(amount, self.capacity)
+            return max(0.0, -self._level / self.rate)
+
+
+class RateLimiter:
+    """Client-side limits on LLM requests and prompt tokens per minute."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserves one request and `tokens` tokens; returns the wait in seconds."""
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive upstream failures.
+
+    Closed: calls go through. Open: calls are refused with
+    `CircuitOpenError` for `reset_seconds`. Half-open: one trial call is let
+    through; its success closes the circuit and its failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = LLM_CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("LLM circuit breaker %s -> %s", self.state, state)
+            LLM_CIRCUIT_TRANSITIONS.inc(state=state)
+            self.state = state
+
+    def allow(self) -> None:
+        """Raises `CircuitOpenError` unless a call may go through now."""
+        with self._lock:
+            if self.state == "open":
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                self._set_state("half_open")
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    raise CircuitOpenError("LLM circuit breaker is half-open")
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._set_state("closed")
+
+    def release_trial(self) -> None:
+        """
+        Frees the half-open trial slot of a call that ended without an
+        outcome (e.g. it was cancelled), so the next call becomes the trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state("open")
+
+
+class LLMGuard:
+    """
+    Wraps LLM calls with the rate limiter, retries and the circuit breaker.
+
+    Each attempt first checks the breaker, then waits for the limiter. A
+    retryable error counts as an upstream failure and is retried after a
+    full-jitter exponential backoff, up to `max_retries` times; any other
+    error is raised at once. Errors that exhaust the retries, and
+    `CircuitOpenError`, reach the caller.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_seconds: float = LLM_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = LLM_RETRY_MAX_SECONDS,
+        sleep: Callable[[float], Any] = time.sleep,
+        async_sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+
+    def _admit(self, tokens: int) -> float:
+        """Checks the breaker and returns how long to wait for the limiter."""
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            LLM_CALLS.inc(outcome="circuit_open")
+            raise
+        wait = self.limiter.reserve(tokens)
+        LLM_RATE_LIMIT_WAIT.observe(wait)
+        return wait
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        """Records a failed attempt; returns the retry delay or re-raises."""
+        if not is_retryable(error):
+            # Says nothing about the upstream's health either way (the request
+            # itself is bad), so it neither closes nor trips the breaker.
+            self.breaker.release_trial()
+            LLM_CALLS.inc(outcome="error")
+            raise error
+        self.breaker.record_failure()
+        LLM_CALLS.inc(outcome="retryable_error")
+        if attempt >= self.max_retries:
+            raise error
+        LLM_RETRIES.inc()
+        delay = random.uniform(
+            0, min(self.retry_max_seconds, self.retry_base_seconds * 2**attempt)
+        )
+        logger.warning(
+            "LLM call failed (%s); retry %d/%d in %.2fs.",
+            error,
+            attempt + 1,
+            self.max_retries,
+            delay,
+        )
+        return delay
+
+    def _succeeded(self) -> None:
+        self.breaker.record_success()
+        LLM_CALLS.inc(outcome="ok")
+
+    def call(self, fn: Callable[[], T], tokens: int = 1) -> T:
+        """Runs `fn()` under the limiter, retries and breaker."""
+        attempt = 0
+        while True:
+            wait = self._admit(tokens)
+            try:
+                if wait:
+                    self._sleep(wait)
+                result = fn()
+            except Exception as e:
+                self._sleep(self._backoff(e, attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            self._succeeded()
+            return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]], tokens: int = 1) -> T:
+        """Async counterpart of `call`; `fn()` returns an awaitable."""
+        attempt = 0
+        while True:
+            wait = self._admit(tokens)
+            try:
+                if wait:
+                    await self._async_sleep(wait)
+                result = await fn()
+            except Exception as e:
+                await self._async_sleep(self._backoff(e, attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled (e.g. the client disconnected mid-generation):
+                # neither a success nor an upstream failure, but a half-open
+                # trial must give up its slot or the circuit never closes.
+                self.breaker.release_trial()
+                raise
+            self._succeeded()
+            return result
+
+
+_default_guard: Optional[LLMGuard] = None
+
+
+def get_llm_guard() -> LLMGuard:
+    """Returns the process-wide guard shared by every LLM call."""
+    global _default_guard
+    if _default_guard is None:
+        _default_guard = LLMGuard()
+    return _default_guard
@@ -1,5 +1,13 @@
 import collections
-from typing import List, Dict, Any
+import heapq
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Dict, Any, Tuple
+
+from fot_recommender.config import CHUNKER_MAX_ITEMS_IN_MEMORY
 
 
 def _serialize_table_to_markdown(table_data: List[Dict[str, Any]]) -> str:
@@ -29,6 +37,40 @@ def _serialize_table_to_markdown(table_data: List[Dict[str, Any]]) -> str:
     return "\n".join(md_rows)
 
 
+def _build_chunk(
+    source_doc: str, concept: str, items: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Consolidates the page-ordered raw items of one (source, concept) group."""
+    # Collect all content and any table data
+    all_content_parts = []
+    for item in items:
+        if item.get("content"):
+            all_content_parts.append(item["content"])
+        if item.get("table_data"):
+            # Serialize table data to Markdown and add it as a content part
+            table_md = _serialize_table_to_markdown(item["table_data"])
+            if table_md:  # Only add if serialization produced something
+                all_content_parts.append(f"\nExample Table:\n{table_md}")
+
+    combined_content = "\n\n".join(all_content_parts).strip()
+
+    pages = sorted(
+        list(set(item["absolute_page"] for item in items if "absolute_page" in item))
+    )
+    page_str = f"Pages: {', '.join(map(str, pages))}" if pages else "N/A"
+
+    # Prepend title to content for embedding
+    content_for_embedding = f"Title: {concept}. Content: {combined_content}"
+
+    return {
+        "title": concept,
+        "source_document": source_doc,
+        "fot_pages": page_str,
+        "content_for_embedding": content_for_embedding,
+        "original_content": combined_content,  # Keep original for potential display
+    }
+
+
 def chunk_by_concept(raw_knowledge_base: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Groups items from the raw knowledge base by a composite key of
@@ -50,37 +92,76 @@ def chunk_by_concept(raw_knowledge_base: List[Dict[str, Any]]) -> List[Dict[str,
     final_chunks = []
     for (source_doc, concept), items in grouped_by_source_and_concept.items():
         items.sort(key=lambda x: x.get("absolute_page", 0))
+        final_chunks.append(_build_chunk(source_doc, concept, items))
 
-        # Collect all content and any table data
-        all_content_parts = []
-        for item in items:
-            if item.get("content"):
-                all_content_parts.append(item["content"])
-            if item.get("table_data"):
-                # Serialize table data to Markdown and add it as a content part
-                table_md = _serialize_table_to_markdown(item["table_data"])
-                if table_md:  # Only add if serialization produced something
-                    all_content_parts.append(f"\nExample Table:\n{table_md}")
-
-        combined_content = "\n\n".join(all_content_parts).strip()
-
-        pages = sorted(
-            list(
-                set(item["absolute_page"] for item in items if "absolute_page" in item)
-            )
-        )
-        page_str = f"Pages: {', '.join(map(str, pages))}" if pages else "N/A"
+    return final_chunks
 
-        # Prepend title to content for embedding
-        content_for_embedding = f"Title: {concept}. Content: {combined_content}"
 
-        final_chunk = {
-            "title": concept,
-            "source_document": source_doc,
-            "fot_pages": page_str,
-            "content_for_embedding": content_for_embedding,
-            "original_content": combined_content,  # Keep original for potential display
-        }
-        final_chunks.append(final_chunk)
+def iter_raw_items_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yields raw knowledge-base items from a JSONL file, one per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}")
 
-    return final_chunks
+
+def _sort_key(record: Tuple[int, Dict[str, Any]]) -> Tuple[str, str, Any, int]:
+    # The sequence number keeps items on the same page in input order, matching
+    # the stable sort in `chunk_by_concept`.
+    seq, item = record
+    return (item["source_document"], item["concept"], item.get("absolute_page", 0), seq)
+
+
+def _spill_run(records: List[Tuple[int, Dict[str, Any]]], spill_dir: str) -> str:
+    records.sort(key=_sort_key)
+    fd, path = tempfile.mkstemp(suffix=".jsonl", dir=spill_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for seq, item in records:
+            f.write(json.dumps([seq, item], ensure_ascii=False) + "\n")
+    return path
+
+
+def _read_run(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            seq, item = json.loads(line)
+            yield seq, item
+
+
+def stream_chunks_by_concept(
+    raw_items: Iterable[Dict[str, Any]],
+    max_items_in_memory: int = CHUNKER_MAX_ITEMS_IN_MEMORY,
+) -> Iterator[Dict[str, Any]]:
+    """
+    A bounded-memory version of `chunk_by_concept` for large, streamed inputs.
+
+    Raw items are buffered up to `max_items_in_memory`, sorted by
+    (source_document, concept, absolute_page) and spilled to temporary run
+    files. The runs are then k-way merged, and each (source_document, concept)
+    group is yielded as a chunk as soon as it is complete. At most one buffer,
+    one group and one line per run are held in memory at a time.
+
+    Chunks have the same content as `chunk_by_concept` produces, but are
+    yielded in (source_document, concept) order rather than first-seen order.
+    """
+    with tempfile.TemporaryDirectory(prefix="fot_chunker_") as spill_dir:
+        buffer: List[Tuple[int, Dict[str, Any]]] = []
+        run_paths: List[str] = []
+        for seq, item in enumerate(raw_items):
+            buffer.append((seq, item))
+            if len(buffer) >= max_items_in_memory:
+                run_paths.append(_spill_run(buffer, spill_dir))
+                buffer = []
+        buffer.sort(key=_sort_key)
+
+        merged = heapq.merge(
+            *(_read_run(path) for path in run_paths), buffer, key=_sort_key
+        )
+        for (source_doc, concept), group in itertools.groupby(
+            merged, key=lambda r: (r[1]["source_document"], r[1]["concept"])
+        ):
+            yield _build_chunk(source_doc, concept, [item for _, item in group])
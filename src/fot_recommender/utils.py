@@ -1,5 +1,51 @@
 import datetime
+import hashlib
+import importlib
 import json
+import logging
+import types
+
+from fot_recommender.config import LOG_LEVEL
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Used for the heavy dependencies (torch via sentence_transformers, faiss,
+    google.generativeai) so that importing `fot_recommender` stays cheap and
+    processes that never embed or generate never pay for them.
+    """
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__.get("_wrapped_module")
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_wrapped_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Returns a `LazyModule` for `name`, deferring the real import."""
+    return LazyModule(name)
+
+
+def preload(*modules: types.ModuleType) -> None:
+    """Forces the import of any `LazyModule` placeholders, e.g. during warmup."""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            module._load()
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """Sets up leveled, timestamped logging for an entry point (app, CLI, build)."""
+    logging.basicConfig(
+        level=getattr(logging, level.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
 
 
 def display_recommendations(results: list, citations_map: dict):
@@ -109,3 +155,12 @@ def load_citations(path):
         return {item["source_document"]: item for item in citations_list}
     except (FileNotFoundError, json.JSONDecodeError):
         return {}
+
+
+def sha256_file(path, chunk_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
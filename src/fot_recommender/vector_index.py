@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+from fot_recommender.config import (
+    EMBEDDING_STORAGE_DTYPE,
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_HNSW_M,
+    FAISS_INDEX_MMAP,
+    FAISS_INDEX_TYPE,
+    FAISS_IVF_NLIST,
+    FAISS_IVF_NPROBE,
+    FAISS_PQ_M,
+    FAISS_PQ_NBITS,
+    MIN_SIMILARITY_SCORE,
+)
+from fot_recommender.utils import lazy_import
+
+if TYPE_CHECKING:
+    import faiss  # type: ignore
+else:
+    faiss = lazy_import("faiss")
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+# FAISS warns when k-means has fewer than this many training points per centroid.
+MIN_POINTS_PER_CENTROID = 39
+
+
+def l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Scales each row to unit length (as float32), so inner product is cosine
+    similarity. All-zero rows are left as zeros.
+    """
+    embeddings = np.array(embeddings, dtype="float32", ndmin=2)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+    return embeddings
+
+
+def _scalar_quantizer_type(storage_dtype: str) -> Optional[int]:
+    if storage_dtype not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Unknown embedding storage dtype '{storage_dtype}'. "
+            f"Choose from {STORAGE_DTYPES}."
+        )
+    return {
+        "float32": None,
+        "float16": faiss.ScalarQuantizer.QT_fp16,
+        "int8": faiss.ScalarQuantizer.QT_8bit,
+    }[storage_dtype]
+
+
+def index_params(
+    index_type: str = FAISS_INDEX_TYPE,
+    storage_dtype: str = EMBEDDING_STORAGE_DTYPE,
+) -> Dict[str, Any]:
+    """The configured parameters for an index type, as recorded in build state."""
+    params: Dict[str, Any] = {"index_type": index_type}
+    if index_type != "ivfpq":
+        params["storage_dtype"] = storage_dtype
+    if index_type in ("ivf", "ivfpq"):
+        params.update(nlist=FAISS_IVF_NLIST, nprobe=FAISS_IVF_NPROBE)
+    if index_type == "ivfpq":
+        params.update(pq_m=FAISS_PQ_M, pq_nbits=FAISS_PQ_NBITS)
+    if index_type == "hnsw":
+        params.update(
+            hnsw_m=FAISS_HNSW_M,
+            ef_construction=FAISS_HNSW_EF_CONSTRUCTION,
+            ef_search=FAISS_HNSW_EF_SEARCH,
+        )
+    return params
+
+
+def _effective_nlist(n_vectors: int) -> int:
+    """Caps the number of IVF lists so every centroid gets enough training data."""
+    return max(1, min(FAISS_IVF_NLIST, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _effective_pq_nbits(n_vectors: int) -> int:
+    """Caps PQ code bits so each sub-quantizer's 2**nbits centroids train well."""
+    trainable = int(np.log2(max(2, n_vectors // MIN_POINTS_PER_CENTROID)))
+    return max(1, min(FAISS_PQ_NBITS, trainable))
+
+
+def build_index(
+    embeddings: np.ndarray,
+    index_type: str = FAISS_INDEX_TYPE,
+    storage_dtype: str = EMBEDDING_STORAGE_DTYPE,
+) -> faiss.Index:
+    """
+    Creates, trains (where needed) and populates a FAISS index of the given type.
+
+    All types use inner-product similarity, matching the exact `IndexFlatIP`
+    baseline:
+    *   "flat": exact brute-force search.
+    *   "ivf": inverted file over k-means cells; `nprobe` cells are scanned.
+    *   "hnsw": graph-based search; no training needed.
+    *   "ivfpq": IVF with product-quantized (compressed) vectors.
+
+    `storage_dtype` "float16" or "int8" swaps the flat vector storage of the
+    "flat", "ivf" and "hnsw" types for a scalar quantizer (2 or 1 bytes per
+    dimension). "ivfpq" already stores compressed codes and ignores it.
+
+    IVF list counts and PQ code sizes are capped for small corpora so that
+    training always has enough points.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(
+            f"Unknown FAISS index type '{index_type}'. Choose from {INDEX_TYPES}."
+        )
+    sq_type = _scalar_quantizer_type(storage_dtype)
+
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n_vectors, dimension = embeddings.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    index: faiss.Index
+    if index_type == "flat":
+        if sq_type is None:
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, sq_type, metric)
+    elif index_type == "hnsw":
+        hnsw_index: faiss.IndexHNSW
+        if sq_type is None:
+            hnsw_index = faiss.IndexHNSWFlat(dimension, FAISS_HNSW_M, metric)
+        else:
+            hnsw_index = faiss.IndexHNSWSQ(
+                dimension, sq_type, FAISS_HNSW_M, metric  # type: ignore[arg-type]
+            )
+        hnsw_index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        hnsw_index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        index = hnsw_index
+    else:
+        nlist = _effective_nlist(n_vectors)
+        quantizer = faiss.IndexFlatIP(dimension)
+        ivf_index: faiss.IndexIVF
+        if index_type == "ivf":
+            if sq_type is None:
+                ivf_index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+            else:
+                ivf_index = faiss.IndexIVFScalarQuantizer(
+                    quantizer, dimension, nlist, sq_type, metric
+                )
+        else:
+            if dimension % FAISS_PQ_M != 0:
+                raise ValueError(
+                    f"FAISS_PQ_M={FAISS_PQ_M} must divide the embedding dimension {dimension}."
+                )
+            # Each PQ sub-quantizer has 2**nbits centroids to train.
+            nbits = _effective_pq_nbits(n_vectors)
+            ivf_index = faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                nlist,
+                FAISS_PQ_M,
+                nbits,
+                metric,
+            )
+        ivf_index.nprobe = min(FAISS_IVF_NPROBE, nlist)
+        index = ivf_index
+
+    if not index.is_trained:
+        logger.info("Training %s index on %d vectors...", index_type, n_vectors)
+        index.train(embeddings)  # type: ignore
+    index.add(embeddings)  # type: ignore
+    return index
+
+
+def load_index(path: str, mmap: bool = FAISS_INDEX_MMAP) -> faiss.Index:
+    """
+    Reads a FAISS index from disk, memory-mapped and read-only when `mmap`.
+
+    A mapped index is paged in on demand and shared between processes through
+    the OS page cache instead of each worker holding a private copy. Falls
+    back to a regular read if this FAISS build can't map the index type.
+    """
+    if mmap:
+        flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            return faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logger.warning("Could not memory-map %s (%s); reading it instead.", path, e)
+    return faiss.read_index(str(path))
+
+
+def save_index(index: faiss.Index, path) -> None:
+    """
+    Writes a FAISS index to a temporary file and swaps it in atomically, so a
+    server that maps the old file keeps reading it undisturbed.
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, str(path))
+
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """The effective settings of a built index (after any small-corpus capping)."""
+    description: Dict[str, Any] = {
+        "class": type(index).__name__,
+        "ntotal": int(index.ntotal),
+        "dimension": int(index.d),
+    }
+    if hasattr(index, "nlist"):
+        ivf = faiss.extract_index_ivf(index)
+        description.update(nlist=int(ivf.nlist), nprobe=int(ivf.nprobe))
+    if hasattr(index, "pq"):
+        description.update(pq_m=int(index.pq.M), pq_nbits=int(index.pq.nbits))
+    if hasattr(index, "hnsw"):
+        description.update(ef_search=int(index.hnsw.efSearch))
+    return description
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Size of the serialized index, which is what gets loaded or mapped."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def quantization_report(
+    index: faiss.Index,
+    embeddings: np.ndarray,
+    k: int = 10,
+    threshold: float = MIN_SIMILARITY_SCORE,
+    n_queries: int = 1000,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Compares `index` against exact float32 inner products over `embeddings`.
+
+    Reports the serialized size of the index versus a float32 `IndexFlatIP`,
+    and the drift of the scores it returns for the top-k of a sample of
+    queries: mean/max absolute error, and how many (query, chunk) pairs land
+    on the other side of `threshold` (`MIN_SIMILARITY_SCORE`) than their
+    exact float32 score would.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(embeddings), min(n_queries, len(embeddings)), replace=False)
+    queries = embeddings[np.sort(sample)]
+
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)  # type: ignore
+    float32_bytes = index_memory_bytes(exact)
+    index_bytes = index_memory_bytes(index)
+
+    scores, indices = index.search(queries, min(k, len(embeddings)))  # type: ignore
+    found = indices != -1
+    exact_scores = np.einsum(
+        "qd,qkd->qk", queries, embeddings[np.where(found, indices, 0)]
+    )
+    error = np.abs(scores - exact_scores)[found]
+    crossings = ((scores >= threshold) != (exact_scores >= threshold))[found]
+
+    return {
+        "index": describe_index(index),
+        "memory": {
+            "float32_bytes": float32_bytes,
+            "index_bytes": index_bytes,
+            "reduction": 1 - index_bytes / float32_bytes,
+        },
+        "score_drift": {
+            "pairs": int(found.sum()),
+            "mean_abs": float(error.mean()) if error.size else 0.0,
+            "max_abs": float(error.max()) if error.size else 0.0,
+            "threshold": threshold,
+            "threshold_crossings": int(crossings.sum()),
+        },
+    }
+
+
+def _search_with_timing(index: faiss.Index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    _, indices = index.search(queries, k)  # type: ignore
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return indices, elapsed_ms / len(queries)
+
+
+def recall_at_k(approx_indices: np.ndarray, exact_indices: np.ndarray) -> float:
+    """Fraction of the exact top-k ids that the approximate search also found."""
+    hits = 0
+    total = 0
+    for approx_row, exact_row in zip(approx_indices, exact_indices):
+        exact_ids = set(exact_row[exact_row != -1].tolist())
+        hits += len(exact_ids & set(approx_row.tolist()))
+        total += len(exact_ids)
+    return hits / total if total else 1.0
+
+
+def recall_report(
+    index: faiss.Index,
+    embeddings: np.ndarray,
+    ks: Optional[List[int]] = None,
+    n_queries: int = 1000,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Measures recall@k of `index` against an exact `IndexFlatIP` over the same
+    embeddings, along with the mean per-query search latency of both.
+
+    Queries are a random sample of the knowledge-base vectors themselves.
+    """
+    ks = ks or [1, 3, 10]
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(embeddings), min(n_queries, len(embeddings)), replace=False)
+    queries = embeddings[np.sort(sample)]
+
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)  # type: ignore
+
+    report: Dict[str, Any] = {
+        "index": describe_index(index),
+        "n_vectors": int(len(embeddings)),
+        "n_queries": int(len(queries)),
+        "recall": {},
+        "mean_latency_ms": {},
+    }
+    for k in ks:
+        exact_indices, exact_ms = _search_with_timing(exact, queries, k)
+        approx_indices, approx_ms = _search_with_timing(index, queries, k)
+        report["recall"][f"recall@{k}"] = recall_at_k(approx_indices, exact_indices)
+        report["mean_latency_ms"][f"k={k}"] = {"exact": exact_ms, "index": approx_ms}
+    return report
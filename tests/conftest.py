@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_clients():
+    """
+    The pipeline reuses one model client per (api_key, model_name). Clear it
+    around each test so a patched `genai.GenerativeModel` is always picked up.
+    """
+    from src.fot_recommender.rag_pipeline import reset_generative_models
+
+    reset_generative_models()
+    yield
+    reset_generative_models()
+
+
+@pytest.fixture(autouse=True)
+def isolated_response_cache(tmp_path, monkeypatch):
+    """
+    Points the default LLM response cache at a per-test directory, so tests
+    never read from or write to the real `data/cache/llm_responses`.
+    """
+    import fot_recommender.llm_cache
+    import src.fot_recommender.llm_cache
+
+    for module in (fot_recommender.llm_cache, src.fot_recommender.llm_cache):
+        monkeypatch.setattr(
+            module, "_default_cache", module.ResponseCache(tmp_path / "llm_responses")
+        )
@@ -0,0 +1,54 @@
+import gzip
+import json
+import os
+import time
+
+
+def test_audit_log_writer_batches_and_rotates_gzipped_jsonl(tmp_path):
+    """
+    Ensures queued records all reach the gzipped JSONL log in order, and that
+    the log rotates to numbered backups once it reaches its size limit.
+    """
+    from src.fot_recommender.audit_log import AuditLogWriter
+
+    # Arrange
+    path = tmp_path / "audit" / "evaluations.jsonl.gz"
+    writer = AuditLogWriter(
+        path, max_bytes=1, backup_count=2, batch_size=4, flush_seconds=0.05
+    )
+
+    # Act
+    for i in range(10):
+        assert writer.write({"request": i}) is True
+        if i % 4 == 3:
+            time.sleep(0.2)  # Let each batch land in its own file.
+    writer.close()
+
+    # Assert
+    files = [path.with_name(f"{path.name}.2"), path.with_name(f"{path.name}.1"), path]
+    assert all(f.exists() for f in files)
+    assert not path.with_name(f"{path.name}.3").exists()
+    records = []
+    for f in files:
+        with gzip.open(f, "rt", encoding="utf-8") as log:
+            records.extend(json.loads(line)["request"] for line in log)
+    assert records == list(range(10))
+
+
+def test_write_evaluation_export_purges_expired_exports(tmp_path):
+    """Ensures exports are written on demand and old ones are cleaned up."""
+    from src.fot_recommender.audit_log import write_evaluation_export
+
+    # Arrange
+    stale = tmp_path / "fot_evaluation_old.json"
+    stale.write_text("{}", encoding="utf-8")
+    an_hour_ago = time.time() - 3600
+    os.utime(stale, (an_hour_ago, an_hour_ago))
+
+    # Act
+    path = write_evaluation_export({"outputs": {}}, tmp_path, ttl_seconds=60)
+
+    # Assert
+    assert not stale.exists()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"outputs": {}}
+    assert path.parent == tmp_path
@@ -0,0 +1,104 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+
+def _write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_iter_student_profiles_reads_csv_indicator_columns(tmp_path):
+    """
+    Ensures CSV rosters are turned back into the nested profile shape,
+    with `indicators.<name>` columns collected into the indicators dict.
+    """
+    from src.fot_recommender.batch import iter_student_profiles
+
+    csv_path = tmp_path / "roster.csv"
+    csv_path.write_text(
+        "student_id,narrative_summary_for_embedding,indicators.credits_earned,indicators.behavioral_flags\n"
+        "S1,Struggling in math.,2.5,1\n",
+        encoding="utf-8",
+    )
+
+    profiles = list(iter_student_profiles(str(csv_path)))
+
+    assert profiles == [
+        {
+            "student_id": "S1",
+            "narrative_summary_for_embedding": "Struggling in math.",
+            "indicators": {"credits_earned": 2.5, "behavioral_flags": 1},
+        }
+    ]
+
+
+def test_run_batch_resumes_from_existing_output(tmp_path):
+    """
+    Ensures students already written to the output file are skipped, so a
+    resumed run only makes LLM calls for the remaining students.
+    """
+    from src.fot_recommender.batch import run_batch
+
+    # 1. Arrange: A three-student roster where S1 was finished by a prior run,
+    # followed by a truncated line from the crash.
+    input_path = tmp_path / "roster.jsonl"
+    output_path = tmp_path / "out.jsonl"
+    _write_jsonl(
+        input_path,
+        [
+            {
+                "student_id": sid,
+                "indicators": {},
+                "narrative_summary_for_embedding": sid,
+            }
+            for sid in ["S1", "S2", "S3"]
+        ],
+    )
+    output_path.write_text(
+        json.dumps({"student_id": "S1"}) + '\n{"student_id": "S2", "trunc',
+        encoding="utf-8",
+    )
+
+    mock_model = MagicMock()
+    mock_model.encode.return_value = np.zeros((2, 4), dtype="float32")
+    mock_index = MagicMock()
+    mock_index.search.return_value = (np.array([[0.9], [0.8]]), np.array([[0], [0]]))
+    sample_kb = [
+        {
+            "title": "Tip",
+            "source_document": "doc_A",
+            "original_content": "Do this.",
+        }
+    ]
+
+    # 2. Act
+    with patch(
+        "src.fot_recommender.batch.generate_recommendation_summary",
+        return_value=("Recommendation", {}),
+    ) as mock_generate:
+        summary = run_batch(
+            input_path=str(input_path),
+            output_path=str(output_path),
+            model=mock_model,
+            index=mock_index,
+            knowledge_base=sample_kb,
+            api_key="fake_key",
+            retrieval_batch_size=10,
+            max_concurrency=2,
+        )
+
+    # 3. Assert: Only S2 and S3 were generated, in one batched retrieval
+    assert summary == {"processed": 2, "skipped": 1, "failed": 0}
+    assert mock_generate.call_count == 2
+    mock_model.encode.assert_called_once_with(["S2", "S3"])
+
+    lines = output_path.read_text(encoding="utf-8").splitlines()
+    written = [json.loads(line) for line in lines[1:]]
+    assert sorted(r["student_id"] for r in written) == ["S2", "S3"]
+    assert all(
+        r["llm_output"]["synthesized_recommendation"] == "Recommendation"
+        for r in written
+    )
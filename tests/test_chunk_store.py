@@ -0,0 +1,50 @@
+import pytest
+
+
+def test_chunk_store_round_trips_chunks_by_row_id(tmp_path):
+    """
+    Ensures chunks written to the offset-indexed store read back unchanged,
+    by positive, negative and sliced row ids.
+    """
+    from src.fot_recommender.chunk_store import open_chunk_store, write_chunk_store
+
+    # Arrange
+    chunks = [
+        {"title": f"Chunk {i}", "original_content": "é\n" * i, "row": i}
+        for i in range(5)
+    ]
+    blob_path, offsets_path = tmp_path / "chunks.jsonl", tmp_path / "chunks.idx"
+
+    # Act
+    written = write_chunk_store(iter(chunks), blob_path, offsets_path)
+    store = open_chunk_store(blob_path, offsets_path)
+
+    # Assert
+    assert written == len(store) == 5
+    assert store[3] == chunks[3]
+    assert store[-1] == chunks[4]
+    assert store[1:3] == chunks[1:3]
+    assert list(store) == chunks
+    with pytest.raises(IndexError):
+        store[5]
+    store.close()
+
+
+def test_load_chunk_store_falls_back_to_json_when_store_is_missing(tmp_path):
+    """Ensures the app still serves from the JSON file before the store is built."""
+    import json
+
+    from src.fot_recommender.rag_pipeline import load_chunk_store
+
+    # Arrange
+    chunks = [{"title": "Only chunk"}]
+    fallback = tmp_path / "chunks.json"
+    fallback.write_text(json.dumps(chunks), encoding="utf-8")
+
+    # Act
+    loaded = load_chunk_store(
+        str(tmp_path / "missing.jsonl"), str(tmp_path / "missing.idx"), str(fallback)
+    )
+
+    # Assert
+    assert loaded == chunks
@@ -44,3 +44,44 @@ def test_chunk_by_concept_groups_correctly():
         "Title: Mentoring. Content: First part.\n\nSecond part."
         in mentoring_chunk["content_for_embedding"]
     )
+
+
+def test_stream_chunks_by_concept_matches_in_memory_chunker(tmp_path):
+    """
+    Ensures the streaming chunker, forced to spill several sorted runs to
+    disk, produces the same chunks as `chunk_by_concept`, grouped in
+    (source_document, concept) order.
+    """
+    import json
+
+    from src.fot_recommender.semantic_chunker import (
+        chunk_by_concept,
+        iter_raw_items_jsonl,
+        stream_chunks_by_concept,
+    )
+
+    # 1. Arrange: Interleaved groups, out-of-order pages, written as JSONL
+    raw_items = [
+        {
+            "source_document": f"doc_{i % 3}",
+            "concept": f"Concept {i % 2}",
+            "absolute_page": 20 - i,
+            "content": f"Part {i}.",
+        }
+        for i in range(20)
+    ]
+    raw_path = tmp_path / "raw.jsonl"
+    raw_path.write_text("\n".join(json.dumps(item) for item in raw_items) + "\n")
+
+    # 2. Act: A buffer of 3 items forces seven spilled runs
+    streamed = list(
+        stream_chunks_by_concept(iter_raw_items_jsonl(raw_path), max_items_in_memory=3)
+    )
+
+    # 3. Assert: Same chunks as the in-memory path, in sorted group order
+    expected = sorted(
+        chunk_by_concept(raw_items),
+        key=lambda c: (c["source_document"], c["title"]),
+    )
+    assert streamed == expected
+    assert len(streamed) == 6
@@ -0,0 +1,53 @@
+def _chunk(title, content):
+    return {"title": title, "source_document": "doc_A", "original_content": content}
+
+
+def test_build_context_keeps_chunks_that_fit_unchanged():
+    """Ensures a generous budget reproduces the full, untrimmed context."""
+    from src.fot_recommender.context_builder import build_context
+
+    # Arrange
+    chunks = [(_chunk("Tip 1", "Do this."), 0.9), (_chunk("Tip 2", "Then that."), 0.8)]
+
+    # Act
+    context, report = build_context(chunks, "any query", token_budget=1000)
+
+    # Assert
+    assert "Content: Do this.\n" in context
+    assert "Content: Then that.\n" in context
+    assert not any(c["trimmed"] for c in report["chunks"])
+    assert report["context_tokens"] <= 1000
+
+
+def test_build_context_selects_query_relevant_passages_within_budget():
+    """
+    Ensures an oversized chunk (e.g. one with a serialized table) is cut
+    down to the passages that overlap the query, in original order, and the
+    budget actually used is reported.
+    """
+    from src.fot_recommender.context_builder import GAP_MARKER, build_context
+
+    # Arrange
+    table = "\n".join(f"| row {i} | filler value {i} |" for i in range(40))
+    content = (
+        "Mentors meet weekly with students. "
+        "Attendance monitoring catches chronic absence early.\n"
+        f"{table}\n"
+        "Tutoring in math raises course grades."
+    )
+    query = "Student with poor attendance failing math"
+
+    # Act
+    context, report = build_context(
+        [(_chunk("Big chunk", content), 0.9)], query, token_budget=60
+    )
+
+    # Assert
+    assert report["token_budget"] == 60
+    assert report["context_tokens"] <= 60
+    assert report["chunks"][0]["trimmed"] is True
+    assert report["untrimmed_content_tokens"] > report["context_tokens"]
+    assert "Attendance monitoring" in context
+    assert "Tutoring in math" in context
+    assert context.index("Attendance monitoring") < context.index("Tutoring in math")
+    assert GAP_MARKER in context
@@ -0,0 +1,148 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+
+def _model_is_cached(model_name):
+    """The parity check needs the real model; don't hit the network for it."""
+    if importlib.util.find_spec("huggingface_hub") is None:
+        return False
+    from huggingface_hub import try_to_load_from_cache
+
+    repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return isinstance(try_to_load_from_cache(repo, "config.json"), str)
+
+
+def test_encoder_parity_reports_agreement_with_reference():
+    """Ensures the parity report measures embedding and retrieval agreement."""
+    from src.fot_recommender.embedding_backends import encoder_parity
+
+    # Arrange
+    rng = np.random.default_rng(0)
+    vocabulary = {w: rng.normal(size=16) for w in "a b c d e f g h".split()}
+
+    class BagOfWords:
+        def __init__(self, noise):
+            self.noise = noise
+
+        def encode(self, texts):
+            vectors = np.stack([sum(vocabulary[w] for w in t.split()) for t in texts])
+            return vectors + self.noise * rng.normal(size=vectors.shape)
+
+    texts = ["a b", "c d", "e f"]
+    corpus = ["a b c", "c d e", "e f g", "g h", "h a"]
+
+    # Act
+    identical = encoder_parity(BagOfWords(0), BagOfWords(0), texts, corpus)
+    noisy = encoder_parity(BagOfWords(0), BagOfWords(5.0), texts, corpus)
+
+    # Assert
+    assert identical["texts"] == 8
+    assert identical["min_cosine"] == pytest.approx(1.0)
+    assert identical["top1_agreement"] == 1.0
+    assert identical["top3_overlap"] == 1.0
+    assert noisy["mean_cosine"] < identical["mean_cosine"]
+
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+    """
+    A small, randomly initialized BERT sentence encoder saved locally, so the
+    backend loading and quantization paths run without downloading a model.
+    """
+    pytest.importorskip("sentence_transformers")
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    directory = tmp_path_factory.mktemp("tiny_encoder")
+    words = "the a student is missing class failing math attendance credits".split()
+    special = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    (directory / "vocab.txt").write_text("\n".join(special + words) + "\n")
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(special) + len(words),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+    )
+    BertModel(config).save_pretrained(directory)
+    BertTokenizer(str(directory / "vocab.txt")).save_pretrained(directory)
+    return directory
+
+
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx"])
+def test_optimized_backend_matches_reference_on_a_tiny_model(backend, tiny_model_dir):
+    """
+    Ensures each optimized backend loads a local model and embeds close to the
+    full-precision reference, without needing the real model in the cache.
+    """
+    from src.fot_recommender.embedding_backends import (
+        encoder_parity,
+        load_embedding_model,
+    )
+
+    # Arrange
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("optimum")
+    reference = load_embedding_model(str(tiny_model_dir), backend="torch")
+    candidate = load_embedding_model(str(tiny_model_dir), backend=backend)
+    texts = ["the student is missing class", "failing math", "attendance credits"]
+    corpus = ["a student", "math class", "missing credits", "the attendance"]
+
+    # Act
+    report = encoder_parity(reference, candidate, texts, corpus)
+
+    # Assert
+    assert report["texts"] == len(texts) + len(corpus)
+    assert report["min_cosine"] >= 0.99
+    assert report["top1_agreement"] == 1.0
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx"])
+def test_optimized_backend_matches_reference_on_kb_and_examples(backend):
+    """
+    Ensures an optimized CPU backend embeds the knowledge base and the
+    example narratives close enough to the full-precision reference that
+    retrieval against the reference-built index is unchanged.
+    """
+    from src.fot_recommender.config import (
+        EMBEDDING_CONTENT_KEY,
+        EMBEDDING_MODEL_NAME,
+        FINAL_KB_CHUNKS_PATH,
+    )
+    from src.fot_recommender.embedding_backends import (
+        encoder_parity,
+        load_embedding_model,
+    )
+    from src.fot_recommender.examples import EXAMPLE_NARRATIVES
+    from src.fot_recommender.rag_pipeline import load_knowledge_base
+
+    # Arrange
+    pytest.importorskip("sentence_transformers")
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("optimum")
+    if not _model_is_cached(EMBEDDING_MODEL_NAME):
+        pytest.skip(
+            f"integration: {EMBEDDING_MODEL_NAME} is not in the local model cache; "
+            "download it to run the knowledge base parity check"
+        )
+    reference = load_embedding_model(backend="torch")
+    candidate = load_embedding_model(backend=backend)
+    corpus = [
+        chunk[EMBEDDING_CONTENT_KEY]
+        for chunk in load_knowledge_base(str(FINAL_KB_CHUNKS_PATH))
+    ]
+    narratives = [example["narrative"] for example in EXAMPLE_NARRATIVES]
+
+    # Act
+    report = encoder_parity(reference, candidate, narratives, corpus)
+
+    # Assert
+    assert report["min_cosine"] >= 0.95
+    assert report["mean_cosine"] >= 0.98
+    assert report["top3_overlap"] >= 2 / 3
@@ -0,0 +1,133 @@
+import pytest
+
+
+def _publish(directory, chunks, seed, keep=2):
+    """
+    Builds a small flat index and chunk store in `directory / "build"` and
+    publishes it as a version next to `directory / "kb_manifest.json"`.
+    """
+    import numpy as np
+
+    from src.fot_recommender.chunk_store import write_chunk_store
+    from src.fot_recommender.kb_snapshot import build_manifest, publish_version
+    from src.fot_recommender.vector_index import build_index, save_index
+
+    build_dir = directory / "build"
+    build_dir.mkdir(exist_ok=True)
+    embeddings = np.random.default_rng(seed).random((len(chunks), 8), "float32")
+    artifacts = {
+        "index": build_dir / "faiss_index.bin",
+        "chunk_store": build_dir / "chunks.jsonl",
+        "chunk_offsets": build_dir / "chunks.idx",
+    }
+    save_index(build_index(embeddings, index_type="flat"), artifacts["index"])
+    write_chunk_store(chunks, artifacts["chunk_store"], artifacts["chunk_offsets"])
+    manifest = build_manifest(
+        artifacts, embedding_model="test-model", dimension=8, chunk_count=len(chunks)
+    )
+    return publish_version(
+        manifest,
+        artifacts,
+        directory / "kb_manifest.json",
+        versions_dir=directory / "kb_versions",
+        keep=keep,
+    )
+
+
+def test_snapshot_manager_swaps_in_a_new_version_and_keeps_old_snapshots(tmp_path):
+    """
+    Ensures a newly published build is loaded and swapped in, while a snapshot
+    pinned before the swap (an in-flight request's) still reads the old version
+    and is closed once that request is done.
+    """
+    from functools import partial
+
+    from src.fot_recommender.kb_snapshot import SnapshotManager, load_snapshot
+
+    # Arrange
+    first = _publish(tmp_path, [{"title": "Old"}] * 3, seed=0)
+    manager = SnapshotManager(
+        tmp_path / "kb_manifest.json",
+        loader=partial(load_snapshot, embedding_model="test-model"),
+    )
+    manager.load()
+
+    # Act
+    with manager.pinned() as in_flight:
+        unchanged = manager.check_for_update()
+        second = _publish(tmp_path, [{"title": "New"}] * 5, seed=1)
+        swapped = manager.check_for_update()
+        old_row_during_request = in_flight.knowledge_base[0]
+
+    # Assert
+    assert not unchanged
+    assert swapped
+    assert first["version"] != second["version"]
+    assert in_flight.version == first["version"]
+    assert old_row_during_request == {"title": "Old"}
+    assert manager.current.version == second["version"]
+    assert manager.current.index.ntotal == len(manager.current.knowledge_base) == 5
+    with pytest.raises(ValueError):  # Closed once its last request ended.
+        in_flight.knowledge_base[0]
+
+
+def test_published_version_is_unaffected_by_the_next_build(tmp_path):
+    """
+    Ensures a replica starting while a build is rewriting the working
+    artifacts still loads the published version, and that only the newest
+    versions' directories are kept.
+    """
+    from src.fot_recommender.chunk_store import write_chunk_store
+    from src.fot_recommender.kb_snapshot import load_snapshot
+
+    # Arrange
+    _publish(tmp_path, [{"title": "First"}] * 2, seed=0, keep=2)
+    second = _publish(tmp_path, [{"title": "Second"}] * 3, seed=1, keep=2)
+    build_dir = tmp_path / "build"
+    # The next build is midway: its chunk store no longer matches its index.
+    write_chunk_store(
+        [{"title": "Third"}] * 7, build_dir / "chunks.jsonl", build_dir / "chunks.idx"
+    )
+
+    # Act
+    snapshot = load_snapshot(
+        tmp_path / "kb_manifest.json", embedding_model="test-model"
+    )
+    third = _publish(tmp_path, [{"title": "Third"}] * 7, seed=2, keep=2)
+
+    # Assert
+    assert snapshot.version == second["version"]
+    assert snapshot.knowledge_base[0] == {"title": "Second"}
+    assert sorted(d.name for d in (tmp_path / "kb_versions").iterdir()) == sorted(
+        [second["version"], third["version"]]
+    )
+
+
+def test_snapshot_manager_rejects_artifacts_that_do_not_match_the_manifest(tmp_path):
+    """Ensures a corrupt or half-published build never replaces the serving one."""
+    import json
+    from functools import partial
+
+    from src.fot_recommender.kb_snapshot import SnapshotManager, load_snapshot
+
+    # Arrange
+    first = _publish(tmp_path, [{"title": "Old"}] * 3, seed=0)
+    loader = partial(load_snapshot, embedding_model="test-model")
+    manager = SnapshotManager(tmp_path / "kb_manifest.json", loader=loader)
+    manager.load()
+    manifest_path = tmp_path / "kb_manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["version"] = "tampered"
+    manifest["artifacts"]["chunk_store"]["sha256"] = "0" * 64
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    # Act
+    swapped = manager.check_for_update()
+
+    # Assert
+    assert not swapped
+    assert manager.current.version == first["version"]
+    with pytest.raises(ValueError, match="does not match the manifest"):
+        loader(manifest_path)
+    with pytest.raises(ValueError, match="queries are encoded with"):
+        load_snapshot(manifest_path, embedding_model="another-model")
@@ -0,0 +1,96 @@
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+SAMPLE_CHUNKS = [
+    (
+        {
+            "title": "Tip 1",
+            "original_content": "Do this.",
+            "source_document": "doc_A",
+        },
+        0.9,
+    ),
+]
+
+
+def test_generate_recommendation_summary_serves_repeat_requests_from_cache(tmp_path):
+    """
+    Ensures an identical second request is answered from the response cache
+    without calling the LLM, and that the returned details say so.
+    """
+    from src.fot_recommender.llm_cache import ResponseCache
+    from src.fot_recommender.rag_pipeline import generate_recommendation_summary
+
+    cache = ResponseCache(tmp_path)
+
+    with patch(
+        "src.fot_recommender.rag_pipeline.genai.GenerativeModel"
+    ) as mock_gen_model:
+        mock_model_instance = MagicMock()
+        mock_model_instance.generate_content.return_value.text = "Fresh answer."
+        mock_gen_model.return_value = mock_model_instance
+
+        first_text, first_details = generate_recommendation_summary(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", response_cache=cache
+        )
+        second_text, second_details = generate_recommendation_summary(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", response_cache=cache
+        )
+        # Opting out always goes to the LLM
+        generate_recommendation_summary(
+            SAMPLE_CHUNKS,
+            "Student is struggling.",
+            "fake_key",
+            use_cache=False,
+            response_cache=cache,
+        )
+
+    assert first_text == second_text == "Fresh answer."
+    assert first_details["served_from_cache"] is False
+    assert second_details["served_from_cache"] is True
+    assert mock_model_instance.generate_content.call_count == 2
+
+
+def test_response_cache_expires_and_evicts_entries(tmp_path):
+    """
+    Ensures entries past their TTL are misses, and that the cache never holds
+    more than `max_entries`, evicting the least recently used entries first
+    down to the low-water mark, so eviction doesn't rescan on every put.
+    """
+    from src.fot_recommender.llm_cache import ResponseCache
+
+    # TTL: an entry written "two hours ago" with a one-hour TTL is gone
+    ttl_cache = ResponseCache(tmp_path / "ttl", ttl_seconds=3600)
+    with patch("src.fot_recommender.llm_cache.time.time", return_value=0):
+        ttl_cache.put("prompt", "model", "stale")
+    with patch("src.fot_recommender.llm_cache.time.time", return_value=7200):
+        assert ttl_cache.get("prompt", "model") is None
+
+    # Size bound: "a" is read after "b" is written, so "b" is evicted
+    lru_cache = ResponseCache(tmp_path / "lru", max_entries=2, evict_to_fraction=1)
+    lru_cache.put("a", "model", "A")
+    lru_cache.put("b", "model", "B")
+    past = time.time() - 60
+    for path in (tmp_path / "lru").glob("*.json"):
+        os.utime(path, (past, past))
+    assert lru_cache.get("a", "model") == "A"
+    lru_cache.put("c", "model", "C")
+
+    assert len(list((tmp_path / "lru").glob("*.json"))) == 2
+    assert lru_cache.get("b", "model") is None
+    assert lru_cache.get("a", "model") == "A"
+    assert lru_cache.get("c", "model") == "C"
+
+    # Low-water mark: going over 10 entries trims back to 8, leaving headroom
+    batch_cache = ResponseCache(
+        tmp_path / "batch", max_entries=10, evict_to_fraction=0.8
+    )
+    for i in range(11):
+        batch_cache.put(f"prompt {i}", "model", "text")
+    after_eviction = len(list((tmp_path / "batch").glob("*.json")))
+    batch_cache.put("prompt 11", "model", "text")
+    batch_cache.put("prompt 12", "model", "text")
+
+    assert after_eviction == 8
+    assert len(list((tmp_path / "batch").glob("*.json"))) == 10
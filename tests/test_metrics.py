@@ -0,0 +1,69 @@
+import urllib.error
+import urllib.request
+
+
+def test_timed_records_stage_histogram_in_prometheus_format():
+    """Ensures timed spans land in per-stage histograms with percentiles."""
+    from src.fot_recommender.metrics import Histogram, MetricsRegistry, timed
+    from src.fot_recommender import metrics
+
+    # Arrange
+    registry = MetricsRegistry()
+    histogram = registry.register(
+        Histogram("test_stage_seconds", "Test stages.", labelnames=("stage",))
+    )
+    original = metrics.STAGE_DURATION
+    metrics.STAGE_DURATION = histogram
+
+    # Act
+    try:
+        for _ in range(3):
+            with timed("encode"):
+                pass
+        histogram.observe(2.0, stage="llm_generate")
+    finally:
+        metrics.STAGE_DURATION = original
+    text = registry.render_prometheus()
+    snapshot = registry.snapshot()["test_stage_seconds"]
+
+    # Assert
+    assert "# TYPE test_stage_seconds histogram" in text
+    assert 'test_stage_seconds_count{stage="encode"} 3' in text
+    assert 'test_stage_seconds_bucket{stage="llm_generate",le="2.5"} 1' in text
+    assert 'test_stage_seconds_bucket{stage="llm_generate",le="1"} 0' in text
+    assert snapshot["encode"]["count"] == 3
+    assert 1.0 < snapshot["llm_generate"]["p50"] <= 2.5
+
+
+def test_metrics_server_serves_registry():
+    """Ensures the HTTP endpoint exposes the registry at /metrics only."""
+    from src.fot_recommender.metrics import (
+        Counter,
+        MetricsRegistry,
+        start_metrics_server,
+    )
+
+    # Arrange
+    registry = MetricsRegistry()
+    counter = registry.register(
+        Counter("test_requests_total", "Test requests.", labelnames=("status",))
+    )
+    counter.inc(status="ok")
+    server = start_metrics_server(0, registry=registry, host="127.0.0.1")
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    # Act
+    try:
+        with urllib.request.urlopen(f"{base}/metrics") as response:
+            body = response.read().decode("utf-8")
+        try:
+            urllib.request.urlopen(f"{base}/other")
+            status = 200
+        except urllib.error.HTTPError as e:
+            status = e.code
+    finally:
+        server.shutdown()
+
+    # Assert
+    assert 'test_requests_total{status="ok"} 1' in body
+    assert status == 404
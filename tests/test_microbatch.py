@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+
+def test_microbatcher_coalesces_concurrent_submissions():
+    """
+    Ensures items submitted while the worker is busy are processed together
+    in one call, and that each caller gets its own result.
+    """
+    from src.fot_recommender.microbatch import MicroBatcher
+
+    # Arrange
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def process(items):
+        calls.append(list(items))
+        started.set()
+        release.wait(5)  # Hold the first batch so the rest queue up behind it.
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=1)
+
+    # Act
+    first = batcher.submit(0)
+    started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 6)]
+    release.set()
+    results = [f.result(timeout=5) for f in [first] + futures]
+    batcher.close()
+
+    # Assert
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert calls == [[0], [1, 2, 3, 4, 5]]
+
+
+def test_microbatcher_fails_every_future_in_a_failed_batch():
+    """Ensures a `process_batch` error reaches each caller in the batch."""
+    from src.fot_recommender.microbatch import MicroBatcher
+
+    # Arrange
+    def process(items):
+        raise ValueError("encoder down")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+
+    # Act
+    futures = [batcher.submit(i) for i in range(3)]
+
+    # Assert
+    for future in futures:
+        with pytest.raises(ValueError, match="encoder down"):
+            future.result(timeout=5)
+    batcher.close()
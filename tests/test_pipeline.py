@@ -1,6 +1,18 @@
+import time
 from unittest.mock import MagicMock, patch
 import numpy as np
 
+SAMPLE_CHUNKS = [
+    (
+        {
+            "title": "Tip 1",
+            "original_content": "Do this.",
+            "source_document": "doc_A",
+        },
+        0.9,
+    ),
+]
+
 
 def test_search_interventions_filters_by_score():
     """
@@ -66,6 +78,9 @@ def test_generate_recommendation_summary_builds_correct_prompt():
     ) as mock_gen_model:
         # Create a mock instance that the function will use
         mock_model_instance = MagicMock()
+        mock_model_instance.generate_content.return_value = MagicMock(
+            text="Recommendation."
+        )
         mock_gen_model.return_value = mock_model_instance
 
         generate_recommendation_summary(
@@ -88,3 +103,381 @@ def test_generate_recommendation_summary_builds_correct_prompt():
         assert "Title: Tip 1" in actual_prompt
         assert "Content: Do this." in actual_prompt
         assert "(Source Document: doc_A)" in actual_prompt
+
+
+def test_search_interventions_batch_returns_per_query_results():
+    """
+    Ensures the batch search encodes all queries in one call, searches the
+    index once, and applies the score threshold to each query's row.
+    """
+    from src.fot_recommender.rag_pipeline import search_interventions_batch
+
+    # 1. Arrange: Two queries against a three-chunk knowledge base
+    mock_model = MagicMock()
+    mock_model.encode.return_value = np.zeros((2, 4), dtype="float32")
+    mock_index = MagicMock()
+
+    sample_kb = [{"id": 0}, {"id": 1}, {"id": 2}]
+
+    # Row 0 has two strong matches; row 1 has one match, a weak one,
+    # and an empty FAISS slot (-1).
+    mock_index.search.return_value = (
+        np.array([[0.9, 0.6], [0.8, 0.2]]),
+        np.array([[2, 0], [1, -1]]),
+    )
+
+    # 2. Act
+    results = search_interventions_batch(
+        queries=["query one", "query two"],
+        model=mock_model,
+        index=mock_index,
+        knowledge_base=sample_kb,
+        k=2,
+        min_similarity_score=0.5,
+    )
+
+    # 3. Assert: One encode call, one search call, per-query filtered results
+    mock_model.encode.assert_called_once_with(["query one", "query two"])
+    mock_index.search.assert_called_once()
+    assert len(results) == 2
+    assert [(chunk["id"], score) for chunk, score in results[0]] == [(2, 0.9), (0, 0.6)]
+    assert [(chunk["id"], score) for chunk, score in results[1]] == [(1, 0.8)]
+
+
+def test_create_embeddings_only_encodes_uncached_chunks(tmp_path):
+    """
+    Ensures that with an EmbeddingStore, chunks already embedded by a previous
+    build are served from the cache and only new content is encoded.
+    """
+    from src.fot_recommender.embedding_cache import EmbeddingStore
+    from src.fot_recommender.rag_pipeline import create_embeddings
+
+    # 1. Arrange: Warm a persisted cache with one chunk
+    cache_path = tmp_path / "embedding_cache.npz"
+    warm_cache = EmbeddingStore(cache_path, "test-model")
+    warm_cache.put_many(["old chunk"], np.array([[1.0, 0.0]]))
+    warm_cache.save()
+
+    mock_model = MagicMock()
+    mock_model.encode.return_value = np.array([[0.0, 1.0]])
+    chunks = [
+        {"content_for_embedding": "old chunk"},
+        {"content_for_embedding": "new chunk"},
+    ]
+
+    # 2. Act: Reload the cache from disk and embed both chunks
+    embeddings = create_embeddings(
+        chunks, mock_model, cache=EmbeddingStore(cache_path, "test-model")
+    )
+
+    # 3. Assert: Only the new chunk was encoded; order is preserved
+    mock_model.encode.assert_called_once()
+    assert mock_model.encode.call_args[0][0] == ["new chunk"]
+    np.testing.assert_array_equal(embeddings, [[1.0, 0.0], [0.0, 1.0]])
+
+    # A different model name must not reuse these vectors
+    assert EmbeddingStore(cache_path, "other-model").missing(["old chunk"]) == [
+        "old chunk"
+    ]
+
+
+def test_query_embedding_cache_skips_model_for_repeated_narratives():
+    """
+    Ensures a resubmitted narrative (even with different whitespace) is served
+    from the query cache, and that the LRU bound evicts the oldest entry.
+    """
+    from src.fot_recommender.embedding_cache import QueryEmbeddingCache
+    from src.fot_recommender.rag_pipeline import encode_queries
+
+    # 1. Arrange
+    mock_model = MagicMock()
+    mock_model.encode.side_effect = lambda texts: np.ones((len(texts), 3))
+    cache = QueryEmbeddingCache(maxsize=2)
+
+    # 2. Act: Warm with two narratives, then resubmit one with extra spaces
+    encode_queries(["narrative A", "narrative B"], mock_model, query_cache=cache)
+    embeddings = encode_queries(["  narrative   A "], mock_model, query_cache=cache)
+
+    # 3. Assert: The second call never reached the model
+    assert mock_model.encode.call_count == 1
+    assert embeddings.shape == (1, 3)
+    assert cache.stats()["hits"] == 1
+
+    # Adding a third entry evicts the least recently used ("narrative B")
+    encode_queries(["narrative C"], mock_model, query_cache=cache)
+    assert len(cache) == 2
+    encode_queries(["narrative B"], mock_model, query_cache=cache)
+    assert mock_model.encode.call_count == 3
+
+
+def test_cached_embeddings_keep_full_float32_precision(tmp_path):
+    """
+    Ensures cached chunk and query vectors come back bit-for-bit as encoded,
+    so the build's float32 drift baseline is real and a cached query scores
+    exactly like an uncached one, whatever the index storage precision.
+    """
+    from src.fot_recommender.embedding_cache import EmbeddingStore, QueryEmbeddingCache
+
+    # Arrange: values that float16 would round
+    vector = np.array([[0.1234567, 0.7654321, 0.3333333]], dtype="float32")
+    store = EmbeddingStore(tmp_path / "cache.npz", "test-model")
+    query_cache = QueryEmbeddingCache(maxsize=1)
+
+    # Act
+    store.put_many(["chunk"], vector)
+    store.save()
+    reloaded = EmbeddingStore(tmp_path / "cache.npz", "test-model")
+    query_cache.put("query", "test-model", vector[0])
+
+    # Assert
+    assert np.array_equal(reloaded.get_many(["chunk"]), vector)
+    assert reloaded.get_many(["chunk"]).dtype == np.float32
+    assert np.array_equal(query_cache.get("query", "test-model"), vector[0])
+
+
+def test_importing_pipeline_does_not_load_heavy_dependencies():
+    """
+    Ensures torch, sentence_transformers, faiss and the Gemini SDK are only
+    imported on first use, keeping cold start cheap for every entry point.
+    """
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, fot_recommender, fot_recommender.rag_pipeline; "
+        "heavy = ['torch', 'sentence_transformers', 'faiss', 'google.generativeai']; "
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_generate_recommendation_summary_async_reuses_one_client():
+    """
+    Ensures the async path awaits the async generate API and that the model
+    client is created once per (api_key, model_name), not once per request.
+    """
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    from src.fot_recommender.rag_pipeline import (
+        generate_recommendation_summary_async,
+    )
+
+    sample_chunks = [
+        (
+            {"title": "Tip 1", "original_content": "Do this.", "source_document": "A"},
+            0.9,
+        ),
+    ]
+
+    with patch(
+        "src.fot_recommender.rag_pipeline.genai.GenerativeModel"
+    ) as mock_gen_model:
+        mock_model_instance = MagicMock()
+        mock_model_instance.generate_content_async = AsyncMock(
+            return_value=MagicMock(text="Async answer.")
+        )
+        mock_gen_model.return_value = mock_model_instance
+
+        async def run_concurrently():
+            return await asyncio.gather(
+                *[
+                    generate_recommendation_summary_async(
+                        sample_chunks, f"Student {i}.", "fake_key", use_cache=False
+                    )
+                    for i in range(3)
+                ]
+            )
+
+        results = asyncio.run(run_concurrently())
+
+    assert [text for text, _ in results] == ["Async answer."] * 3
+    assert mock_gen_model.call_count == 1
+    assert mock_model_instance.generate_content_async.await_count == 3
+
+
+def test_fake_backend_generates_offline():
+    """Ensures the fake LLM backend answers both sync and async calls offline."""
+    import asyncio
+
+    from src.fot_recommender.fake_llm import FakeGenerativeModel
+
+    model = FakeGenerativeModel("fake-model", latency_seconds=0)
+    prompt = "--- Intervention Chunk 1 ---\nTitle: Tip"
+
+    assert "1 intervention chunks" in model.generate_content(prompt).text
+    assert asyncio.run(model.generate_content_async(prompt)).text == (
+        model.generate_content(prompt).text
+    )
+
+
+def test_stream_recommendation_summary_yields_chunks_and_caches_full_text(tmp_path):
+    """
+    Ensures the streaming path yields partial text as it arrives, caches the
+    joined response once complete, and replays a cache hit as one chunk.
+    """
+    from src.fot_recommender.llm_cache import ResponseCache
+    from src.fot_recommender.rag_pipeline import stream_recommendation_summary
+
+    cache = ResponseCache(tmp_path)
+
+    with patch(
+        "src.fot_recommender.rag_pipeline.genai.GenerativeModel"
+    ) as mock_gen_model:
+        mock_model_instance = MagicMock()
+        mock_model_instance.generate_content.return_value = iter(
+            [MagicMock(text="Part one. "), MagicMock(text="Part two.")]
+        )
+        mock_gen_model.return_value = mock_model_instance
+
+        stream, details = stream_recommendation_summary(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", response_cache=cache
+        )
+        # Nothing is sent to the LLM until the stream is consumed
+        mock_model_instance.generate_content.assert_not_called()
+        first_chunks = list(stream)
+
+        replay, replay_details = stream_recommendation_summary(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", response_cache=cache
+        )
+        replay_chunks = list(replay)
+
+    assert first_chunks == ["Part one. ", "Part two."]
+    assert details["served_from_cache"] is False
+    assert mock_model_instance.generate_content.call_args.kwargs == {"stream": True}
+    assert replay_chunks == ["Part one. Part two."]
+    assert replay_details["served_from_cache"] is True
+
+
+def test_stream_recommendation_summary_async_with_fake_backend(tmp_path):
+    """Ensures the async stream works end to end against the offline backend."""
+    import asyncio
+
+    from src.fot_recommender import rag_pipeline
+    from src.fot_recommender.fake_llm import FakeGenerativeModel
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    with patch.object(
+        rag_pipeline,
+        "get_generative_model",
+        return_value=FakeGenerativeModel("fake-model", latency_seconds=0),
+    ):
+        stream, _ = rag_pipeline.stream_recommendation_summary_async(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", use_cache=False
+        )
+        chunks = asyncio.run(collect(stream))
+
+    assert len(chunks) > 1
+    assert "1 intervention chunks" in "".join(chunks)
+
+
+def test_generate_all_personas_shares_context_and_runs_concurrently():
+    """
+    Ensures every persona is generated from one shared context, with the LLM
+    calls overlapping so the wall time is close to a single call.
+    """
+    from src.fot_recommender import rag_pipeline
+    from src.fot_recommender.fake_llm import FakeGenerativeModel
+    from src.fot_recommender.prompts import PROMPT_TEMPLATES
+
+    # Arrange
+    latency = 0.3
+    fake_model = FakeGenerativeModel("fake-model", latency_seconds=latency)
+
+    # Act
+    with (
+        patch.object(rag_pipeline, "get_generative_model", return_value=fake_model),
+        patch.object(
+            rag_pipeline, "build_context", wraps=rag_pipeline.build_context
+        ) as build_context,
+    ):
+        start = time.perf_counter()
+        results = rag_pipeline.generate_all_personas(
+            SAMPLE_CHUNKS, "Student is struggling.", "fake_key", use_cache=False
+        )
+        elapsed = time.perf_counter() - start
+
+    # Assert
+    assert set(results) == set(PROMPT_TEMPLATES)
+    assert build_context.call_count == 1
+    for persona, (text, details) in results.items():
+        assert details["persona"] == persona
+        assert "1 intervention chunks" in text
+    assert elapsed < 2 * latency
+
+
+class _HashEncoder:
+    """A deterministic stand-in for SentenceTransformer, loadable in workers."""
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        import hashlib
+
+        return np.stack(
+            [
+                np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)
+                .astype("float32")
+                .reshape(4, 8)
+                .mean(axis=0)
+                for text in texts
+            ]
+        )
+
+
+def _hash_encoder_factory(model_name):
+    return _HashEncoder()
+
+
+def test_worker_pool_embeddings_match_serial_path():
+    """
+    Ensures sharding chunks across worker processes returns the same
+    embeddings, in the same order, as encoding them in-process.
+    """
+    from src.fot_recommender.embedding_pool import encode_texts
+
+    # 1. Arrange: More texts than one batch, with a ragged final batch
+    texts = [f"chunk {i}" for i in range(23)]
+
+    # 2. Act
+    serial = encode_texts(texts, _HashEncoder(), batch_size=5, num_workers=1)
+    pooled = encode_texts(
+        texts,
+        batch_size=5,
+        num_workers=2,
+        model_factory=_hash_encoder_factory,
+    )
+
+    # 3. Assert: Bit-identical and in input order
+    assert serial.shape == (23, 8)
+    np.testing.assert_array_equal(pooled, serial)
+
+
+def test_worker_initializer_limits_torch_threads_to_its_share_of_cores():
+    """
+    Ensures each pool worker caps torch's intra-op threads at its share of the
+    cores, so N workers don't each spin up one thread per core.
+    """
+    from src.fot_recommender import embedding_pool
+
+    # 1. Arrange
+    mock_torch = MagicMock()
+
+    # 2. Act
+    with (
+        patch.object(embedding_pool, "torch", mock_torch),
+        patch.object(embedding_pool.os, "cpu_count", return_value=8),
+    ):
+        embedding_pool._init_worker(
+            _hash_encoder_factory, "test-model", embedding_pool.threads_per_worker(3)
+        )
+        oversubscribed = embedding_pool.threads_per_worker(16)
+
+    # 3. Assert
+    mock_torch.set_num_threads.assert_called_once_with(2)
+    assert isinstance(embedding_pool._worker_model, _HashEncoder)
+    assert oversubscribed == 1
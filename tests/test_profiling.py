@@ -0,0 +1,30 @@
+def test_profiled_writes_profile_to_per_run_directory(tmp_path):
+    """Ensures an enabled profile is written where its up-front path says."""
+    from src.fot_recommender.profiling import profiled
+
+    # Arrange
+    def work():
+        return sum(i * i for i in range(10_000))
+
+    # Act
+    with profiled("request", enabled=True, base_dir=tmp_path) as profile:
+        work()
+
+    # Assert
+    assert profile.path is not None
+    assert profile.path.parent.parent == tmp_path
+    assert profile.path.exists()
+    assert "work" in profile.path.with_suffix(".txt").read_text(encoding="utf-8")
+
+
+def test_profiled_is_a_no_op_when_disabled(tmp_path):
+    """Ensures nothing is profiled or written unless profiling is enabled."""
+    from src.fot_recommender.profiling import profiled
+
+    # Act
+    with profiled("request", enabled=False, base_dir=tmp_path) as profile:
+        pass
+
+    # Assert
+    assert profile.path is None
+    assert not any(tmp_path.iterdir())
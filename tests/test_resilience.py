@@ -0,0 +1,171 @@
+from unittest.mock import patch
+
+import pytest
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_spaces_requests_and_tokens():
+    """Ensures calls beyond the per-minute budgets are told how long to wait."""
+    from src.fot_recommender.resilience import RateLimiter
+
+    # Arrange
+    clock = _Clock()
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600, clock=clock)
+    token_limiter = RateLimiter(1000, tokens_per_minute=600, clock=clock)
+
+    # Act
+    waits = [limiter.reserve(10), limiter.reserve(10), limiter.reserve(10)]
+    token_limiter.reserve(300)
+    token_heavy_wait = token_limiter.reserve(1000)
+
+    # Assert
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(30.0)  # One request per 30 s.
+    # Larger than the whole bucket: waits until the bucket is full again.
+    assert token_heavy_wait == pytest.approx(30.0)
+
+
+def test_guard_retries_retryable_errors_then_opens_the_circuit():
+    """
+    Ensures rate-limit errors from the fake backend are retried with backoff,
+    that repeated failures open the circuit so later calls fail fast, and
+    that a successful trial call after the reset period closes it again.
+    """
+    from src.fot_recommender.fake_llm import FakeGenerativeModel
+    from src.fot_recommender.resilience import (
+        CircuitBreaker,
+        CircuitOpenError,
+        LLMGuard,
+        RateLimiter,
+    )
+
+    # Arrange
+    clock = _Clock()
+    sleeps = []
+    flaky = FakeGenerativeModel("fake-model", latency_seconds=0, error_rate=1.0)
+    guard = LLMGuard(
+        limiter=RateLimiter(1000, 1_000_000, clock=clock),
+        breaker=CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=clock),
+        max_retries=5,
+        sleep=sleeps.append,
+    )
+
+    # Act
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: flaky.generate_content("prompt"))
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: flaky.generate_content("prompt"))
+    clock.now = 31
+    flaky.error_rate = 0
+    response = guard.call(lambda: flaky.generate_content("prompt"))
+
+    # Assert
+    assert len(sleeps) == 3  # Backoff after each of the three failures.
+    assert all(0 <= delay <= 2**i for i, delay in enumerate(sleeps))
+    assert "Recommendation" in response.text
+    assert guard.breaker.state == "closed"
+
+
+def test_cancelled_half_open_trial_releases_the_circuit():
+    """
+    Ensures a half-open trial call that is cancelled (e.g. the client went
+    away mid-generation) frees the trial slot, so the next call can close the
+    circuit instead of it staying half-open forever.
+    """
+    import asyncio
+
+    from src.fot_recommender.resilience import CircuitBreaker, LLMGuard, RateLimiter
+
+    # Arrange
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    guard = LLMGuard(limiter=RateLimiter(1000, 1_000_000, clock=clock), breaker=breaker)
+    breaker.record_failure()
+    clock.now = 31
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        trial = asyncio.create_task(guard.call_async(hang))
+        await asyncio.sleep(0)
+        state_during_trial = breaker.state
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return state_during_trial, await guard.call_async(ok)
+
+    # Act
+    state_during_trial, result = asyncio.run(scenario())
+
+    # Assert
+    assert state_during_trial == "half_open"
+    assert result == "ok"
+    assert breaker.state == "closed"
+
+
+def test_non_retryable_error_in_half_open_trial_does_not_close_the_circuit():
+    """
+    Ensures a bad request during the half-open trial frees the trial slot
+    without closing the circuit: only a successful call proves recovery.
+    """
+    from src.fot_recommender.resilience import CircuitBreaker, LLMGuard, RateLimiter
+
+    # Arrange
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    guard = LLMGuard(limiter=RateLimiter(1000, 1_000_000, clock=clock), breaker=breaker)
+    breaker.record_failure()
+    clock.now = 31
+
+    def bad_request():
+        raise KeyError("prompt")
+
+    # Act
+    with pytest.raises(KeyError):
+        guard.call(bad_request)
+    state_after_bad_request = breaker.state
+    result = guard.call(lambda: "ok")
+
+    # Assert
+    assert state_after_bad_request == "half_open"
+    assert result == "ok"
+    assert breaker.state == "closed"
+
+
+def test_generate_recommendation_summary_raises_when_retries_are_exhausted():
+    """Ensures a failed generation raises, rather than returning its error as text."""
+    from src.fot_recommender import rag_pipeline
+    from src.fot_recommender.fake_llm import FakeGenerativeModel
+    from src.fot_recommender.rag_pipeline import GenerationError
+    from src.fot_recommender.resilience import LLMGuard
+
+    # Arrange
+    chunks = [({"title": "T", "source_document": "d", "original_content": "c"}, 0.9)]
+    failing = FakeGenerativeModel("fake-model", latency_seconds=0, error_rate=1.0)
+    guard = LLMGuard(max_retries=2, sleep=lambda _: None)
+
+    # Act
+    with (
+        patch.object(rag_pipeline, "get_generative_model", return_value=failing),
+        patch.object(rag_pipeline, "get_llm_guard", return_value=guard),
+    ):
+        with pytest.raises(GenerationError) as excinfo:
+            rag_pipeline.generate_recommendation_summary(
+                chunks, "Student is struggling.", "fake_key", use_cache=False
+            )
+
+    # Assert
+    assert "429" in str(excinfo.value)
+    assert excinfo.value.prompt_details["error"] == str(excinfo.value)
+    assert excinfo.value.prompt_details["persona"] == "teacher"
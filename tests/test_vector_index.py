@@ -0,0 +1,184 @@
+import numpy as np
+import pytest
+
+
+def _clustered_unit_vectors(n, dimension=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dimension))
+    vectors = centers[rng.integers(0, 20, n)] + 0.3 * rng.standard_normal(
+        (n, dimension)
+    )
+    vectors = vectors.astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw", "ivfpq"])
+def test_build_index_supports_each_type_with_recall_report(index_type, monkeypatch):
+    """
+    Ensures every configured index type builds (training where required),
+    holds all vectors, and gets a recall report against the exact baseline.
+    """
+    from src.fot_recommender import vector_index
+
+    # PQ sub-quantizers must divide the small test dimension
+    monkeypatch.setattr(vector_index, "FAISS_PQ_M", 8)
+    embeddings = _clustered_unit_vectors(2000)
+
+    index = vector_index.build_index(embeddings, index_type=index_type)
+    report = vector_index.recall_report(index, embeddings, ks=[1, 10], n_queries=200)
+
+    assert index.ntotal == 2000
+    assert report["n_queries"] == 200
+    assert set(report["recall"]) == {"recall@1", "recall@10"}
+    if index_type == "flat":
+        assert report["recall"]["recall@10"] == 1.0
+    else:
+        assert 0.0 < report["recall"]["recall@10"] <= 1.0
+
+
+def test_build_index_caps_ivf_lists_for_small_corpora():
+    """Ensures a tiny KB (like the real 27-chunk one) can still train an IVF index."""
+    from src.fot_recommender.vector_index import build_index, describe_index
+
+    index = build_index(_clustered_unit_vectors(27), index_type="ivf")
+
+    assert describe_index(index)["nlist"] == 1
+    assert index.ntotal == 27
+
+
+def test_build_index_caps_pq_bits_so_training_has_enough_points(capfd, monkeypatch):
+    """
+    Ensures a small IVF-PQ corpus gets few enough PQ centroids that FAISS
+    k-means never trains them on too few points.
+    """
+    from src.fot_recommender import vector_index
+
+    monkeypatch.setattr(vector_index, "FAISS_PQ_M", 8)
+
+    index = vector_index.build_index(_clustered_unit_vectors(1000), index_type="ivfpq")
+
+    nbits = vector_index.describe_index(index)["pq_nbits"]
+    assert 1000 >= vector_index.MIN_POINTS_PER_CENTROID * 2**nbits
+    assert "please provide at least" not in capfd.readouterr().err
+
+
+def test_recall_at_k_counts_overlap_with_exact_ids():
+    from src.fot_recommender.vector_index import recall_at_k
+
+    exact = np.array([[0, 1, 2], [3, 4, -1]])
+    approx = np.array([[0, 2, 9], [4, 8, 7]])
+
+    assert recall_at_k(approx, exact) == pytest.approx(3 / 5)
+
+
+@pytest.mark.parametrize("storage_dtype", ["float16", "int8"])
+def test_quantized_storage_shrinks_index_with_bounded_score_drift(storage_dtype):
+    """
+    Ensures float16/int8 storage builds a smaller scalar-quantized index whose
+    scores stay close to the exact float32 inner products.
+    """
+    from src.fot_recommender import vector_index
+
+    embeddings = _clustered_unit_vectors(500, dimension=64)
+
+    index = vector_index.build_index(
+        embeddings, index_type="flat", storage_dtype=storage_dtype
+    )
+    report = vector_index.quantization_report(index, embeddings, k=5, n_queries=50)
+
+    assert index.ntotal == 500
+    assert report["memory"]["index_bytes"] < report["memory"]["float32_bytes"]
+    assert report["score_drift"]["pairs"] == 250
+    assert report["score_drift"]["max_abs"] < 0.02
+
+
+def test_l2_normalize_produces_unit_rows_and_keeps_zero_rows():
+    """Ensures inner product over normalized embeddings is cosine similarity."""
+    from src.fot_recommender.vector_index import l2_normalize
+
+    normalized = l2_normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+    assert normalized.dtype == np.float32
+    np.testing.assert_allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+def test_id_map_filters_are_applied_inside_faiss_search(index_type):
+    """
+    Ensures include/exclude filters built from the id maps restrict a single
+    FAISS search to matching chunks, for each index family.
+    """
+    from src.fot_recommender import metadata_filter, vector_index
+
+    # Arrange: 400 chunks spread over 4 sources and 5 concepts
+    chunks = [
+        {"source_document": f"doc_{i % 4}", "title": f"Concept {i % 5}"}
+        for i in range(400)
+    ]
+    embeddings = _clustered_unit_vectors(400)
+    index = vector_index.build_index(embeddings, index_type=index_type)
+    id_maps = metadata_filter.IdMaps(metadata_filter.build_id_maps(chunks))
+
+    # Act
+    include = id_maps.search_parameters(
+        index, include_sources=["doc_1"], exclude_concepts=["Concept 3"]
+    )
+    exclude = id_maps.search_parameters(index, exclude_sources=["doc_0", "doc_2"])
+    _, included_ids = index.search(embeddings[:20], 10, params=include)
+    _, excluded_ids = index.search(embeddings[:20], 10, params=exclude)
+
+    # Assert
+    assert id_maps.search_parameters(index) is None
+    included = [chunks[i] for i in included_ids.ravel() if i != -1]
+    excluded = [chunks[i] for i in excluded_ids.ravel() if i != -1]
+    assert included and excluded
+    assert all(c["source_document"] == "doc_1" for c in included)
+    assert all(c["title"] != "Concept 3" for c in included)
+    assert all(c["source_document"] in ("doc_1", "doc_3") for c in excluded)
+
+
+def test_range_mode_returns_every_qualifying_chunk_sorted_and_capped():
+    """
+    Ensures range retrieval returns all chunks above the threshold (not just
+    k of them), best first, capped at `max_results`, and that top-k mode
+    would have cut the same query short.
+    """
+    from unittest.mock import MagicMock
+
+    from src.fot_recommender import vector_index
+    from src.fot_recommender.rag_pipeline import search_interventions_batch
+
+    # Arrange: Query 0 scores 5 chunks above 0.5 (chunk 5 at 0.48), query 1 none
+    embeddings = np.eye(8, dtype="float32")
+    embeddings[1:6, 0] = [0.9, 0.8, 0.7, 0.6, 0.55]
+    embeddings = vector_index.l2_normalize(embeddings)
+    index = vector_index.build_index(embeddings, index_type="flat")
+    knowledge_base = [{"id": i} for i in range(8)]
+    model = MagicMock()
+    model.encode.return_value = np.eye(8, dtype="float32")[[0, 7]] * [[1], [-1]]
+
+    def search(mode, **kwargs):
+        return search_interventions_batch(
+            ["strong match", "no match"],
+            model,
+            index,
+            knowledge_base,
+            k=3,
+            min_similarity_score=0.5,
+            mode=mode,
+            **kwargs,
+        )
+
+    # Act
+    top_k = search("topk")
+    ranged = search("range", max_results=10)
+    capped = search("range", max_results=4)
+
+    # Assert
+    assert len(top_k[0]) == 3
+    assert [chunk["id"] for chunk, _ in ranged[0]] == [0, 1, 2, 3, 4]
+    assert [score for _, score in ranged[0]] == sorted(
+        [score for _, score in ranged[0]], reverse=True
+    )
+    assert len(capped[0]) == 4
+    assert ranged[1] == [] and capped[1] == []